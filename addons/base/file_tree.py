@@ -0,0 +1,79 @@
+"""Concurrent walking of a storage addon's WaterButler file tree.
+
+Listing a folder is one blocking round trip to WaterButler, so walking a tree with many folders
+one listing at a time mostly waits on the network. `walk_file_tree` keeps up to `max_workers`
+listings in flight, each worker thread reusing the connections of its own `requests.Session`.
+
+The tree is filled in place: a folder has `children` once it has been listed, so a tree left
+partially walked by an error can be walked again later without listing those folders again.
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+
+_local = threading.local()
+
+
+def get_session():
+    """The calling thread's WaterButler session. Cookies are passed per request and never stored,
+    so requests made on behalf of different users can share the connections.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        _local.session = session
+    return session
+
+
+def _unlisted_folders(filenode):
+    """Folders at or below `filenode` that have not been listed yet"""
+    stack = [filenode]
+    while stack:
+        node = stack.pop()
+        if node.get('kind') == 'file':
+            continue
+        if 'children' in node:
+            stack.extend(node['children'])
+        else:
+            yield node
+
+
+def walk_file_tree(root, list_folder, max_workers):
+    """List every unlisted folder at or below `root` with `list_folder(folder)`, which returns
+    the metadata of the folder's children, setting it as the folder's `children`. `root` is
+    listed in the calling thread, before any worker starts.
+
+    On the first error no more listings are started; those in flight are finished and kept,
+    then the error is raised, leaving `root` as far as it got.
+    """
+    if root.get('kind') != 'file' and 'children' not in root:
+        _list_into(root, list_folder)
+    pending = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for folder in _unlisted_folders(root):
+                pending.add(executor.submit(_list_into, folder, list_folder))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for child in future.result():
+                        for folder in _unlisted_folders(child):
+                            pending.add(executor.submit(_list_into, folder, list_folder))
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            raise
+    return root
+
+
+def _list_into(folder, list_folder):
+    children = list_folder(folder)
+    for child in children:
+        # Only listing a folder says what's in it
+        child.pop('children', None)
+    folder['children'] = children
+    return children
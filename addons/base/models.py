@@ -3,7 +3,6 @@ import os
 import time
 
 import markupsafe
-import requests
 from django.db import models
 from django.utils import timezone
 from framework.auth import Auth
@@ -18,6 +17,7 @@ from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from osf.utils.fields import NonNaiveDateTimeField
 from website import settings
 from addons.base import logger, serializer
+from addons.base.file_tree import get_session, walk_file_tree
 from website.oauth.signals import oauth_complete
 
 lookup = TemplateLookup(
@@ -585,7 +585,7 @@ class BaseStorageAddon:
             **kwargs
         )
 
-        res = requests.get(metadata_url, cookies={settings.COOKIE_NAME: kwargs.get('cookie')})
+        res = get_session().get(metadata_url, cookies={settings.COOKIE_NAME: kwargs.get('cookie')})
 
         if res.status_code != 200:
             raise HTTPError(res.status_code, data={'error': res.json()})
@@ -600,7 +600,11 @@ class BaseStorageAddon:
 
     def _get_file_tree(self, filenode=None, user=None, cookie=None, version=None):
         """
-        Recursively get file metadata
+        Get file metadata of the whole tree below `filenode`, listing up to
+        `ARCHIVE_FILE_TREE_WORKERS` folders at once. Folders of `filenode` that already
+        have `children` aren't listed again, so a partial tree can be passed back in to
+        resume it. If listing fails, the tree as far as it got is the error's
+        `partial_file_tree`.
         """
         filenode = filenode or {
             'path': '/',
@@ -609,15 +613,25 @@ class BaseStorageAddon:
         }
         if filenode.get('kind') == 'file':
             return filenode
+        if not cookie and user:
+            cookie = user.get_or_create_cookie().decode()
+
+        def list_folder(folder):
+            # Only the top level is listed at `version`
+            return self._get_fileobj_child_metadata(
+                folder,
+                user,
+                cookie=cookie,
+                version=version if folder is filenode else None,
+            )
 
-        kwargs = {
-            'version': version,
-            'cookie': cookie,
-        }
-        filenode['children'] = [
-            self._get_file_tree(child, user, cookie=cookie)
-            for child in self._get_fileobj_child_metadata(filenode, user, **kwargs)
-        ]
+        try:
+            # The top level is listed first in this thread, which also loads what the
+            # listings need from the database before the worker threads use it
+            walk_file_tree(filenode, list_folder, max_workers=settings.ARCHIVE_FILE_TREE_WORKERS)
+        except Exception as e:
+            e.partial_file_tree = filenode
+            raise
         return filenode
 
 
@@ -39,6 +39,18 @@ class OsfStorageFileNode(BaseFileNode):
 
     @property
     def materialized_path(self):
+        if self._ancestor_ids is None or not self.pk:
+            return self._compute_materialized_path()
+        names = dict(
+            BaseFileNode.objects.filter(id__in=self._ancestor_ids).values_list('id', 'name')
+        ) if self._ancestor_ids else {}
+        path = '/'.join([names.get(ancestor_id, '') for ancestor_id in self._ancestor_ids] + [self.name])
+        if not self.is_file:
+            path = path + '/'
+        return path
+
+    def _compute_materialized_path(self):
+        """Walk up the tree to build the path, for nodes whose ancestors have not been stored yet"""
         sql = """
             WITH RECURSIVE materialized_path_cte(parent_id, GEN_PATH) AS (
               SELECT
@@ -220,10 +232,105 @@ class OsfStorageFileNode(BaseFileNode):
             if save:
                 self.save()
 
+    def _has_current_ancestor_ids(self):
+        if self._ancestor_ids is None:
+            return False
+        if self.parent_id is None:
+            return not self._ancestor_ids
+        return self._ancestor_ids[-1:] == [self.parent_id]
+
+    def _compute_ancestor_ids(self):
+        if self.parent_id is None:
+            return []
+        parent_ancestor_ids = getattr(self.parent, '_ancestor_ids', None)
+        if parent_ancestor_ids is not None:
+            return parent_ancestor_ids + [self.parent_id]
+        sql = """
+            WITH RECURSIVE ancestors_cte(id, parent_id, depth) AS (
+              SELECT
+                T.id,
+                T.parent_id,
+                0
+              FROM %s AS T
+              WHERE T.id = %s
+              UNION ALL
+              SELECT
+                T.id,
+                T.parent_id,
+                R.depth + 1
+              FROM ancestors_cte AS R
+                JOIN %s AS T ON T.id = R.parent_id
+            )
+            SELECT id
+            FROM ancestors_cte
+            ORDER BY depth DESC;
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [AsIs(self._meta.db_table), self.parent_id, AsIs(self._meta.db_table)])
+            return [row[0] for row in cursor.fetchall()]
+
+    def populate_descendant_ancestor_ids(self):
+        """Store the ancestors of every node below this one, which must have its own stored."""
+        sql = """
+            WITH RECURSIVE descendants_cte(id, ancestor_ids) AS (
+              SELECT
+                T.id,
+                %s::INTEGER[] || T.parent_id
+              FROM %s AS T
+              WHERE T.parent_id = %s
+              UNION ALL
+              SELECT
+                T.id,
+                R.ancestor_ids || T.parent_id
+              FROM descendants_cte AS R
+                JOIN %s AS T ON T.parent_id = R.id
+            )
+            UPDATE %s AS T
+            SET _ancestor_ids = R.ancestor_ids
+            FROM descendants_cte AS R
+            WHERE T.id = R.id;
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                self._ancestor_ids,
+                AsIs(self._meta.db_table),
+                self.pk,
+                AsIs(self._meta.db_table),
+                AsIs(self._meta.db_table),
+            ])
+            return cursor.rowcount
+
+    def _rebase_descendant_ancestor_ids(self, previous_ancestor_ids):
+        """Swap the stored ancestors above this node for every node below it, e.g. after a move."""
+        sql = """
+            UPDATE %s
+            SET _ancestor_ids = %s::INTEGER[] || _ancestor_ids[%s:]
+            WHERE _ancestor_ids @> ARRAY[%s];
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                AsIs(self._meta.db_table),
+                self._ancestor_ids,
+                len(previous_ancestor_ids) + 1,
+                self.pk,
+            ])
+
     def save(self):
         self._path = ''
         self._materialized_path = ''
-        return super().save()
+        # Descendants of a node with stored ancestors always have theirs stored too,
+        # so they're brought along whenever this node's ancestors change
+        adding = self.pk is None
+        previous_ancestor_ids = self._ancestor_ids
+        if not self._has_current_ancestor_ids():
+            self._ancestor_ids = self._compute_ancestor_ids()
+        ret = super().save()
+        if not self.is_file and not adding and self._ancestor_ids != previous_ancestor_ids:
+            if previous_ancestor_ids is None:
+                self.populate_descendant_ancestor_ids()
+            else:
+                self._rebase_descendant_ancestor_ids(previous_ancestor_ids)
+        return ret
 
 
 class OsfStorageFile(OsfStorageFileNode, File):
@@ -445,6 +552,16 @@ class OsfStorageFolder(OsfStorageFileNode, Folder):
 
     @property
     def is_checked_out(self):
+        if self.checkout_id is not None:
+            return True
+        if self._ancestor_ids is None:
+            return self._compute_is_checked_out()
+        return BaseFileNode.objects.filter(
+            _ancestor_ids__contains=[self.pk],
+            checkout__isnull=False,
+        ).exists()
+
+    def _compute_is_checked_out(self):
         sql = """
             WITH RECURSIVE is_checked_out_cte(id, parent_id, checkout_id) AS (
               SELECT
@@ -590,7 +707,7 @@ class NodeSettings(BaseNodeSettings, BaseStorageAddon):
         if not self.root_node:
             self.on_add()
 
-        clone.root_node = files_utils.copy_files(self.get_root(), clone.owner)
+        clone.root_node = files_utils.copy_file_tree(self.get_root(), clone.owner)
         clone.save()
 
         return clone, None
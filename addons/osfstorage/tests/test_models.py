@@ -25,6 +25,7 @@ from osf import models
 from addons.osfstorage import utils
 from addons.osfstorage import settings
 from tests.utils import capture_notifications
+from website.files import utils as files_utils
 from website.files.exceptions import FileNodeCheckedOutError, FileNodeIsPrimaryFile
 
 SessionStore = import_module(django_conf_settings.SESSION_ENGINE).SessionStore
@@ -303,6 +304,63 @@ class TestOsfstorageFileNode(StorageTestCase):
         child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
         assert '/Cloud/Carp' == child.materialized_path
 
+    def test_ancestor_ids_stored(self):
+        root = self.node_settings.get_root()
+        folder = root.append_folder('Cloud')
+        child = folder.append_file('Carp')
+        child.reload()
+
+        assert root._ancestor_ids == []
+        assert child._ancestor_ids == [root.id, folder.id]
+
+    def test_move_folder_updates_descendant_paths(self):
+        root = self.node_settings.get_root()
+        move_to = root.append_folder('Sky')
+        to_move = root.append_folder('Cloud')
+        inner = to_move.append_folder('Rain')
+        child = inner.append_file('Carp')
+
+        to_move.move_under(move_to, name='Fog')
+        child.reload()
+
+        assert child._ancestor_ids == [root.id, move_to.id, to_move.id, inner.id]
+        assert child.materialized_path == '/Sky/Fog/Rain/Carp'
+
+    def test_restored_file_keeps_path(self):
+        folder = self.node_settings.get_root().append_folder('Cloud')
+        child = folder.append_file('Carp')
+        child.delete()
+
+        restored = models.TrashedFileNode.load(child._id).restore()
+
+        assert restored.materialized_path == '/Cloud/Carp'
+
+    def test_materialized_path_without_stored_ancestors(self):
+        root = self.node_settings.get_root()
+        child = root.append_folder('Cloud').append_file('Carp')
+        BaseFileNode.objects.filter(id__in=[root.id, child.parent_id, child.id]).update(_ancestor_ids=None)
+        child.reload()
+
+        assert child._ancestor_ids is None
+        assert child.materialized_path == '/Cloud/Carp'
+
+        root.reload()
+        root.save()
+        child.reload()
+        assert child._ancestor_ids == [root.id, child.parent_id]
+
+    def test_folder_is_checked_out_when_descendant_is(self):
+        root = self.node_settings.get_root()
+        folder = root.append_folder('Cloud')
+        child = folder.append_folder('Rain').append_file('Carp')
+        assert folder.is_checked_out is False
+
+        child.checkout = self.user
+        child.save()
+
+        assert folder.is_checked_out is True
+        assert root.is_checked_out is True
+
     def test_copy(self):
         to_copy = self.node_settings.get_root().append_file('Carp')
         copy_to = self.node_settings.get_root().append_folder('Cloud')
@@ -758,6 +816,45 @@ class TestNodeSettingsModel:
         assert list(cloned_record.versions.all()) == list(record.versions.all())
         assert fork_node_settings.root_node
 
+    def test_copy_file_tree(self, user, node, node_settings, region2):
+        root = node_settings.get_root()
+        folder = root.append_folder('folder')
+        subfolder = folder.append_folder('subfolder')
+        files = [folder.append_file(f'file{i}') for i in range(3)] + [subfolder.append_file('deep')]
+        for file in files:
+            file.add_version(factories.FileVersionFactory(), name='original name')
+            file.add_version(factories.FileVersionFactory())
+        # Stored in another region than the one files are copied to
+        files[0].add_version(factories.FileVersionFactory(region=region2))
+        record = models.GuidMetadataRecord.objects.for_guid(files[1].get_guid(create=True))
+        record.title = 'Described'
+        record.save()
+
+        target = ProjectFactory(creator=user)
+        copied_root = files_utils.copy_file_tree(root, target, batch_size=2)
+
+        copied_folder = copied_root.find_child_by_name('folder')
+        copied_subfolder = copied_folder.find_child_by_name('subfolder')
+        copies = [copied_folder.find_child_by_name(f'file{i}') for i in range(3)] + [copied_subfolder.find_child_by_name('deep')]
+        assert copied_root.target == target
+        assert [copy.copied_from for copy in copies] == files
+        assert copies[3]._ancestor_ids == [copied_root.id, copied_folder.id, copied_subfolder.id]
+        assert copies[3].materialized_path == '/folder/subfolder/deep'
+
+        for file, copy in zip(files[1:], copies[1:]):
+            assert list(copy.versions.all()) == list(file.versions.all())
+            latest, oldest = copy.versions.all()
+            assert oldest.get_basefilenode_version(copy).version_name == 'original name'
+            assert latest.get_basefilenode_version(copy).version_name == copy.name
+
+        copied_versions = list(copies[0].versions.all())
+        assert copied_versions[0] not in files[0].versions.all()
+        assert copied_versions[0].region_id == target.osfstorage_region.id
+        assert copied_versions[1:] == list(files[0].versions.all())[1:]
+
+        assert copies[1].get_guid().metadata_record.title == 'Described'
+        assert not copies[2].get_guid()
+
     def test_fork_reverts_to_node_storage_region(self, user2, region, region2, node, child_node_with_different_region):
         """
         Despite different user regions defaults, the forked node always stay in the same region as it's original node.
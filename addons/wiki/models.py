@@ -1,5 +1,6 @@
 import datetime
 import functools
+import hashlib
 import logging
 
 import markdown
@@ -8,6 +9,9 @@ from django.db.models.expressions import F
 from django.db.models.aggregates import Max
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.functional import cached_property
+from api.caching import settings as cache_settings
+from api.caching.utils import wiki_cache
 from framework.auth.core import Auth
 from addons.base.models import BaseNodeSettings
 from bleach.callbacks import nofollow
@@ -122,29 +126,58 @@ class WikiVersion(ObjectIDMixin, BaseModel):
     content = models.TextField(default='', blank=True)
     identifier = models.IntegerField(default=1)
 
-    @property
+    @cached_property
     def is_current(self):
-        return not self.wiki_page.deleted and self.id == self.wiki_page.versions.order_by('-created').first().id
+        if self.wiki_page.deleted:
+            return False
+        return self.id == self.wiki_page.versions.order_by('-created').values_list('id', flat=True).first()
+
+    def _cache_key(self, template, **kwargs):
+        """Key of something rendered from this version's content. Keys carry WIKI_RENDERER_VERSION,
+        so bumping it invalidates everything rendered before, and a digest of the content.
+        """
+        return template.format(
+            renderer_version=settings.WIKI_RENDERER_VERSION,
+            version_id=self.id,
+            digest=hashlib.md5(self.content.encode()).hexdigest(),
+            **kwargs
+        )
+
+    def _get_or_render(self, key, render):
+        if not settings.ENABLE_WIKI_CACHE or not self.id:
+            return render()
+        rendered = wiki_cache.get(key)
+        if rendered is None:
+            rendered = render()
+            wiki_cache.set(key, rendered, timeout=settings.WIKI_CACHE_TIMEOUT)
+        return rendered
+
+    def _render_html(self, node):
+        html_output = build_html_output(self.content, node=node)
+        return sanitize_html(
+            html_output,
+            tags=settings.WIKI_WHITELIST['tags'],
+            attributes=settings.WIKI_WHITELIST['attributes'],
+            styles=settings.WIKI_WHITELIST['styles'],
+            filters=[partial(LinkifyFilter, callbacks=[nofollow])]
+        )
 
     def html(self, node):
         """The cleaned HTML of the page"""
-        html_output = build_html_output(self.content, node=node)
+        # Links between wiki pages point at `node`, so it is part of the key
+        key = self._cache_key(cache_settings.WIKI_HTML_KEY, node_id=node._id)
         try:
-            return sanitize_html(
-                html_output,
-                tags=settings.WIKI_WHITELIST['tags'],
-                attributes=settings.WIKI_WHITELIST['attributes'],
-                styles=settings.WIKI_WHITELIST['styles'],
-                filters=[partial(LinkifyFilter, callbacks=[nofollow])]
-            )
+            return self._get_or_render(key, lambda: self._render_html(node))
         except TypeError:
             logger.warning('Returning unlinkified content.')
             return render_content(self.content, node=node)
 
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
-
-        return sanitize(self.content, tags=[], strip=True)
+        return self._get_or_render(
+            self._cache_key(cache_settings.WIKI_RAW_TEXT_KEY),
+            lambda: sanitize(self.content, tags=[], strip=True)
+        )
 
     @property
     def rendered_before_update(self):
@@ -1,6 +1,9 @@
 import pytest
 import pytz
 import datetime
+from unittest import mock
+
+from addons.wiki import models as wiki_models
 from addons.wiki.exceptions import NameMaximumLengthError
 
 from addons.wiki.models import WikiPage, WikiVersion
@@ -103,3 +106,25 @@ class TestWikiPage(OsfTestCase):
         latest_version = wiki.versions.order_by('-created')[0]
         assert latest_version.is_current
         assert wiki.get_version(5) == latest_version
+
+
+class TestWikiVersionRenderCache:
+
+    def test_html_is_rendered_once_per_renderer_version(self):
+        node = NodeFactory()
+        page = WikiPage.objects.create(page_name='foo', node=node)
+        version = page.update(user=UserFactory(), content='```python\nprint(1)\n```')
+        with mock.patch.object(wiki_models, 'build_html_output', wraps=wiki_models.build_html_output) as build:
+            html = version.html(node)
+            assert WikiVersion.objects.get(id=version.id).html(node) == html
+            assert build.call_count == 1
+
+            with mock.patch.object(wiki_models.settings, 'WIKI_RENDERER_VERSION', wiki_models.settings.WIKI_RENDERER_VERSION + 1):
+                assert version.html(node) == html
+            assert build.call_count == 2
+
+    def test_raw_text_follows_content(self):
+        version = WikiVersionFactory(content='<b>bold</b>')
+        assert version.raw_text(None) == 'bold'
+        version.content = '<i>italic</i>'
+        assert version.raw_text(None) == 'italic'
@@ -1,7 +1,13 @@
+import json
 from collections import OrderedDict
+from functools import partial
+
 from django.urls import reverse
-from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db import connections
 from django.db.models import QuerySet
+from django.utils.functional import cached_property
 
 from rest_framework import pagination
 from rest_framework.exceptions import NotFound
@@ -9,11 +15,84 @@ from rest_framework.response import Response
 from rest_framework.utils.urls import (
     replace_query_param, remove_query_param,
 )
+from api.base.exceptions import InvalidQueryStringError
 from api.base.serializers import is_anonymized
-from api.base.settings import MAX_PAGE_SIZE, MAX_SIZE_OF_ES_QUERY
+from api.base.settings import MAX_PAGE_SIZE, MAX_SIZE_OF_ES_QUERY, EXACT_TOTAL_THRESHOLD
 
 from osf.models import AbstractNode, Comment, Preprint, Guid, DraftRegistration
 
+# How paginators report `meta.total`
+TOTAL_EXACT = 'exact'  # COUNT(*) the whole collection
+TOTAL_ESTIMATE = 'estimate'  # exact up to EXACT_TOTAL_THRESHOLD, the query planner's estimate beyond that
+TOTAL_OMIT = 'omit'  # don't report a total at all
+
+
+def estimate_count(queryset, threshold=EXACT_TOTAL_THRESHOLD):
+    """Count `queryset` exactly if it has no more than `threshold` rows, otherwise return
+    Postgres' estimate of its size. Never scans more than `threshold` + 1 rows.
+    """
+    bounded_count = queryset[:threshold + 1].count()
+    if bounded_count <= threshold:
+        return bounded_count
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return max(int(plan[0]['Plan']['Plan Rows']), bounded_count)
+
+
+class UncountedPage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class UncountedPaginator(DjangoPaginator):
+    """Paginator that never runs COUNT(*) over the whole collection. Whether there is a next
+    page is found by fetching one extra item, and `count` is either an estimate or None.
+    """
+
+    def __init__(self, object_list, per_page, total_mode=TOTAL_OMIT, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total_mode = total_mode
+        self._last_known_page = 1
+
+    @cached_property
+    def count(self):
+        if self.total_mode == TOTAL_ESTIMATE and isinstance(self.object_list, QuerySet):
+            return estimate_count(self.object_list)
+        return None
+
+    @property
+    def num_pages(self):
+        # Only as far as we know: the requested page, and the one after it if there is one
+        return self._last_known_page
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not items and number > 1:
+            raise EmptyPage('That page contains no results')
+        has_next = len(items) > self.per_page
+        self._last_known_page = number + 1 if has_next else number
+        return UncountedPage(items[:self.per_page], number, self, has_next)
+
 
 class JSONAPIPagination(pagination.PageNumberPagination):
     """
@@ -21,10 +100,30 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
     Properly handles pagination of embedded objects.
 
+    Clients may opt into cursor pagination by passing `page[cursor]` (empty for the first page),
+    see `JSONAPICursorPagination`. Subclasses choose how `meta.total` is computed with `total_mode`.
     """
 
     page_size_query_param = 'page[size]'
     max_page_size = MAX_PAGE_SIZE
+    total_mode = TOTAL_EXACT
+    cursor_query_param = 'page[cursor]'
+    cursor_paginator = None
+
+    @property
+    def django_paginator_class(self):
+        if self.total_mode == TOTAL_EXACT:
+            return DjangoPaginator
+        return partial(UncountedPaginator, total_mode=self.total_mode)
+
+    def get_total_meta(self):
+        """`meta` entries describing the size of the collection"""
+        total = self.page.paginator.count
+        if total is None:
+            return []
+        if self.total_mode == TOTAL_ESTIMATE:
+            return [('total', total), ('total_is_estimate', True)]
+        return [('total', total)]
 
     def page_number_query(self, url, page_number):
         """
@@ -48,7 +147,7 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         return self.page_number_query(url, 1)
 
     def get_last_real_link(self, url):
-        if not self.page.has_next():
+        if not self.page.has_next() or self.total_mode != TOTAL_EXACT:
             return None
         page_number = self.page.paginator.num_pages
         return self.page_number_query(url, page_number)
@@ -75,10 +174,9 @@ class JSONAPIPagination(pagination.PageNumberPagination):
                     ('prev', self.get_previous_real_link(url)),
                     ('next', self.get_next_real_link(url)),
                     (
-                        'meta', OrderedDict([
-                            ('total', self.page.paginator.count),
-                            ('per_page', self.page.paginator.per_page),
-                        ]),
+                        'meta', OrderedDict(
+                            self.get_total_meta() + [('per_page', self.page.paginator.per_page)],
+                        ),
                     ),
                 ]),
             ),
@@ -88,10 +186,9 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         return OrderedDict([
             ('data', data),
             (
-                'meta', OrderedDict([
-                    ('total', self.page.paginator.count),
-                    ('per_page', self.page.paginator.per_page),
-                ]),
+                'meta', OrderedDict(
+                    self.get_total_meta() + [('per_page', self.page.paginator.per_page)],
+                ),
             ),
             (
                 'links', OrderedDict([
@@ -120,7 +217,9 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         if embedded:
             reversed_url = reverse(view_name, kwargs=kwargs)
 
-        if self.request.version < '2.1':
+        if self.cursor_paginator is not None:
+            response_dict = self.cursor_paginator.get_response_dict(data)
+        elif self.request.version < '2.1':
             response_dict = self.get_response_dict_deprecated(data, reversed_url)
         else:
             response_dict = self.get_response_dict(data, reversed_url)
@@ -144,7 +243,7 @@ class JSONAPIPagination(pagination.PageNumberPagination):
             if isinstance(queryset, QuerySet) and not queryset.ordered:
                 queryset = queryset.order_by(queryset.model._meta.pk.name)
 
-            paginator = DjangoPaginator(queryset, self.page_size)
+            paginator = self.django_paginator_class(queryset, self.page_size)
             page_number = 1
             try:
                 self.page = paginator.page(page_number)
@@ -154,16 +253,125 @@ class JSONAPIPagination(pagination.PageNumberPagination):
                 )
                 raise NotFound(msg)
 
-            if paginator.count > 1 and self.template is not None:
+            # Uncounted paginators only know whether there is a next page
+            more_than_one = paginator.count > 1 if paginator.count is not None else self.page.has_next()
+            if more_than_one and self.template is not None:
                 # The browsable API should display pagination controls.
                 self.display_page_controls = True
 
             self.request = request
             return list(self.page)
 
+        elif self.cursor_query_param in request.query_params and isinstance(queryset, QuerySet):
+            self.request = request
+            self.cursor_paginator = self.get_cursor_paginator()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view=view)
+
         else:
             return super().paginate_queryset(queryset, request, view=None)
 
+    def get_cursor_paginator(self):
+        cursor_paginator = JSONAPICursorPagination()
+        cursor_paginator.page_size = self.page_size
+        cursor_paginator.page_size_query_param = self.page_size_query_param
+        cursor_paginator.max_page_size = self.max_page_size
+        cursor_paginator.cursor_query_param = self.cursor_query_param
+        cursor_paginator.total_mode = self.total_mode
+        return cursor_paginator
+
+
+class JSONAPICursorPagination(pagination.CursorPagination):
+    """Keyset pagination, in the same JSON-API format as JSONAPIPagination.
+
+    Pages are found by filtering on the first field the view orders by, so deep pages cost
+    the same as the first one and no OFFSET scan or COUNT(*) is needed. `next` and `prev`
+    links carry an opaque cursor; there is no `last` link. Used by JSONAPIPagination when a
+    request has a `page[cursor]` parameter.
+
+    Cursor pages only report a total when `total_mode` is TOTAL_ESTIMATE.
+    """
+
+    cursor_query_param = 'page[cursor]'
+    page_size_query_param = 'page[size]'
+    max_page_size = MAX_PAGE_SIZE
+    total_mode = TOTAL_OMIT
+    ordering = ('-pk',)
+
+    def get_ordering(self, request, queryset, view):
+        """Page on whatever the view ordered the queryset by, falling back to the view's
+        default `ordering`. The primary key is appended to break ties deterministically.
+        """
+        ordering = queryset.query.order_by
+        if not ordering or not all(isinstance(field, str) for field in ordering):
+            ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+
+        key = ordering[0].lstrip('-')
+        if key != 'pk':
+            try:
+                field = queryset.model._meta.get_field(key)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not field.concrete or field.is_relation:
+                raise InvalidQueryStringError(
+                    detail=f'Cursor pagination is not available when sorting by "{key}".',
+                    parameter=self.cursor_query_param,
+                )
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering += ('-pk' if ordering[0].startswith('-') else 'pk',)
+        return ordering
+
+    def get_total_meta(self):
+        if self.total_mode != TOTAL_ESTIMATE:
+            return []
+        return [('total', estimate_count(self.queryset)), ('total_is_estimate', True)]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.queryset = queryset
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_self_link(self):
+        return remove_query_param(self.base_url, '_')
+
+    def get_first_link(self):
+        if not self.has_previous:
+            return None
+        return replace_query_param(remove_query_param(self.base_url, '_'), self.cursor_query_param, '')
+
+    def get_response_dict(self, data):
+        meta = OrderedDict(self.get_total_meta() + [('per_page', self.page_size)])
+        if self.request.version < '2.1':
+            return OrderedDict([
+                ('data', data),
+                (
+                    'links', OrderedDict([
+                        ('first', self.get_first_link()),
+                        ('last', None),
+                        ('prev', self.get_previous_link()),
+                        ('next', self.get_next_link()),
+                        ('meta', meta),
+                    ]),
+                ),
+            ])
+        return OrderedDict([
+            ('data', data),
+            ('meta', meta),
+            (
+                'links', OrderedDict([
+                    ('self', self.get_self_link()),
+                    ('first', self.get_first_link()),
+                    ('last', None),
+                    ('prev', self.get_previous_link()),
+                    ('next', self.get_next_link()),
+                ]),
+            ),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_response_dict(data))
+
 
 class JSONAPINoPagination(pagination.BasePagination):
     '''do not accept page params nor paginate the queryset, but (for consistency with
@@ -188,6 +396,16 @@ class MaxSizePagination(JSONAPIPagination):
     page_size_query_param = None
 
 
+class EstimatedTotalPagination(JSONAPIPagination):
+    """For large collections where an approximate `meta.total` is good enough"""
+    total_mode = TOTAL_ESTIMATE
+
+
+class UncountedMaxSizePagination(MaxSizePagination):
+    """For harvesters and integrations that page through everything and don't need a total"""
+    total_mode = TOTAL_OMIT
+
+
 class ElasticsearchQuerySizeMaximumPagination(JSONAPIPagination):
     page_size = MAX_SIZE_OF_ES_QUERY
     max_page_size = MAX_SIZE_OF_ES_QUERY
@@ -230,19 +448,55 @@ class CommentPagination(JSONAPIPagination):
         return Response(response_dict)
 
 
+class CountedPaginator(DjangoPaginator):
+    """Paginator for a collection whose size is already known, e.g. from a denormalized counter"""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            # Overrides the cached property
+            self.count = count
+
+
 class NodeContributorPagination(JSONAPIPagination):
+    """Takes `meta.total` and `meta.total_bibliographic` from the resource's `ContributorCounts`.
+    Views choose which of the counts an unfiltered page totals with `contributor_count_field`.
+    """
+    view = None
 
     def get_resource(self, kwargs):
         resource_id = kwargs.get('node_id', None)
         return AbstractNode.load(resource_id)
 
+    def get_contributor_counts(self):
+        if not hasattr(self, '_contributor_counts'):
+            resource = self.get_resource(self.request.parser_context['kwargs'])
+            self._contributor_counts = resource.contributor_counts if resource else None
+        return self._contributor_counts
+
+    @property
+    def django_paginator_class(self):
+        paginator_class = super().django_paginator_class
+        count_field = getattr(self.view, 'contributor_count_field', None)
+        filtered = not self.request.parser_context['kwargs'].get('is_embedded') and any(
+            param.startswith('filter[') for param in self.request.query_params
+        )
+        if paginator_class is not DjangoPaginator or not count_field or filtered:
+            return paginator_class
+        counts = self.get_contributor_counts()
+        if counts is None:
+            return paginator_class
+        return partial(CountedPaginator, count=getattr(counts, count_field))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request, self.view = request, view
+        return super().paginate_queryset(queryset, request, view=view)
+
     def get_paginated_response(self, data):
         """ Add number of bibliographic contributors to links.meta"""
         response = super().get_paginated_response(data)
         response_dict = response.data
-        kwargs = self.request.parser_context['kwargs'].copy()
-        node = self.get_resource(kwargs)
-        total_bibliographic = node.visible_contributors.count()
+        total_bibliographic = self.get_contributor_counts().bibliographic
         if self.request.version < '2.1':
             response_dict['links']['meta']['total_bibliographic'] = total_bibliographic
         else:
@@ -80,6 +80,62 @@ def format_relationship_links(related_link=None, self_link=None, rel_meta=None,
     return ret
 
 
+# Maps the view name of a relationship's related link to the `(type, id url kwargs)` pair used
+# to build the relationship's resource identifier, or to None if the related view does not
+# retrieve a single resource. Entries are computed from the first url seen for each view name.
+_RELATIONSHIP_ROUTES = {}
+
+
+def _compute_relationship_route(resolved_url):
+    related_class = resolved_url.func.view_class
+    if not issubclass(related_class, RetrieveModelMixin):
+        return None
+    related_type = resolved_url.namespace.split(':')[-1]
+    # TODO: change kwargs to preprint_provider_id and registration_id
+    if related_class.view_name == 'node-settings':
+        return 'node-setting', ('node_id',)
+    elif related_class.view_name == 'node-storage':
+        return 'node-storage', ('node_id',)
+    elif related_class.view_name == 'node-citation' \
+            or related_class.view_name == 'registration-citation':
+        return 'citation', ('node_id',)
+    elif related_class.view_name == 'preprint-citation':
+        return 'citation', ('preprint_id',)
+    elif related_type in ('preprint_providers', 'preprint-providers', 'registration-providers'):
+        return related_type, ('provider_id',)
+    elif related_type in ('registrations', 'draft_nodes'):
+        return related_type, ('node_id',)
+    elif related_type == 'schemas' and related_class.view_name == 'registration-schema-detail':
+        return 'registration-schemas', ('schema_id',)
+    elif related_type == 'users' and related_class.view_name == 'user_settings':
+        return 'user-settings', ('user_id',)
+    elif related_type == 'institutions' and related_class.view_name == 'institution-summary-metrics':
+        return 'institution-summary-metrics', ('institution_id',)
+    elif related_type == 'collections' and related_class.view_name == 'collection-submission-detail':
+        return 'collection-submission', ('collection_submission_id', 'collection_id')
+    elif related_type == 'collection-providers' and related_class.view_name == 'collection-provider-detail':
+        return 'collection-providers', ('provider_id',)
+    elif related_type == 'custom-item-metadata':
+        return 'custom-item-metadata-records', ('guid_id',)
+    elif related_type == 'custom-file-metadata':
+        return 'custom-file-metadata-records', ('guid_id',)
+    elif related_type == 'cedar-metadata-templates' and related_class.view_name == 'cedar-metadata-template-detail':
+        return related_type, ('template_id',)
+    return related_type, (related_type[:-1] + '_id',)
+
+
+def get_relationship_route(view_name, related_path):
+    """Return the `(type, id url kwargs)` pair for relationships whose related link points at
+    `view_name`, or None if that view does not retrieve a single resource. `related_path` is
+    only resolved the first time a view name is seen.
+    """
+    try:
+        return _RELATIONSHIP_ROUTES[view_name]
+    except KeyError:
+        route = _RELATIONSHIP_ROUTES[view_name] = _compute_relationship_route(resolve(related_path))
+        return route
+
+
 def is_anonymized(request):
     if hasattr(request, '_is_anonymized'):
         return request._is_anonymized
@@ -786,6 +842,8 @@ class RelationshipField(ser.Field):
 
     def get_url(self, obj, view_name, request, format):
         urls = {}
+        # (view name, kwargs) the related url was reversed from, see `get_relationship_route`
+        self._related_reverse = None
         for view_name, view in self.views.items():
             if view is None:
                 urls[view_name] = {}
@@ -807,6 +865,8 @@ class RelationshipField(ser.Field):
                             url = utils.absolute_reverse(view, kwargs=kwargs)
                         else:
                             raise e
+                    if view_name == 'related':
+                        self._related_reverse = (view, kwargs)
 
                     if self.filter:
                         formatted_filters = self.format_filter(obj)
@@ -894,6 +954,7 @@ class RelationshipField(ser.Field):
             format = self.format
 
         # Return the hyperlink, or error if incorrectly configured.
+        self._related_reverse = None
         try:
             url = self.get_url(value, self.view_name, request, format)
         except NoReverseMatch:
@@ -922,65 +983,24 @@ class RelationshipField(ser.Field):
 
         related_url = url['related']
         related_path = urlparse(related_url).path if related_url else None
+        related_reverse = self._related_reverse
         related_meta = self.get_meta_information(self.related_meta, value)
         self_url = url['self']
         self_meta = self.get_meta_information(self.self_meta, value)
         relationship = format_relationship_links(related_url, self_url, related_meta, self_meta)
         if related_url:
-            resolved_url = resolve(related_path)
-            related_class = resolved_url.func.view_class
-            if issubclass(related_class, RetrieveModelMixin):
+            if related_reverse:
+                related_view, related_kwargs = related_reverse
+                route = get_relationship_route(related_view, related_path)
+            else:
+                # Subclass built the url without reversing it here; fall back to resolving it
+                resolved_url = resolve(related_path)
+                related_kwargs = resolved_url.kwargs
+                route = _compute_relationship_route(resolved_url)
+            if route:
+                related_type, id_kwargs = route
                 try:
-                    related_type = resolved_url.namespace.split(':')[-1]
-                    # TODO: change kwargs to preprint_provider_id and registration_id
-                    if related_class.view_name == 'node-settings':
-                        related_id = resolved_url.kwargs['node_id']
-                        related_type = 'node-setting'
-                    elif related_class.view_name == 'node-storage':
-                        related_id = resolved_url.kwargs['node_id']
-                        related_type = 'node-storage'
-                    elif related_class.view_name == 'node-citation' \
-                            or related_class.view_name == 'registration-citation':
-                        related_id = resolved_url.kwargs['node_id']
-                        related_type = 'citation'
-                    elif related_class.view_name == 'preprint-citation':
-                        related_id = resolved_url.kwargs['preprint_id']
-                        related_type = 'citation'
-                    elif related_type in ('preprint_providers', 'preprint-providers', 'registration-providers'):
-                        related_id = resolved_url.kwargs['provider_id']
-                    elif related_type in ('registrations', 'draft_nodes'):
-                        related_id = resolved_url.kwargs['node_id']
-                    elif related_type == 'schemas' and related_class.view_name == 'registration-schema-detail':
-                        related_id = resolved_url.kwargs['schema_id']
-                        related_type = 'registration-schemas'
-                    elif related_type == 'users' and related_class.view_name == 'user_settings':
-                        related_id = resolved_url.kwargs['user_id']
-                        related_type = 'user-settings'
-                    elif related_type == 'institutions' and related_class.view_name == 'institution-summary-metrics':
-                        related_id = resolved_url.kwargs['institution_id']
-                        related_type = 'institution-summary-metrics'
-                    elif related_type == 'collections' and related_class.view_name == 'collection-submission-detail':
-                        related_id = f'{resolved_url.kwargs['collection_submission_id']}-{resolved_url.kwargs['collection_id']}'
-                        related_type = 'collection-submission'
-                    elif related_type == 'collection-providers' and related_class.view_name == 'collection-provider-detail':
-                        related_id = resolved_url.kwargs['provider_id']
-                        related_type = 'collection-providers'
-                    elif related_type == 'registration-providers' and related_class.view_name == 'registration-provider-detail':
-                        related_id = resolved_url.kwargs['provider_id']
-                        related_type = 'registration-providers'
-                    elif related_type == 'preprint-providers' and related_class.view_name == 'preprint-provider-detail':
-                        related_id = resolved_url.kwargs['provider_id']
-                        related_type = 'preprint-providers'
-                    elif related_type == 'custom-item-metadata':
-                        related_id = resolved_url.kwargs['guid_id']
-                        related_type = 'custom-item-metadata-records'
-                    elif related_type == 'custom-file-metadata':
-                        related_id = resolved_url.kwargs['guid_id']
-                        related_type = 'custom-file-metadata-records'
-                    elif related_type == 'cedar-metadata-templates' and related_class.view_name == 'cedar-metadata-template-detail':
-                        related_id = resolved_url.kwargs['template_id']
-                    else:
-                        related_id = resolved_url.kwargs[related_type[:-1] + '_id']
+                    related_id = '-'.join(str(related_kwargs[kwarg]) for kwarg in id_kwargs)
                 except KeyError:
                     return relationship
                 relationship['data'] = {'id': related_id, 'type': related_type}
@@ -1345,6 +1365,10 @@ class JSONAPIListSerializer(ser.ListSerializer):
                 self.child.to_esi_representation(item, envelope=None) for item in data
             ]
         else:
+            # Let embeds bulk-load their targets for the whole page before serializing items
+            for embed_partial in self.context.get('embed', {}).values():
+                if hasattr(embed_partial, 'prefetch'):
+                    embed_partial.prefetch(data)
             ret = [
                 self.child.to_representation(item, envelope=envelope) for item in data
             ]
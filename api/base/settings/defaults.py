@@ -130,6 +130,8 @@ BULK_SETTINGS = {
 }
 
 MAX_PAGE_SIZE = 100
+# Collections larger than this report an estimated total when the paginator allows it
+EXACT_TOTAL_THRESHOLD = 1000
 
 REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
@@ -347,10 +349,23 @@ DJELME_BACKENDS = {
 OSF_USAGEEVENT_EXPIRATION_DAYS = 90
 ELASTICSEARCH_METRICS_DATE_FORMAT = '%Y'
 MONTHLY_USAGE_REPORT_EPOCH = '2026-05'  # cannot create monthly usage reports before this point
+INSTITUTIONAL_USERS_REPORT_CHUNK_SIZE = 500  # users per monthly institutional user report task; 0 for one task per user
 
 WAFFLE_CACHE_NAME = 'waffle_cache'
 STORAGE_USAGE_CACHE_NAME = 'storage_usage'
 STORAGE_USAGE_MAX_ENTRIES = 10000000
+# Effective node permissions, see osf.models.node_permissions. Point this at a shared backend
+# (e.g. redis) in local.py before setting ENABLE_NODE_PERMISSIONS_CACHE, so invalidations are seen everywhere.
+NODE_PERMISSIONS_CACHE_NAME = 'node_permissions'
+# Guid resolutions, see osf.models.guid_cache. Like the node permissions cache, this should be a shared
+# backend when ENABLE_GUID_CACHE is set and more than one process is running.
+GUID_CACHE_NAME = 'guids'
+# Rendered citations, see api.citations.utils. Keys change whenever a citation would, so a per-process cache is fine.
+CITATION_CACHE_NAME = 'citations'
+# Rendered wiki versions, see addons.wiki.models.WikiVersion. Also safe per process; a shared backend saves re-rendering.
+WIKI_CACHE_NAME = 'wikis'
+# Outcomes of the HEAD requests checking links for spam domains, see osf.external.spam.tasks
+DOMAIN_CHECK_CACHE_NAME = 'domain_checks'
 
 
 CACHES = {
@@ -377,6 +392,21 @@ CACHES = {
     WAFFLE_CACHE_NAME: {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     },
+    NODE_PERMISSIONS_CACHE_NAME: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    GUID_CACHE_NAME: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    CITATION_CACHE_NAME: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    WIKI_CACHE_NAME: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    DOMAIN_CHECK_CACHE_NAME: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
 }
 
 EGAP_PROVIDER_NAME = 'EGAP'
@@ -8,6 +8,14 @@ logger = logging.getLogger(__name__)
 
 
 class BaseThrottle(SimpleRateThrottle):
+    """
+    Throttle on a sliding window estimated from two fixed-window counters.
+
+    Each request atomically increments the counter for the current window (`duration`
+    seconds long); the previous window's count is weighted by how much of it still
+    overlaps the sliding window. State per client is two integers in the cache, however
+    high the rate, and concurrent requests can't overwrite each other's counts.
+    """
 
     def get_ident(self, request):
         if request.META.get('HTTP_X_THROTTLE_TOKEN'):
@@ -29,6 +37,63 @@ class BaseThrottle(SimpleRateThrottle):
         if self.key is None:
             return True
 
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f'{self.key}:{window}'
+        # Counters outlive their own window so they can serve as the previous one
+        self.cache.add(current_key, 0, timeout=2 * self.duration)
+        try:
+            self.current_count = self.cache.incr(current_key)
+        except ValueError:  # expired in between
+            self.cache.set(current_key, 1, timeout=2 * self.duration)
+            self.current_count = 1
+        self.previous_count = self.cache.get(f'{self.key}:{window - 1}', 0)
+        self.window_elapsed = (self.now % self.duration) / self.duration
+
+        if self.estimated_count() > self.num_requests:
+            # Rejected requests don't count against the client
+            self.cache.decr(current_key)
+            self.current_count -= 1
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def estimated_count(self):
+        return self.previous_count * (1 - self.window_elapsed) + self.current_count
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """
+        Seconds until the sliding window has room for another request.
+        """
+        remaining_in_window = (1 - self.window_elapsed) * self.duration
+        if self.current_count >= self.num_requests or not self.previous_count:
+            return remaining_in_window
+        # Wait for enough of the previous window to slide out
+        needed_elapsed = 1 - (self.num_requests - self.current_count - 1) / self.previous_count
+        return max(0, (needed_elapsed - self.window_elapsed) * self.duration)
+
+
+class TimestampHistoryThrottle(BaseThrottle):
+    """
+    The previous BaseThrottle: keeps every request timestamp within the duration in the
+    cache and rewrites the whole list on each request. Kept for comparison, see the
+    `benchmark_throttles` management command.
+    """
+
+    def allow_request(self, request, view):
+        if self.get_ident(request) == settings.BYPASS_THROTTLE_TOKEN:
+            logger.info('Bypass header (X-Throttle-Token) passed')
+            return True
+
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
         self.history = self.cache.get(self.key, [])
         self.now = self.timer()
 
@@ -38,7 +103,10 @@ class BaseThrottle(SimpleRateThrottle):
 
         if len(self.history) >= self.num_requests:
             return self.throttle_failure()
-        return self.throttle_success()
+        return SimpleRateThrottle.throttle_success(self)
+
+    def wait(self):
+        return SimpleRateThrottle.wait(self)
 
 
 class NonCookieAuthThrottle(BaseThrottle, AnonRateThrottle):
@@ -17,7 +17,7 @@ from api.base.settings import HASHIDS_SALT
 from framework.auth import Auth
 from framework.auth.cas import CasResponse
 from framework.auth.oauth_scopes import ComposedScopes, normalize_scopes
-from osf.models.base import GuidMixin, VersionedGuidMixin
+from osf.models.base import GuidMixin
 from osf.utils.requests import check_select_for_update
 from website import settings as website_settings
 from website import util as website_util  # noqa
@@ -106,16 +106,11 @@ def get_object_or_error(model_or_qs, query_or_pk=None, request=None, display_nam
             raise NotFound
 
     elif isinstance(query_or_pk, str):
-        # If the class is a subclass of `VersionedGuidMixin`, get obj directly from model using `.load()`. The naming
-        # for `query_or_pk` no longer matches the actual case. It is neither a query nor a pk, but a guid str.
-        if issubclass(model_cls, VersionedGuidMixin):
+        # If the class is a subclass of `GuidMixin` (including `VersionedGuidMixin`), get obj directly from model using
+        # `.load()`, which goes through the guid resolution cache. The naming for `query_or_pk` no longer matches the
+        # actual case. It is neither a query nor a pk, but a guid str.
+        if issubclass(model_cls, GuidMixin):
             obj = model_cls.load(query_or_pk, select_for_update=select_for_update)
-        # If the class is a subclass of `GuidMixin` (except for `VersionedGuidMixin`), turn it into a query dictionary.
-        # The naming for `query_or_pk` no longer matches the actual case either. It is neither a query nor a pk, but a
-        # 5-char guid str. We should be able to use the `.load()` the same way as in the `VersionedGuidMixin` case.
-        elif issubclass(model_cls, GuidMixin):
-            # if it's a subclass of GuidMixin we know it's primary_identifier_name
-            query = {'guids___id': query_or_pk}
         else:
             if hasattr(model_cls, 'primary_identifier_name'):
                 # primary_identifier_name gives us the natural key for the model
@@ -151,7 +146,15 @@ def get_object_or_error(model_or_qs, query_or_pk=None, request=None, display_nam
         if getattr(obj, 'gdpr_deleted', False):
             raise NotFound
         raise UserGone(user=obj)
-    if check_deleted and (model_cls is not OSFUser and not getattr(obj, 'is_active', True) or getattr(obj, 'is_deleted', False) or getattr(obj, 'deleted', False)):
+    if check_deleted:
+        check_object_deleted(obj, display_name=display_name)
+    return obj
+
+
+def check_object_deleted(obj, display_name=None):
+    """Raise a 410 for inactive or deleted objects, as `get_object_or_error` does for the objects it loads"""
+    OSFUser = apps.get_model('osf', 'OSFUser')
+    if not isinstance(obj, OSFUser) and not getattr(obj, 'is_active', True) or getattr(obj, 'is_deleted', False) or getattr(obj, 'deleted', False):
         if display_name is None:
             raise Gone
         else:
@@ -160,7 +163,6 @@ def get_object_or_error(model_or_qs, query_or_pk=None, request=None, display_nam
             raise Gone(
                 detail=f'The requested {display_name} is no longer available.', meta={'flagged_content': True} if spammy_node else {},
             )
-    return obj
 
 
 def default_node_list_queryset(model_cls):
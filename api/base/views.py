@@ -46,16 +46,50 @@ from waffle import sample_is_active
 
 class JSONAPIBaseView(generics.GenericAPIView):
 
+    # Detail views that set this to the name of their lookup url kwarg may be bulk-loaded
+    # when embedded in a list page. See `get_embed_prefetch_queryset`.
+    embed_prefetch_kwarg = None
+
     def __init__(self, **kwargs):
         assert getattr(self, 'view_name', None), 'Must specify view_name on view.'
         assert getattr(self, 'view_category', None), 'Must specify view_category on view.'
         self.view_fqn = ':'.join([self.view_category, self.view_name])
         super().__init__(**kwargs)
 
+    @classmethod
+    def get_embed_prefetch_queryset(cls, lookup_values):
+        """Return a queryset loading every object identified by `lookup_values`, the values of
+        `embed_prefetch_kwarg` collected from a page of results. Each object must be annotated
+        with `_embed_key`, the lookup value it was loaded for.
+        """
+        raise NotImplementedError
+
+    def get_embed_prefetched_object(self, display_name=None):
+        """Return this view's object if it was bulk-loaded by the embed engine, otherwise None.
+        Like `get_object_or_error`, raises a 404 if the bulk load didn't find the object and a 410
+        if it is deleted. Views are still responsible for checking permissions on the returned object.
+        """
+        if not self.embed_prefetch_kwarg or self.kwargs.get('is_embedded') is not True:
+            return None
+        prefetched = getattr(self.request, 'embed_prefetched', None) or {}
+        lookup_value = self.kwargs.get(self.embed_prefetch_kwarg)
+        if lookup_value not in prefetched:
+            return None
+        obj = prefetched[lookup_value]
+        if obj is None:
+            raise NotFound
+        utils.check_object_deleted(obj, display_name=display_name)
+        return obj
+
     def _get_embed_partial(self, field_name, field):
         """Create a partial function to fetch the values of an embedded field. A basic
         example is to include a Node's children in a single response.
 
+        The partial exposes a `prefetch` attribute which list serializers call once per page.
+        It resolves the embed target of every item up front and bulk-loads the targets of
+        views that set `embed_prefetch_kwarg`, so that each embedded detail view is rendered
+        once per distinct target instead of once per item.
+
         :param str field_name: Name of field of the view's serializer_class to load
         results for
         :return function object -> dict:
@@ -63,9 +97,48 @@ class JSONAPIBaseView(generics.GenericAPIView):
         if getattr(field, 'field', None):
             field = field.field
 
+        def _get_request_cache(name):
+            if not hasattr(self.request._request, name):
+                setattr(self.request._request, name, {})
+            return getattr(self.request._request, name)
+
+        def _resolve(item):
+            resolved = _get_request_cache('_embed_resolved')
+            resolve_key = (field, type(item), item.pk)
+            if resolve_key not in resolved:
+                # resolve must be implemented on the field
+                resolved[resolve_key] = field.resolve(item, field_name, self.request)
+            v, view_args, view_kwargs = resolved[resolve_key]
+            # Views mutate their kwargs, so hand out a copy
+            return v, view_args, dict(view_kwargs)
+
+        def prefetch(items):
+            prefetched = _get_request_cache('_embed_prefetched')
+            lookup_values = defaultdict(set)
+            for item in items:
+                try:
+                    v, view_args, view_kwargs = _resolve(item)
+                except Exception:
+                    # Let the partial surface the error for this item
+                    continue
+                view_cls = getattr(v, 'cls', None)
+                lookup_kwarg = getattr(view_cls, 'embed_prefetch_kwarg', None)
+                if not lookup_kwarg or view_kwargs.get(lookup_kwarg) is None:
+                    continue
+                loaded = prefetched.setdefault(view_cls, {})
+                if view_kwargs[lookup_kwarg] not in loaded:
+                    lookup_values[view_cls].add(view_kwargs[lookup_kwarg])
+
+            for view_cls, values in lookup_values.items():
+                loaded = prefetched[view_cls]
+                for obj in view_cls.get_embed_prefetch_queryset(values):
+                    loaded[obj._embed_key] = obj
+                for value in values:
+                    # Remember what wasn't found, so it isn't looked up again
+                    loaded.setdefault(value, None)
+
         def partial(item):
-            # resolve must be implemented on the field
-            v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
+            v, view_args, view_kwargs = _resolve(item)
             if not v:
                 return None
 
@@ -77,6 +150,15 @@ class JSONAPIBaseView(generics.GenericAPIView):
 
             request.parents.setdefault(type(item), {})[item._id] = item
 
+            lookup_kwarg = getattr(v.cls, 'embed_prefetch_kwarg', None)
+            prefetched = _get_request_cache('_embed_prefetched').get(v.cls, {})
+            if lookup_kwarg and view_kwargs.get(lookup_kwarg) in prefetched:
+                request.embed_prefetched = prefetched
+                # The rendered target does not depend on the item embedding it
+                _cache_key = (v.cls, field_name, lookup_kwarg, view_kwargs[lookup_kwarg])
+                if _cache_key in cache:
+                    return cache[_cache_key]
+
             view_kwargs.update({
                 'request': request,
                 'is_embedded': True,
@@ -132,9 +214,12 @@ class JSONAPIBaseView(generics.GenericAPIView):
 
             # Cache our final result
             cache[_cache_key] = ret
+            if lookup_kwarg and view_kwargs.get(lookup_kwarg) in prefetched:
+                cache[(v.cls, field_name, lookup_kwarg, view_kwargs[lookup_kwarg])] = ret
 
             return ret
 
+        partial.prefetch = prefetch
         return partial
 
     def get_serializer_context(self):
@@ -517,6 +602,9 @@ class BaseContributorList(JSONAPIBaseView, generics.ListAPIView, ListFilterMixin
 
     ordering = ('-user__modified',)
 
+    # Which of the resource's `ContributorCounts` is the size of the unfiltered list
+    contributor_count_field = 'total'
+
     def get_default_queryset(self):
         node = self.get_node()
 
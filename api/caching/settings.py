@@ -1,3 +1,21 @@
 NEVER_TIMEOUT = None  # for django caches setting None as a timeout value means the cache never times out.
 
 STORAGE_USAGE_KEY = 'storage_usage:{target_id}'
+
+NODE_PERMISSIONS_KEY = 'node_permissions:{root_id}:{user_id}:{tree_version}:{user_version}'
+NODE_PERMISSIONS_TREE_VERSION_KEY = 'node_permissions_tree_version:{root_id}'
+NODE_PERMISSIONS_USER_VERSION_KEY = 'node_permissions_user_version:{user_id}'
+
+GUID_RESOLUTION_KEY = 'guid:{guid}'
+GUID_PRIMARY_KEY = 'guid_primary:{content_type_id}:{object_id}'
+
+CITATION_KEY = 'citation:{guid}:{style}:{modified}:{digest}'
+
+WIKI_HTML_KEY = 'wiki_html:{renderer_version}:{version_id}:{node_id}:{digest}'
+WIKI_RAW_TEXT_KEY = 'wiki_raw_text:{renderer_version}:{version_id}:{digest}'
+
+DOMAIN_CHECK_KEY = 'domain_check:{digest}'
+
+BAN_TIMEOUT = 0.3  # seconds per BAN request
+BAN_MAX_WORKERS = 8  # concurrent BAN requests across all varnish servers
+BAN_PATTERN_MAX_LENGTH = 2048  # characters of regex alternation per BAN request
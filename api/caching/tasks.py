@@ -1,13 +1,22 @@
 import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 
+from celery import current_task
+from celery.signals import task_postrun
 from django.apps import apps
 from django.db import connection
 from django.db.models import Sum
+from django.utils import timezone
+from flask import has_app_context
 import requests
 
+from api.base.api_globals import api_globals
 from api.caching.utils import storage_usage_cache
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
+from framework.postcommit_tasks.handlers import enqueue_postcommit_task, postcommit_queue
 
 from api.caching import settings as cache_settings
 from framework.celery_tasks import app
@@ -15,6 +24,10 @@ from website import settings
 
 logger = logging.getLogger(__name__)
 
+_local = threading.local()
+# Shared so that bans reuse pooled keep-alive connections to the Varnish servers
+_ban_session = requests.Session()
+
 
 _DEFAULT_FILEVERSION_PAGE_SIZE = 500000
 
@@ -24,122 +37,218 @@ def get_varnish_servers():
     return settings.VARNISH_SERVERS
 
 
-def get_bannable_urls(instance):
+def get_bannable_paths(instance):
+    """Return the API paths that must be banned from Varnish when `instance` changes, along with
+    the API hostname they are served from.
+    """
     from osf.models import Comment
-    bannable_urls = []
-    parsed_absolute_url = {}
 
     if not hasattr(instance, 'absolute_api_v2_url'):
         logger.warning(f'Tried to ban {instance.__class__}:{instance} but it didn\'t have an absolute_api_v2_url method')
         return [], ''
 
+    parsed_absolute_url = urlparse(instance.absolute_api_v2_url)
+    bannable_paths = [parsed_absolute_url.path]
+    if isinstance(instance, Comment):
+        try:
+            bannable_paths.append(urlparse(instance.target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some referents don't have an absolute_api_v2_url
+            # I'm looking at you NodeWikiPage
+            # Note: NodeWikiPage has been deprecated. Is this an issue with WikiPage/WikiVersion?
+            pass
+
+        try:
+            bannable_paths.append(urlparse(instance.root_target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some root_targets don't have an absolute_api_v2_url
+            pass
+
+    return bannable_paths, parsed_absolute_url.hostname
+
+
+def get_bannable_urls(instance):
+    bannable_paths, hostname = get_bannable_paths(instance)
+    bannable_urls = []
     for host in get_varnish_servers():
-        # add instance url
         varnish_parsed_url = urlparse(host)
-        parsed_absolute_url = urlparse(instance.absolute_api_v2_url)
-        url_string = '{scheme}://{netloc}{path}.*'.format(
-            scheme=varnish_parsed_url.scheme,
-            netloc=varnish_parsed_url.netloc,
-            path=parsed_absolute_url.path,
-        )
-        bannable_urls.append(url_string)
-        if isinstance(instance, Comment):
-            try:
-                parsed_target_url = urlparse(instance.target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some referents don't have an absolute_api_v2_url
-                # I'm looking at you NodeWikiPage
-                # Note: NodeWikiPage has been deprecated. Is this an issue with WikiPage/WikiVersion?
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(
+        for path in bannable_paths:
+            bannable_urls.append(
+                '{scheme}://{netloc}{path}.*'.format(
                     scheme=varnish_parsed_url.scheme,
                     netloc=varnish_parsed_url.netloc,
-                    path=parsed_target_url.path,
-                )
-                bannable_urls.append(url_string)
-
-            try:
-                parsed_root_target_url = urlparse(instance.root_target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some root_targets don't have an absolute_api_v2_url
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(
-                    scheme=varnish_parsed_url.scheme,
-                    netloc=varnish_parsed_url.netloc,
-                    path=parsed_root_target_url.path,
-                )
-                bannable_urls.append(url_string)
+                    path=path,
+                ),
+            )
+    return bannable_urls, hostname
+
 
-    return bannable_urls, parsed_absolute_url.hostname
+def build_ban_patterns(paths, max_length=cache_settings.BAN_PATTERN_MAX_LENGTH):
+    """Merge `paths` into as few regex-alternation ban patterns as fit in `max_length` characters,
+    e.g. ``['/v2/nodes/abcde/', '/v2/users/fghij/']`` -> ``['/(?:v2/nodes/abcde/|v2/users/fghij/).*']``
+    """
+    patterns = []
+    chunk = []
+    chunk_length = 0
+    for path in sorted(set(paths)):
+        alternative = path.lstrip('/')
+        if chunk and chunk_length + len(alternative) + 1 > max_length:
+            patterns.append('/(?:{}).*'.format('|'.join(chunk)))
+            chunk, chunk_length = [], 0
+        chunk.append(alternative)
+        chunk_length += len(alternative) + 1
+    if chunk:
+        patterns.append('/(?:{}).*'.format('|'.join(chunk)))
+    return patterns
+
+
+def _send_ban(server, pattern, hostname):
+    parsed_server = urlparse(server)
+    request = _ban_session.prepare_request(
+        requests.Request('BAN', server, headers={'Host': hostname}),
+    )
+    # Set the url after preparing it so that the regex is not percent-encoded
+    request.url = f'{parsed_server.scheme}://{parsed_server.netloc}{pattern}'
+    start = time.monotonic()
+    try:
+        response = _ban_session.send(request, timeout=cache_settings.BAN_TIMEOUT)
+    except Exception as ex:
+        ok, detail = False, str(ex)
+    else:
+        ok, detail = response.ok, response.text
+    return ok, detail, time.monotonic() - start
+
+
+def dispatch_bans(hostname, paths):
+    """Send one merged ban per pattern chunk to every Varnish server concurrently, over pooled
+    connections. Returns `{server: {'ok': bool, 'bans': int, 'latency': seconds}}`.
+    """
+    if not settings.ENABLE_VARNISH or not paths:
+        return {}
+    patterns = build_ban_patterns(paths)
+    servers = get_varnish_servers()
+    results = {server: {'ok': True, 'bans': 0, 'latency': 0.0} for server in servers}
+    with ThreadPoolExecutor(max_workers=cache_settings.BAN_MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(_send_ban, server, pattern, hostname): (server, pattern)
+            for server in servers
+            for pattern in patterns
+        }
+        for future in as_completed(futures):
+            server, pattern = futures[future]
+            ok, detail, latency = future.result()
+            results[server]['bans'] += 1
+            results[server]['latency'] = max(results[server]['latency'], latency)
+            if not ok:
+                results[server]['ok'] = False
+                logger.error(f'Banning {pattern} on {server} failed: {detail}')
+    for server, result in results.items():
+        logger.info(
+            f'Banned {len(paths)} paths on {server} with {result["bans"]} requests in {result["latency"] * 1000:.0f}ms: '
+            f'{"succeeded" if result["ok"] else "failed"}',
+        )
+    return results
+
+
+@app.task(max_retries=5, default_retry_delay=60)
+def ban_paths(hostname, paths):
+    dispatch_bans(hostname, paths)
+
+
+def flush_bans(pending_bans):
+    """Send the bans collected by `queue_ban`, off the request path when celery is enabled."""
+    bans = dict(pending_bans)
+    pending_bans.clear()
+    for hostname, paths in bans.items():
+        if settings.USE_CELERY:
+            ban_paths.delay(hostname, sorted(paths))
+        else:
+            dispatch_bans(hostname, paths)
+
+
+def _get_request_pending_bans():
+    for task in postcommit_queue().values():
+        if getattr(task, 'func', None) is flush_bans:
+            return task.args[0]
+    return None
+
+
+def queue_ban(instance):
+    """Collect the bannable paths of `instance`. Everything collected during a request is merged
+    and banned once after the request commits; during a celery task, once the task finishes.
+    """
+    if not settings.ENABLE_VARNISH:
+        return
+    bannable_paths, hostname = get_bannable_paths(instance)
+    if not bannable_paths:
+        return
+
+    if has_app_context() or getattr(api_globals, 'request', None) is not None:
+        pending_bans = _get_request_pending_bans()
+        if pending_bans is None:
+            pending_bans = defaultdict(set)
+            pending_bans[hostname].update(bannable_paths)
+            enqueue_postcommit_task(flush_bans, (pending_bans,), {}, celery=False, once_per_request=True)
+        else:
+            pending_bans[hostname].update(bannable_paths)
+    elif current_task:
+        if getattr(_local, 'pending_bans', None) is None:
+            _local.pending_bans = defaultdict(set)
+        _local.pending_bans[hostname].update(bannable_paths)
+    else:
+        dispatch_bans(hostname, bannable_paths)
+
+
+@task_postrun.connect
+def _flush_task_bans(**kwargs):
+    pending_bans = getattr(_local, 'pending_bans', None)
+    if pending_bans:
+        _local.pending_bans = None
+        flush_bans(pending_bans)
 
 
 # this task is not runnable with celery as instance is not json serializable
 @app.task(max_retries=5, default_retry_delay=60)
 def ban_url(instance):
-    # TODO: Refactor; Pull url generation into postcommit_task handling so we only ban urls once per request
-    timeout = 0.3  # 300ms timeout for bans
     if settings.ENABLE_VARNISH:
-        bannable_urls, hostname = get_bannable_urls(instance)
-
-        for url_to_ban in set(bannable_urls):
-            try:
-                response = requests.request(
-                    'BAN', url_to_ban, timeout=timeout, headers=dict(
-                        Host=hostname,
-                    ),
-                )
-            except Exception as ex:
-                logger.error(
-                    'Banning {} failed: {}'.format(
-                        url_to_ban,
-                        ex.message,
-                    ),
-                )
-            else:
-                if not response.ok:
-                    logger.error(
-                        'Banning {} failed: {}'.format(
-                            url_to_ban,
-                            response.text,
-                        ),
-                    )
-                else:
-                    logger.info(
-                        'Banning {} succeeded'.format(
-                            url_to_ban,
-                        ),
-                    )
+        bannable_paths, hostname = get_bannable_paths(instance)
+        dispatch_bans(hostname, bannable_paths)
 
 
 @app.task(max_retries=5, default_retry_delay=10)
 def update_storage_usage_cache(target_id, target_guid, per_page=_DEFAULT_FILEVERSION_PAGE_SIZE):
+    """Recount a node's OSFStorage usage from scratch and store it in the persisted counter and the cache.
+    """
     if not settings.ENABLE_STORAGE_USAGE_CACHE:
         return
-    from osf.models import Guid
-    storage_usage_total = compute_storage_usage_total(Guid.load(target_guid).referent, per_page=per_page)
+    from osf.models import Guid, NodeStorageUsage
+    target = Guid.load(target_guid).referent
+    storage_usage_total = compute_storage_usage_total(target, per_page=per_page)
+    NodeStorageUsage.set_total(target, storage_usage_total)
     key = cache_settings.STORAGE_USAGE_KEY.format(target_id=target_guid)
     storage_usage_cache.set(key, storage_usage_total, settings.STORAGE_USAGE_CACHE_TIMEOUT)
 
 
 def compute_storage_usage_total(target_obj, per_page=_DEFAULT_FILEVERSION_PAGE_SIZE):
     from django.contrib.contenttypes.models import ContentType
+    # Keyset pagination over the file/version through table, so each page is an index range scan
+    # rather than re-reading every row before OFFSET
     sql = """
-        SELECT count(size), sum(size) from
-        (SELECT size FROM osf_basefileversionsthrough AS obfnv
+        SELECT count(*), sum(size), max(through_id) from
+        (SELECT obfnv.id AS through_id, version.size AS size FROM osf_basefileversionsthrough AS obfnv
         LEFT JOIN osf_basefilenode file ON obfnv.basefilenode_id = file.id
         LEFT JOIN osf_fileversion version ON obfnv.fileversion_id = version.id
         WHERE file.provider = 'osfstorage'
         AND file.deleted_on IS NULL
         AND file.target_object_id=%(target_pk)s
         AND file.target_content_type_id=%(target_content_type_pk)s
-        ORDER BY version.id
-        LIMIT %(per_page)s OFFSET %(offset)s
+        AND obfnv.id > %(last_id)s
+        ORDER BY obfnv.id
+        LIMIT %(per_page)s
     ) file_page
     """
     last_count = 1  # initialize non-zero
-    offset = 0
+    last_id = 0
     storage_usage_total = 0
     content_type_pk = ContentType.objects.get_for_model(target_obj).pk
     with connection.cursor() as cursor:
@@ -149,27 +258,70 @@ def compute_storage_usage_total(target_obj, per_page=_DEFAULT_FILEVERSION_PAGE_S
                     'target_pk': target_obj.pk,
                     'target_content_type_pk': content_type_pk,
                     'per_page': per_page,
-                    'offset': offset,
+                    'last_id': last_id,
                 },
             )
-            this_count, size_sum = cursor.fetchall()[0]
+            this_count, size_sum, max_id = cursor.fetchall()[0]
             storage_usage_total += int(size_sum or 0)
             last_count = (this_count or 0)
-            offset += last_count
+            last_id = max_id or last_id
     return storage_usage_total
 
 
 def get_storage_usage_total(target_obj):
     if not settings.ENABLE_STORAGE_USAGE_CACHE:
         return compute_storage_usage_total(target_obj)
+    from osf.models import AbstractNode, NodeStorageUsage
     _cache_key = cache_settings.STORAGE_USAGE_KEY.format(target_id=target_obj._id)
     _storage_usage_total = storage_usage_cache.get(_cache_key)
     if _storage_usage_total is None:
-        _storage_usage_total = compute_storage_usage_total(target_obj)
+        # Only nodes have a persisted counter; other targets (e.g. preprints) are recounted
+        is_node = isinstance(target_obj, AbstractNode)
+        if is_node:
+            _storage_usage_total = NodeStorageUsage.get_total(target_obj)
+        if _storage_usage_total is None:
+            _storage_usage_total = compute_storage_usage_total(target_obj)
+            if is_node:
+                NodeStorageUsage.set_total(target_obj, _storage_usage_total)
         storage_usage_cache.set(_cache_key, _storage_usage_total, settings.STORAGE_USAGE_CACHE_TIMEOUT)
     return _storage_usage_total
 
 
+def get_storage_usage_totals(targets):
+    """Return a dict of target id -> storage usage in bytes, or None where it hasn't been
+    calculated yet, for many nodes at once: one cache lookup, then one query of the persisted
+    counters for the cache misses.
+
+    Usage is never computed inline. Targets without a counter, and counters not reconciled in
+    `STORAGE_USAGE_REVALIDATE_AFTER`, are recounted in the background, the latter still being
+    served in the meantime.
+    """
+    from osf.models import NodeStorageUsage
+    keys = {cache_settings.STORAGE_USAGE_KEY.format(target_id=target._id): target for target in targets}
+    totals = {}
+    for key, total in storage_usage_cache.get_many(list(keys)).items():
+        totals[keys[key].id] = total
+
+    missing = {target.id: (key, target) for key, target in keys.items() if target.id not in totals}
+    if not missing:
+        return totals
+    revalidate_before = timezone.now() - settings.STORAGE_USAGE_REVALIDATE_AFTER
+    found = {}
+    counters = NodeStorageUsage.objects.filter(node_id__in=missing).values_list('node_id', 'total', 'reconciled')
+    for node_id, total, reconciled in counters:
+        key, target = missing[node_id]
+        totals[node_id] = found[key] = total
+        if reconciled is None or reconciled < revalidate_before:
+            update_storage_usage(target)
+    if found:
+        storage_usage_cache.set_many(found, settings.STORAGE_USAGE_CACHE_TIMEOUT)
+    for node_id, (key, target) in missing.items():
+        if node_id not in totals:
+            totals[node_id] = None
+            update_storage_usage(target)
+    return totals
+
+
 def update_storage_usage(target):
     Preprint = apps.get_model('osf.preprint')
     DraftRegistration = apps.get_model('osf.draftregistration')
@@ -184,10 +336,27 @@ def update_storage_usage(target):
     elif not isinstance(target, Preprint):
         enqueue_postcommit_task(update_storage_usage_cache, (target.id, target._id), {}, celery=True)
 
+
+def _add_storage_usage(target_node, size_delta):
+    """Apply `size_delta` to the node's persisted usage counter and refresh the cached value.
+    Falls back to a full recount if the node's usage has never been computed.
+    """
+    NodeStorageUsage = apps.get_model('osf.nodestorageusage')
+
+    storage_usage_total = NodeStorageUsage.add(target_node, size_delta)
+    if storage_usage_total is None:
+        return update_storage_usage(target_node)
+    key = cache_settings.STORAGE_USAGE_KEY.format(target_id=target_node._id)
+    storage_usage_cache.set(key, storage_usage_total, settings.STORAGE_USAGE_CACHE_TIMEOUT)
+
+
 def update_storage_usage_with_size(payload):
     BaseFileNode = apps.get_model('osf.basefilenode')
     AbstractNode = apps.get_model('osf.abstractnode')
 
+    if not settings.ENABLE_STORAGE_USAGE_CACHE:
+        return
+
     metadata = payload.get('metadata') or payload.get('destination')
 
     if not metadata.get('nid'):
@@ -200,10 +369,6 @@ def update_storage_usage_with_size(payload):
     target_file_id = metadata['path'].replace('/', '')
     target_file_size = metadata.get('sizeInt', 0)
 
-    if target_node.storage_limit_status is settings.StorageLimits.NOT_CALCULATED:
-        return update_storage_usage(target_node)
-
-    current_usage = target_node.storage_usage
     target_file = BaseFileNode.load(target_file_id)
 
     if target_file and action in ['copy', 'delete', 'move']:
@@ -211,10 +376,10 @@ def update_storage_usage_with_size(payload):
         target_file_size = target_file.versions.aggregate(Sum('size'))['size__sum'] or target_file_size
 
     if action in ['create', 'update', 'copy'] and provider == 'osfstorage':
-        current_usage += target_file_size
+        size_delta = target_file_size
 
     elif action == 'delete' and provider == 'osfstorage':
-        current_usage = max(current_usage - target_file_size, 0)
+        size_delta = -target_file_size
 
     elif action in 'move':
         source_node = AbstractNode.load(payload['source']['nid'])  # Getting the 'from' node
@@ -223,21 +388,12 @@ def update_storage_usage_with_size(payload):
         if target_node == source_node and source_provider == provider:
             return  # Its not going anywhere.
         if source_provider == 'osfstorage':
-            if source_node.storage_limit_status is settings.StorageLimits.NOT_CALCULATED:
-                return update_storage_usage(source_node)
-
-            source_node_usage = source_node.storage_usage
-            source_node_usage = max(source_node_usage - target_file_size, 0)
-
-            key = cache_settings.STORAGE_USAGE_KEY.format(target_id=source_node._id)
-            storage_usage_cache.set(key, source_node_usage, settings.STORAGE_USAGE_CACHE_TIMEOUT)
-
-        current_usage += target_file_size
+            _add_storage_usage(source_node, -target_file_size)
 
         if provider != 'osfstorage':
             return  # We don't want to update the destination node if the provider isn't osfstorage
+        size_delta = target_file_size
     else:
         return
 
-    key = cache_settings.STORAGE_USAGE_KEY.format(target_id=target_node._id)
-    storage_usage_cache.set(key, current_usage, settings.STORAGE_USAGE_CACHE_TIMEOUT)
+    _add_storage_usage(target_node, size_delta)
@@ -0,0 +1,60 @@
+from unittest import mock
+
+import pytest
+
+from api.caching import tasks
+from osf_tests.factories import ProjectFactory
+
+
+def test_build_ban_patterns_merges_paths():
+    patterns = tasks.build_ban_patterns(['/v2/users/fghij/', '/v2/nodes/abcde/', '/v2/nodes/abcde/'])
+    assert patterns == ['/(?:v2/nodes/abcde/|v2/users/fghij/).*']
+
+
+def test_build_ban_patterns_splits_long_alternations():
+    paths = [f'/v2/nodes/{i:05d}/' for i in range(10)]
+    patterns = tasks.build_ban_patterns(paths, max_length=50)
+    assert len(patterns) > 1
+    merged = '|'.join(patterns)
+    for path in paths:
+        assert path.lstrip('/') in merged
+
+
+@pytest.mark.django_db
+class TestDispatchBans:
+
+    @pytest.fixture(autouse=True)
+    def varnish(self):
+        with mock.patch.object(tasks.settings, 'ENABLE_VARNISH', True), \
+                mock.patch.object(tasks, 'get_varnish_servers', return_value=['http://varnish-1', 'http://varnish-2']):
+            yield
+
+    @pytest.fixture()
+    def mock_send(self):
+        with mock.patch.object(tasks._ban_session, 'send') as mock_send:
+            mock_send.return_value = mock.Mock(ok=True, text='')
+            yield mock_send
+
+    def test_one_ban_per_server(self, mock_send):
+        results = tasks.dispatch_bans('api.osf.io', ['/v2/nodes/abcde/', '/v2/users/fghij/'])
+
+        assert mock_send.call_count == 2
+        sent_urls = {call[0][0].url for call in mock_send.call_args_list}
+        assert sent_urls == {
+            'http://varnish-1/(?:v2/nodes/abcde/|v2/users/fghij/).*',
+            'http://varnish-2/(?:v2/nodes/abcde/|v2/users/fghij/).*',
+        }
+        assert all(result['ok'] and result['bans'] == 1 for result in results.values())
+
+    def test_failed_server_is_reported(self, mock_send):
+        mock_send.side_effect = [mock.Mock(ok=True, text=''), Exception('timed out')]
+        results = tasks.dispatch_bans('api.osf.io', ['/v2/nodes/abcde/'])
+
+        assert sorted(result['ok'] for result in results.values()) == [False, True]
+
+    def test_queue_ban_outside_request_dispatches(self, mock_send):
+        node = ProjectFactory()
+        tasks.queue_ban(node)
+
+        assert mock_send.call_count == 2
+        assert all(node._id in call[0][0].url for call in mock_send.call_args_list)
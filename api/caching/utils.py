@@ -2,3 +2,8 @@ from django.core.cache import caches
 from django.conf import settings
 
 storage_usage_cache = caches[settings.STORAGE_USAGE_CACHE_NAME]
+node_permissions_cache = caches[settings.NODE_PERMISSIONS_CACHE_NAME]
+guid_cache = caches[settings.GUID_CACHE_NAME]
+citation_cache = caches[settings.CITATION_CACHE_NAME]
+wiki_cache = caches[settings.WIKI_CACHE_NAME]
+domain_check_cache = caches[settings.DOMAIN_CHECK_CACHE_NAME]
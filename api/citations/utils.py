@@ -1,5 +1,9 @@
+import functools
+import hashlib
+import json
 import os
 import re
+import threading
 from rest_framework import status as http_status
 
 from citeproc import CitationStylesStyle, CitationStylesBibliography
@@ -7,9 +11,12 @@ from citeproc import Citation, CitationItem
 from citeproc import formatter
 from citeproc.source.json import CiteProcJSON
 
+from api.caching import settings as cache_settings
+from api.caching.utils import citation_cache
 from framework.exceptions import HTTPError
 from framework.auth import utils
 from osf.models.citation import CitationStyle
+from website import settings
 from website.settings import CITATION_STYLES_PATH, BASE_PATH, CUSTOM_CITATIONS
 
 
@@ -42,36 +49,50 @@ def process_name(node, user):
     }
 
 
-def render_citation(node, style='apa'):
-    """Given a node, return a citation"""
-    reformat_styles = ['apa', 'chicago-author-date', 'modern-language-association']
-    csl = node.csl
-    data = [csl]
+def get_citation_style(style):
+    """Return the parsed CSL style `style`, falling back to the parent of a dependent style.
+    Styles are parsed once per thread, as bibliographies set their formatter on the style.
+    """
+    return _get_citation_style(style, threading.get_ident())
 
-    bib_source = CiteProcJSON(data)
 
+@functools.lru_cache(maxsize=settings.CITATION_STYLE_CACHE_SIZE)
+def _get_citation_style(style, thread_id):
     custom = CUSTOM_CITATIONS.get(style, False)
     path = os.path.join(BASE_PATH, 'static', custom) if custom else os.path.join(CITATION_STYLES_PATH, style)
 
     try:
-        bib_style = CitationStylesStyle(path, validate=False)
+        return CitationStylesStyle(path, validate=False)
     except ValueError:
         citation_style = CitationStyle.load(style)
         if citation_style is not None and citation_style.has_parent_style:
             parent_style = citation_style.parent_style
             parent_path = os.path.join(CITATION_STYLES_PATH, parent_style)
-            bib_style = CitationStylesStyle(parent_path, validate=False)
+            return CitationStylesStyle(parent_path, validate=False)
         else:
             raise ValueError(f'Unable to find a dependent or independent parent style related to {style}.csl')
 
-    bibliography = CitationStylesBibliography(bib_style, bib_source, formatter.plain)
-
-    citation = Citation([CitationItem(node._id)])
-
-    bibliography.register(citation)
 
-    bib = bibliography.bibliography()
-    cit = str(bib[0] if len(bib) else '')
+def _citation_cache_key(node, csl, style):
+    """The key of `node`'s citation in `style`, or None if it shouldn't be cached.
+    `modified` doesn't change when e.g. a contributor renames themselves, so the key
+    also carries a digest of the CSL data the citation is rendered from.
+    """
+    modified = getattr(node, 'modified', None)
+    if not settings.ENABLE_CITATION_CACHE or modified is None:
+        return None
+    digest = hashlib.md5(json.dumps(csl, sort_keys=True, default=str).encode()).hexdigest()
+    return cache_settings.CITATION_KEY.format(
+        guid=node._id,
+        style=style,
+        modified=modified.isoformat(),
+        digest=digest,
+    )
+
+
+def _format_citation(node, csl, cit, style):
+    """Clean up the citation citeproc rendered for `node`"""
+    reformat_styles = ['apa', 'chicago-author-date', 'modern-language-association']
 
     title = csl['title'] if csl else node.csl['title']
     title = title.rstrip('.')
@@ -99,6 +120,47 @@ def render_citation(node, style='apa'):
 
     return cit
 
+
+def render_citation(node, style='apa'):
+    """Given a node, return a citation"""
+    return render_citations([node], style=style)[node._id]
+
+
+def render_citations(nodes, style='apa'):
+    """Render the citations of many nodes (or preprints) in one style, looking up the cached
+    ones together. Each uncached item is rendered in its own bibliography, as numeric styles
+    number items by their position in it.
+
+    :return dict: node guid -> citation
+    """
+    citations = {}
+    to_render = []
+    for node in nodes:
+        csl = node.csl
+        key = _citation_cache_key(node, csl, style)
+        to_render.append((node, csl, key))
+    cached = citation_cache.get_many([key for _, _, key in to_render if key])
+    for node, csl, key in to_render:
+        if key in cached:
+            citations[node._id] = cached[key]
+    to_render = [(node, csl, key) for node, csl, key in to_render if node._id not in citations]
+    if not to_render:
+        return citations
+
+    bib_style = get_citation_style(style)
+    to_cache = {}
+    for node, csl, key in to_render:
+        bibliography = CitationStylesBibliography(bib_style, CiteProcJSON([csl]), formatter.plain)
+        bibliography.register(Citation([CitationItem(node._id)]))
+        bib = bibliography.bibliography()
+        cit = _format_citation(node, csl, str(bib[0] if len(bib) else ''), style)
+        citations[node._id] = cit
+        if key:
+            to_cache[key] = cit
+    if to_cache:
+        citation_cache.set_many(to_cache, timeout=settings.CITATION_CACHE_TIMEOUT)
+    return citations
+
 def add_period_to_title(cit):
     title_split = cit.split('”')  # quote is ” (\xe2\x80\x9d) not normal "
     if len(title_split) == 2 and title_split[0][-1] != '.':
@@ -236,6 +236,7 @@ class DraftContributorDetail(NodeContributorDetail, DraftRegistrationMixin):
 class DraftBibliographicContributorsList(DraftContributorsList):
 
     view_name = 'draft-registration-bibliographic-contributor-detail'
+    contributor_count_field = 'bibliographic'
 
     def get_default_queryset(self):
         # Overrides NodeContributorsList
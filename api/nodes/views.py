@@ -190,6 +190,9 @@ class NodeMixin:
         if self.kwargs.get('is_embedded') is True:
             # If this is an embedded request, the node might be cached somewhere
             node = self.request.parents[Node].get(self.kwargs[self.node_lookup_url_kwarg])
+            if node is None:
+                # or bulk-loaded with the rest of the page it is embedded in
+                node = self.get_embed_prefetched_object(display_name='node')
 
         node_id = node_id or self.kwargs[self.node_lookup_url_kwarg]
         if node is None:
@@ -389,6 +392,17 @@ class NodeDetail(JSONAPIBaseView, generics.RetrieveUpdateDestroyAPIView, NodeMix
     serializer_class = NodeDetailSerializer
     view_category = 'nodes'
     view_name = 'node-detail'
+    embed_prefetch_kwarg = 'node_id'
+
+    # overrides JSONAPIBaseView
+    @classmethod
+    def get_embed_prefetch_queryset(cls, lookup_values):
+        return Node.objects.filter(
+            guids___id__in=lookup_values,
+        ).annotate(
+            _embed_key=F('guids___id'),
+            region=F('addons_osfstorage_node_settings__region___id'),
+        ).exclude(region=None)
 
     # overrides RetrieveUpdateDestroyAPIView
     def get_object(self):
@@ -655,6 +669,7 @@ class NodeBibliographicContributorsList(BaseContributorList, NodeMixin):
     view_category = 'nodes'
     view_name = 'node-bibliographic-contributors'
     ordering = ('_order',)  # default ordering
+    contributor_count_field = 'bibliographic'
 
     def get_resource(self):
         return self.get_node()
@@ -1801,8 +1816,19 @@ class NodeStorage(JSONAPIBaseView, generics.RetrieveAPIView, NodeMixin):
 
     serializer_class = NodeStorageSerializer
 
+    embed_prefetch_kwarg = 'node_id'
+
+    # overrides JSONAPIBaseView
+    @classmethod
+    def get_embed_prefetch_queryset(cls, lookup_values):
+        nodes = list(NodeDetail.get_embed_prefetch_queryset(lookup_values))
+        Node.prefetch_storage_usage(nodes)
+        return nodes
+
     def get_object(self):
-        return self.get_node()
+        node = self.get_node()
+        # When embedded in a list page, use the copy loaded with the storage usage of the whole page
+        return self.get_embed_prefetched_object(display_name='node') or node
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -552,6 +552,7 @@ class PreprintBibliographicContributorsList(PreprintContributorsList):
 
     view_category = 'preprints'
     view_name = 'preprint-bibliographic-contributors'
+    contributor_count_field = 'bibliographic'
 
     def get_default_queryset(self):
         contributors = super().get_default_queryset()
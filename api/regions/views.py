@@ -1,3 +1,4 @@
+from django.db.models import F
 from rest_framework import generics
 from rest_framework import permissions as drf_permissions
 from rest_framework.exceptions import NotFound
@@ -22,6 +23,10 @@ class RegionMixin:
 
     def get_region(self):
         region_id = self.kwargs[self.region_lookup_url_kwarg]
+        reg = self.get_embed_prefetched_object()
+        if reg is not None:
+            self.check_object_permissions(self.request, reg)
+            return reg
         if self.kwargs.get('is_embedded') is True:
             node_id, node = list(self.request.parents[Node].items())[0]
             try:
@@ -83,8 +88,14 @@ class RegionDetail(JSONAPIBaseView, generics.RetrieveAPIView, RegionMixin):
     serializer_class = RegionSerializer
     view_category = 'regions'
     view_name = 'region-detail'
+    embed_prefetch_kwarg = 'region_id'
 
     ordering = ('name',)
 
+    # overrides JSONAPIBaseView
+    @classmethod
+    def get_embed_prefetch_queryset(cls, lookup_values):
+        return Region.objects.filter(_id__in=lookup_values).annotate(_embed_key=F('_id'))
+
     def get_object(self):
         return self.get_region()
@@ -2,8 +2,12 @@
 
 SHARE/Trove accepts metadata records as "indexcards" in turtle format: https://www.w3.org/TR/turtle/
 """
+import concurrent.futures
+import contextlib
 from http import HTTPStatus
 import logging
+import threading
+import time
 from rdflib import Graph
 
 from django.apps import apps
@@ -11,6 +15,7 @@ from django.db.models import Q, OuterRef, Subquery
 from django.contrib.contenttypes.models import ContentType
 from celery.utils.time import get_exponential_backoff_interval
 import requests
+from requests.adapters import HTTPAdapter
 
 
 from framework.celery_tasks import app as celery_app
@@ -69,24 +74,28 @@ def _enqueue_update_share(osfresource):
     enqueue_task(task__update_share.s(_osfguid_value))
 
 
+def retry_after_seconds(response, retries=0):
+    '''how long shtrove asked us to wait (Retry-After), or an exponential backoff if it didn't say
+    '''
+    try:
+        return int(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return get_exponential_backoff_interval(
+            factor=4,
+            retries=retries,
+            maximum=2 * 60,
+            full_jitter=True,
+        )
+
+
 def retry_shtrove_request(self_celery_task, _response):
     try:
         _response.raise_for_status()
     except Exception as e:
         log_exception(e)
         if _response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
-            retry_after = _response.headers.get('Retry-After')
-            try:
-                countdown = int(retry_after)
-            except (TypeError, ValueError):
-                retries = getattr(self_celery_task.request, 'retries', 0)
-                countdown = get_exponential_backoff_interval(
-                    factor=4,
-                    retries=retries,
-                    maximum=2 * 60,
-                    full_jitter=True,
-                )
-            raise self_celery_task.retry(exc=e, countdown=countdown)
+            retries = getattr(self_celery_task.request, 'retries', 0)
+            raise self_celery_task.retry(exc=e, countdown=retry_after_seconds(_response, retries))
 
         raise self_celery_task.retry(exc=e)
 
@@ -221,7 +230,7 @@ def task__reindex_failed_or_not_indexed_resource_into_share(resource_type: str,
     from osf.management.commands.recatalog_metadata import recatalog
     queryset = get_not_indexed_guids_for_resource_with_no_indexed_guid(resource_type, only_oldest_guid=False)
     # chunk count and chunk size up to discussion what will be better with Cloud Team
-    recatalog(queryset, start_id, chunk_count, chunk_size)
+    recatalog(queryset, start_id, chunk_count, chunk_size, bulk=True)
 
 
 def get_not_indexed_guids_for_resource_with_no_indexed_guid(resource_type: str, only_oldest_guid: bool = True):
@@ -250,6 +259,22 @@ def get_not_indexed_guids_for_resource_with_no_indexed_guid(resource_type: str,
 
 
 def pls_send_trove_record(osf_item, *, is_backfill: bool, osfmap_partition: OsfmapPartition):
+    return requests.post(
+        **_trove_record_request(osf_item, is_backfill=is_backfill, osfmap_partition=osfmap_partition),
+        timeout=settings.EXTERNAL_REQUEST_TIMEOUT,
+    )
+
+
+def pls_delete_trove_record(osf_item, osfmap_partition: OsfmapPartition):
+    return requests.delete(
+        **_trove_delete_request(osf_item, osfmap_partition),
+        timeout=settings.EXTERNAL_REQUEST_TIMEOUT,
+    )
+
+
+def _trove_record_request(osf_item, *, is_backfill: bool, osfmap_partition: OsfmapPartition) -> dict:
+    '''gather and serialize the item's current record for the partition, as kwargs for a POST
+    '''
     try:
         _iri = osf_item.get_semantic_iri()
     except (AttributeError, ValueError):
@@ -272,27 +297,170 @@ def pls_send_trove_record(osf_item, *, is_backfill: bool, osfmap_partition: Osfm
         _expiration_date = osfmap_partition.get_expiration_date(_basket)
         if _expiration_date is not None:
             _queryparams['expiration_date'] = str(_expiration_date)
-    return requests.post(
-        shtrove_ingest_url(),
-        params=_queryparams,
-        headers={
+    return {
+        'url': shtrove_ingest_url(),
+        'params': _queryparams,
+        'headers': {
             'Content-Type': _serializer.mediatype,
             **_shtrove_auth_headers(osf_item),
         },
-        data=ensure_bytes(_serialized_record),
-        timeout=settings.EXTERNAL_REQUEST_TIMEOUT,
-    )
+        'data': ensure_bytes(_serialized_record),
+    }
 
 
-def pls_delete_trove_record(osf_item, osfmap_partition: OsfmapPartition):
-    return requests.delete(
-        shtrove_ingest_url(),
-        params={
+def _trove_delete_request(osf_item, osfmap_partition: OsfmapPartition) -> dict:
+    return {
+        'url': shtrove_ingest_url(),
+        'params': {
             'record_identifier': _shtrove_record_identifier(osf_item, osfmap_partition),
         },
-        headers=_shtrove_auth_headers(osf_item),
-        timeout=settings.EXTERNAL_REQUEST_TIMEOUT,
-    )
+        'headers': _shtrove_auth_headers(osf_item),
+    }
+
+
+##### BEGIN bulk ingest #####
+# trove's ingest endpoint takes one record per request -- for backfills, many items'
+# records are gathered in one process and sent over one keep-alive session, with as
+# many requests in flight as trove will bear
+
+def pls_bulk_send_trove_records(osfids, *, is_backfill=True, max_workers=None) -> list[str]:
+    '''send current metadata records (all partitions) for many osf-guid-identified items
+
+    records are gathered here, on the calling thread, and sent by a pool of threads whose
+    concurrency shrinks when trove answers "429 Too Many Requests" (waiting out Retry-After)
+    and grows back as requests succeed.
+
+    @returns list of the osfids that could not be sent (for the caller to retry per item)
+    '''
+    _max_workers = max_workers or settings.SHARE_BULK_MAX_WORKERS
+    _concurrency = AdaptiveConcurrency(_max_workers)
+    _failed_osfids = []
+    _in_flight = {}
+
+    def _finish(futures):
+        for _future in futures:
+            _osfid_instance, _is_deletion = _in_flight.pop(_future)
+            if not _future.result():
+                _failed_osfids.append(_osfid_instance._id)
+            elif not _is_deletion:
+                _schedule_cedar_record_updates(_osfid_instance)
+                _osfid_instance.referent.mark_indexing_success()
+
+    with (
+        requests.Session() as _session,
+        concurrent.futures.ThreadPoolExecutor(max_workers=_max_workers) as _executor,
+    ):
+        _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_max_workers)
+        _session.mount('https://', _adapter)
+        _session.mount('http://', _adapter)
+        for _osfid in osfids:
+            _osfid_instance = apps.get_model('osf.Guid').load(_osfid)
+            if _osfid_instance is None:
+                logger.warning(f'bulk trove ingest skipping unknown osfguid "{_osfid}"')
+                continue
+            _resource = _osfid_instance.referent
+            _is_deletion = _should_delete_indexcard(_resource)
+            _resource.mark_indexing_failed()
+            try:
+                _trove_requests = (
+                    [('DELETE', _trove_delete_request(_resource, OsfmapPartition.MAIN))]
+                    if _is_deletion
+                    else [
+                        ('POST', _trove_record_request(_resource, is_backfill=is_backfill, osfmap_partition=_partition))
+                        for _partition in OsfmapPartition
+                    ]
+                )
+            except (GVException, ValueError) as e:
+                log_exception(e)
+                _failed_osfids.append(_osfid)
+                continue
+            _future = _executor.submit(_send_trove_requests, _session, _concurrency, _trove_requests)
+            _in_flight[_future] = (_osfid_instance, _is_deletion)
+            if len(_in_flight) >= 2 * _max_workers:  # don't gather too far ahead of sending
+                _done, _ = concurrent.futures.wait(_in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                _finish(_done)
+        _finish(concurrent.futures.as_completed(list(_in_flight)))
+    return _failed_osfids
+
+
+def _send_trove_requests(session, concurrency, trove_requests) -> bool:
+    '''send one item's requests in order (later partitions only once earlier ones landed)
+    '''
+    for _method, _request_kwargs in trove_requests:
+        for _attempt in range(settings.SHARE_BULK_MAX_ATTEMPTS):
+            try:
+                with concurrency.slot():
+                    _response = session.request(
+                        _method,
+                        **_request_kwargs,
+                        timeout=settings.EXTERNAL_REQUEST_TIMEOUT,
+                    )
+            except requests.RequestException as e:
+                log_exception(e)
+                continue
+            if _response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                concurrency.back_off(retry_after_seconds(_response, _attempt))
+                continue
+            if _response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                continue
+            if not _response.ok:
+                logger.error(f'trove rejected {_request_kwargs["params"]}: {_response.status_code} {_response.text}')
+                return False
+            concurrency.succeeded()
+            break
+        else:
+            return False
+    return True
+
+
+class AdaptiveConcurrency:
+    '''limit on requests in flight: grows by one after a limit's worth of successes,
+    halves (and pauses everyone for the given seconds) when asked to back off
+    '''
+
+    def __init__(self, max_limit):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self):
+        with self._condition:
+            while True:
+                _pause = self._paused_until - time.monotonic()
+                if _pause > 0:
+                    self._condition.wait(_pause)
+                elif self._in_flight >= self.limit:
+                    self._condition.wait()
+                else:
+                    break
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def succeeded(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def back_off(self, seconds):
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+##### END bulk ingest #####
 
 
 def _shtrove_record_identifier(osf_item, osfmap_partition: OsfmapPartition):
@@ -1,8 +1,14 @@
+from unittest import mock
+
+import pytest
+from django.core.paginator import EmptyPage
+
+from osf.models import AbstractNode
 from osf_tests import factories
 from tests.base import ApiTestCase
 
 from api.base import settings
-from api.base.pagination import MaxSizePagination
+from api.base.pagination import MaxSizePagination, UncountedMaxSizePagination, UncountedPaginator, estimate_count
 
 
 class TestMaxPagination(ApiTestCase):
@@ -51,3 +57,70 @@ class TestJSONAPIPagination(ApiTestCase):
         assert 'meta' not in links
         assert 'total' in meta
         assert 'per_page' in meta
+
+
+class TestUncountedPaginator:
+
+    def test_pages_without_counting(self):
+        paginator = UncountedPaginator(list(range(25)), 10)
+        page = paginator.page(1)
+        assert list(page) == list(range(10))
+        assert page.has_next()
+        assert paginator.count is None
+
+        page = paginator.page(3)
+        assert list(page) == list(range(20, 25))
+        assert not page.has_next()
+        assert paginator.num_pages == 3
+
+    def test_page_past_the_end(self):
+        paginator = UncountedPaginator(list(range(5)), 10)
+        with pytest.raises(EmptyPage):
+            paginator.page(2)
+
+    def test_embedded_page_without_total(self):
+        pagination = UncountedMaxSizePagination()
+        pagination.page_size = 10
+        request = mock.Mock(parser_context={'kwargs': {'is_embedded': True}})
+        assert pagination.paginate_queryset(list(range(25)), request) == list(range(10))
+        assert pagination.display_page_controls
+        assert pagination.get_total_meta() == []
+
+
+class TestJSONAPICursorPagination(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = factories.AuthUserFactory()
+        self.projects = [factories.ProjectFactory(creator=self.user) for _ in range(11)]
+        self.url = f'/{settings.API_BASE}nodes/?version=2.1&page[size]=5&page[cursor]='
+
+    def test_pages_through_everything(self):
+        seen = []
+        url = self.url
+        pages = 0
+        while url:
+            res = self.app.get(url, auth=self.user)
+            assert res.status_code == 200
+            assert 'total' not in res.json['meta']
+            assert res.json['links']['last'] is None
+            seen.extend(node['id'] for node in res.json['data'])
+            url = res.json['links']['next']
+            pages += 1
+        assert pages == 3
+        assert sorted(seen) == sorted(project._id for project in self.projects)
+
+    def test_prev_link_returns_previous_page(self):
+        first = self.app.get(self.url, auth=self.user)
+        assert first.json['links']['prev'] is None
+        second = self.app.get(first.json['links']['next'], auth=self.user)
+        previous = self.app.get(second.json['links']['prev'], auth=self.user)
+        assert [node['id'] for node in previous.json['data']] == [node['id'] for node in first.json['data']]
+
+    def test_invalid_cursor(self):
+        res = self.app.get(f'/{settings.API_BASE}nodes/?page[cursor]=not-a-cursor', auth=self.user, expect_errors=True)
+        assert res.status_code == 404
+
+    def test_estimated_total_is_exact_for_small_collections(self):
+        queryset = AbstractNode.objects.filter(creator=self.user)
+        assert estimate_count(queryset) == 11
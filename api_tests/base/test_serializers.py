@@ -561,6 +561,23 @@ class TestRelationshipField:
         field = data['relationships']['registered_from']['links']
         assert f'/v2/nodes/{node._id}/' in field['related']['href']
 
+    def test_resource_identifier_uses_cached_route(self):
+        req = make_drf_request_with_version(version='2.0')
+        node = factories.NodeFactory()
+        data = self.BasicNodeSerializer(
+            node, context={'request': req}
+        ).data['data']
+        assert data['relationships']['parent']['data'] == {'id': node._id, 'type': 'nodes'}
+        assert base_serializers.get_relationship_route('nodes:node-detail', None) == ('nodes', ('node_id',))
+
+        other_node = factories.NodeFactory()
+        data = self.BasicNodeSerializer(
+            other_node, context={'request': req}
+        ).data['data']
+        assert data['relationships']['parent']['data'] == {'id': other_node._id, 'type': 'nodes'}
+        # List views do not produce resource identifiers
+        assert base_serializers.get_relationship_route('nodes:node-contributors', f'/v2/nodes/{node._id}/contributors/') is None
+
 
 class TestShowIfVersion(ApiTestCase):
 
@@ -1,6 +1,12 @@
 from unittest import mock
 
+from django.core.cache import caches
+from django.test import RequestFactory
+from rest_framework.request import Request
+from rest_framework.throttling import AnonRateThrottle
+
 from api.base.settings.defaults import API_BASE
+from api.base.throttling import BaseThrottle
 from osf.models import NotificationTypeEnum
 
 from tests.base import ApiTestCase
@@ -146,3 +152,41 @@ class TestAddContributorEmailThrottle(ApiTestCase):
         assert mock_anon_allow.call_count == 2
         assert mock_user_allow.call_count == 1
         assert mock_contrib_allow.call_count == 1
+
+
+class TestSlidingWindowThrottle(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.request = Request(RequestFactory().get('/', REMOTE_ADDR='203.0.113.7'))
+        self.throttle_class = type(
+            'SlidingWindowTestThrottle',
+            (BaseThrottle, AnonRateThrottle),
+            {'scope': 'sliding-window-test', 'rate': '3/minute', 'cache': caches['default']},
+        )
+        caches['default'].clear()
+
+    def check_at(self, now):
+        throttle = self.throttle_class()
+        throttle.timer = lambda: now
+        return throttle, throttle.allow_request(self.request, None)
+
+    def test_allows_rate_then_throttles(self):
+        results = [self.check_at(600 + i)[1] for i in range(4)]
+        assert results == [True, True, True, False]
+
+    def test_rejected_requests_are_not_counted(self):
+        for i in range(10):
+            self.check_at(600 + i)
+        throttle = self.throttle_class()
+        assert throttle.cache.get(f'{throttle.get_cache_key(self.request, None)}:10') == 3
+
+    def test_previous_window_slides_out(self):
+        for i in range(3):
+            self.check_at(600 + i)
+        # a quarter into the next window, three quarters of the previous three still count
+        throttle, allowed = self.check_at(675)
+        assert not allowed
+        self.assertAlmostEqual(throttle.wait(), 5)
+        # halfway in, one and a half do
+        assert self.check_at(690)[1]
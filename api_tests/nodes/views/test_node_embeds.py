@@ -155,3 +155,38 @@ class TestNodeEmbeds:
         res = app.get(url, auth=write_contrib_one.auth)
         assert res.status_code == 200
         assert res.json['data']['embeds']['contributors']['meta']['total_bibliographic'] == 3
+
+    def test_node_list_embeds_share_prefetched_targets(
+            self, app, user, write_contrib_one,
+            subchild, root_node, child_one, child_two):
+
+        #   test_embed_parent_for_every_child
+        url = f'/{API_BASE}nodes/{root_node._id}/children/?embed=parent&embed=region'
+
+        res = app.get(url, auth=user.auth)
+        assert res.status_code == 200
+        assert len(res.json['data']) == 2
+        for child in res.json['data']:
+            assert child['embeds']['parent']['data']['id'] == root_node._id
+            assert child['embeds']['region']['data']['id'] == root_node.osfstorage_region._id
+
+    #   test_prefetched_parent_still_checks_permissions
+        url = f'/{API_BASE}nodes/{child_two._id}/children/?embed=parent'
+
+        res = app.get(url, auth=write_contrib_one.auth)
+        assert res.status_code == 200
+        assert res.json['data'][0]['id'] == subchild._id
+        assert 'errors' in res.json['data'][0]['embeds']['parent']
+
+    def test_node_list_embeds_deleted_prefetched_target(
+            self, app, write_contrib_one, root_node, child_one):
+        root_node.is_deleted = True
+        root_node.save()
+
+        url = f'/{API_BASE}users/{write_contrib_one._id}/nodes/?embed=parent'
+
+        res = app.get(url, auth=write_contrib_one.auth)
+        assert res.status_code == 200
+        child = next(node for node in res.json['data'] if node['id'] == child_one._id)
+        errors = child['embeds']['parent']['errors']
+        assert errors[0]['detail'] == 'The requested node is no longer available.'
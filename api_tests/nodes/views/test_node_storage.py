@@ -104,3 +104,16 @@ class TestNodeStorage:
         data = res.json['data']
         assert data['embeds']['storage']['data']['attributes']['storage_limit_status'] == 'OVER_PRIVATE'
         assert data['embeds']['storage']['data']['attributes']['storage_usage'] == str(storage_usage)
+
+    def test_node_list_storage_embed(self, app, project, admin_contributor):
+        other_project = ProjectFactory(creator=admin_contributor)
+        storage_usage = (settings.STORAGE_LIMIT_PRIVATE + 1) * settings.GBs
+        key = cache_settings.STORAGE_USAGE_KEY.format(target_id=project._id)
+        storage_usage_cache.set(key, storage_usage, settings.STORAGE_USAGE_CACHE_TIMEOUT)
+
+        res = app.get(f'/{API_BASE}users/me/nodes/?embed=storage', auth=admin_contributor.auth)
+        assert res.status_code == 200
+        embeds = {node['id']: node['embeds']['storage']['data']['attributes'] for node in res.json['data']}
+        assert embeds[project._id]['storage_limit_status'] == 'OVER_PRIVATE'
+        assert embeds[project._id]['storage_usage'] == str(storage_usage)
+        assert embeds[other_project._id]['storage_limit_status'] == 'NOT_CALCULATED'
@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
@@ -9,7 +11,9 @@ from notifications.tasks import (
     send_users_digest_email,
     send_moderators_digest_email,
     get_users_emails,
-    get_moderators_emails
+    get_moderators_emails,
+    iter_users_emails,
+    send_user_digest_batch,
 )
 from osf_tests.factories import AuthUserFactory, RegistrationProviderFactory, RegistrationFactory
 from tests.utils import capture_notifications
@@ -207,6 +211,25 @@ class TestNotificationDigestTasks:
         assert user_info['user_id'] == user._id
         assert any(msg['notification_id'] == notification1.id for msg in user_info['info'])
 
+    def test_iter_users_emails_pages_after_scheduling(self):
+        users = AuthUserFactory.create_batch(3)
+        notification_type = NotificationType.objects.get(name=NotificationTypeEnum.USER_FILE_UPDATED)
+        for user in users:
+            Notification.objects.create(
+                subscription=add_notification_subscription(user, notification_type, 'daily'),
+                event_context={},
+                sent=None,
+            )
+        seen = []
+        for groups in iter_users_emails('daily', batch_size=2):
+            assert len(groups) <= 2
+            seen.extend(group['user_id'] for group in groups)
+            # Dispatching marks a page's notifications as scheduled before the next page is read
+            Notification.objects.filter(
+                id__in=[msg['notification_id'] for group in groups for msg in group['info']]
+            ).update(scheduled=timezone.now())
+        assert seen == sorted(user._id for user in users)
+
     def test_get_moderators_emails(self):
         user = AuthUserFactory()
         provider = RegistrationProviderFactory()
@@ -292,6 +315,56 @@ class TestNotificationDigestTasks:
         email_task = EmailTask.objects.get(user_id=user.id)
         assert email_task.status == 'SUCCESS'
 
+    def test_send_user_digest_batch_survives_a_failing_digest(self):
+        notification_type = NotificationType.objects.get(name=NotificationTypeEnum.USER_FILE_UPDATED)
+        file_updated = NotificationType.objects.get(name=NotificationTypeEnum.FILE_UPDATED)
+        failing_user, user = AuthUserFactory(), AuthUserFactory()
+        notifications_by_user = {}
+        for recipient in (failing_user, user):
+            notifications_by_user[recipient] = Notification.objects.create(
+                subscription=add_notification_subscription(
+                    recipient,
+                    notification_type,
+                    'daily',
+                    subscription=add_notification_subscription(recipient, file_updated, 'daily'),
+                ),
+                scheduled=timezone.now(),
+                event_context={
+                    'source_path': '/',
+                    'source_node_title': 'test title',
+                    'source_addon': 'test addon',
+                    'destination_addon': 'what?',
+                    'logo': 'test logo',
+                    'action': 'test action',
+                    'osf_logo': 'test logo',
+                    'osf_logo_list': 'osf_logo_list',
+                    'destination_node_parent_node_title': 'test parent node title',
+                    'destination_node_title': 'test node title',
+                    'domain': 'test domain',
+                },
+            )
+
+        def get_destination_address(recipient):
+            if recipient == failing_user:
+                raise ConnectionError('lost the database')
+            return recipient.username
+
+        digests = [[recipient._id, [notification.id]] for recipient, notification in notifications_by_user.items()]
+        with mock.patch('notifications.tasks.get_destination_address', side_effect=get_destination_address), \
+                capture_notifications() as notifications:
+            send_user_digest_batch.apply(args=(digests,)).get()
+
+        assert len(notifications['emits']) == 1
+        assert notifications['emits'][0]['kwargs']['user'] == user
+        sent = notifications_by_user[user]
+        sent.refresh_from_db()
+        assert sent.sent is not None
+        unsent = notifications_by_user[failing_user]
+        unsent.refresh_from_db()
+        assert unsent.sent is None
+        # Picked up again by the next digest run
+        assert unsent.scheduled is None
+
     def test_send_moderators_digest_email_end_to_end(self):
         user = AuthUserFactory()
         provider = RegistrationProviderFactory()
@@ -0,0 +1,73 @@
+from unittest import mock
+
+import pytest
+import responses
+
+from api.share import utils as share_utils
+from osf.metadata.osf_gathering import OsfmapPartition
+from osf_tests.factories import ProjectFactory
+from website import settings
+
+
+@pytest.mark.django_db
+class TestBulkSendTroveRecords:
+
+    @pytest.fixture(autouse=True)
+    def _patches(self):
+        fake_serializer = mock.Mock(mediatype='text/turtle')
+        fake_serializer.serialize.return_value = b'<turtle>'
+        with (
+            mock.patch.object(settings, 'SHARE_API_TOKEN', 'mock-api-token'),
+            mock.patch.object(share_utils, 'pls_get_magic_metadata_basket'),
+            mock.patch.object(share_utils, 'get_metadata_serializer', return_value=fake_serializer),
+            mock.patch.object(share_utils, '_schedule_cedar_record_updates'),
+        ):
+            yield
+
+    @pytest.fixture()
+    def public_nodes(self):
+        return [ProjectFactory(is_public=True) for _ in range(3)]
+
+    @pytest.fixture()
+    def trove(self):
+        with responses.RequestsMock() as _rsps:
+            yield _rsps
+
+    def test_sends_every_partition(self, trove, public_nodes):
+        trove.add(responses.POST, share_utils.shtrove_ingest_url(), status=200)
+        failed = share_utils.pls_bulk_send_trove_records([_node._id for _node in public_nodes], max_workers=2)
+
+        assert failed == []
+        assert len(trove.calls) == len(public_nodes) * len(OsfmapPartition)
+        for _node in public_nodes:
+            _node.refresh_from_db()
+            assert _node.has_been_indexed
+
+    def test_waits_out_retry_after(self, trove, public_nodes):
+        _node = public_nodes[0]
+        trove.add(responses.POST, share_utils.shtrove_ingest_url(), status=429, headers={'Retry-After': '0'})
+        trove.add(responses.POST, share_utils.shtrove_ingest_url(), status=200)
+        failed = share_utils.pls_bulk_send_trove_records([_node._id], max_workers=1)
+
+        assert failed == []
+        assert len(trove.calls) == 1 + len(OsfmapPartition)
+
+    def test_reports_rejected_items(self, trove, public_nodes):
+        _node = public_nodes[0]
+        trove.add(responses.POST, share_utils.shtrove_ingest_url(), status=400)
+        failed = share_utils.pls_bulk_send_trove_records([_node._id], max_workers=1)
+
+        assert failed == [_node._id]
+        assert len(trove.calls) == 1  # supplementary records wait for the main one
+        _node.refresh_from_db()
+        assert not _node.has_been_indexed
+
+
+def test_adaptive_concurrency():
+    concurrency = share_utils.AdaptiveConcurrency(8)
+    concurrency.back_off(0)
+    assert concurrency.limit == 4
+    for _ in range(4):
+        with concurrency.slot():
+            concurrency.succeeded()
+    assert concurrency.limit == 5
@@ -11,6 +11,7 @@ import responses
 import xml.etree.ElementTree as ET
 from waffle.testutils import override_switch
 
+from api.caching.utils import domain_check_cache
 from api_tests.share import _utils as shtrove_test_utils
 from framework.celery_tasks import app as celery_app
 from osf.external.spam import tasks as spam_tasks
@@ -64,6 +65,8 @@ def override_settings():
     website_settings.SENDGRID_API_KEY = None
     # or try to contact a SHARE
     website_settings.SHARE_ENABLED = False
+    # Search tests read their own writes straight after a request
+    website_settings.ELASTIC_REFRESH_ON_FLUSH = True
     # Set this here instead of in SILENT_LOGGERS, in case developers
     # call setLevel in local.py
 
@@ -275,6 +278,14 @@ def mock_celery():
             yield mock_celery
 
 
+@pytest.fixture(autouse=True)
+def _clear_domain_check_cache():
+    # Spam domain checks cached by one test would skip another test's (mocked) requests
+    domain_check_cache.clear()
+    yield
+    domain_check_cache.clear()
+
+
 @pytest.fixture
 def mock_spam_head_request():
     with mock.patch.object(spam_tasks.requests, 'head') as mock_spam_head_request:
@@ -1,6 +1,8 @@
 import itertools
+import time
 from calendar import monthrange
 from datetime import date
+from functools import partial
 from django.db import connection
 from django.utils import timezone
 from django.core.validators import EmailValidator
@@ -69,41 +71,66 @@ def get_user_and_email_task(task_id, user_id):
 
     return user, email_task
 
-@celery_app.task(bind=True, max_retries=5)
-def send_user_email_task(self, user_id, notification_ids, **kwargs):
-    user, email_task = get_user_and_email_task(self.request.id, user_id)
-    if not user:
-        return
+class DigestSendError(Exception):
+    """Raised when a digest failed to render or send and may be retried.
+    The original exception is the `__cause__`.
+    """
 
-    destination_address = user.email
+    def __init__(self, user, email_task, notifications_qs):
+        super().__init__()
+        self.user = user
+        self.email_task = email_task
+        self.notifications_qs = notifications_qs
+
+
+def get_destination_address(user):
+    """Return an address the digest can be sent to, or None if the user has no valid one"""
     validator = EmailValidator()
+    destination_address = user.email
     try:
         validator(destination_address)
     except ValidationError:
-        emails_qs = self.user.emails
+        emails_qs = user.emails
         if emails_qs.exists():
             destination_address = emails_qs.first().address
         try:
             validator(destination_address)
         except ValidationError:
-            Notification.objects.filter(id__in=notification_ids).update(sent=timezone.now())
-            logger.error(f'User {user_id} has an invalid email address.')
-            email_task.status = 'Failure'
-            email_task.error_message = f'User {user_id} has an invalid email address.'
-            email_task.save()
-            return
+            return None
+    return destination_address
+
+
+def _finish_email_task(email_task, task_name, user_id, task_id):
+    email_task.status = 'SUCCESS'
+    if email_task.error_message:
+        logger.error(f'Partial success for {task_name} for user {user_id}. Task id: {task_id}. Errors: {email_task.error_message}')
+        email_task.status = 'PARTIAL_SUCCESS'
+    email_task.save()
+
+
+def send_user_digest(task_id, user_id, notification_ids):
+    """Render and send the digest of `notification_ids` to the user with guid `user_id`,
+    recording the outcome in the EmailTask `task_id`. Raises DigestSendError if sending failed.
+    """
+    user, email_task = get_user_and_email_task(task_id, user_id)
+    if not user:
+        return
 
+    if get_destination_address(user) is None:
+        Notification.objects.filter(id__in=notification_ids).update(sent=timezone.now())
+        logger.error(f'User {user_id} has an invalid email address.')
+        email_task.status = 'Failure'
+        email_task.error_message = f'User {user_id} has an invalid email address.'
+        email_task.save()
+        return
+
+    notifications_qs = Notification.objects.filter(id__in=notification_ids, sent__isnull=True)
     try:
-        notifications_qs = Notification.objects.filter(id__in=notification_ids, sent__isnull=True)
         rendered_notifications, failed_notifications = safe_render_notification(notifications_qs, email_task)
         notifications_qs = notifications_qs.exclude(id__in=failed_notifications)
 
         if not rendered_notifications:
-            email_task.status = 'SUCCESS'
-            if email_task.error_message:
-                logger.error(f'Partial success for send_user_email_task for user {user_id}. Task id: {self.request.id}. Errors: {email_task.error_message}')
-                email_task.status = 'PARTIAL_SUCCESS'
-            email_task.save()
+            _finish_email_task(email_task, 'send_user_email_task', user_id, task_id)
             return
 
         event_context = {
@@ -117,14 +144,18 @@ def send_user_email_task(self, user_id, notification_ids, **kwargs):
         )
 
         notifications_qs.update(sent=timezone.now())
+        _finish_email_task(email_task, 'send_user_email_task', user_id, task_id)
+    except Exception as e:
+        raise DigestSendError(user, email_task, notifications_qs) from e
 
-        email_task.status = 'SUCCESS'
-        if email_task.error_message:
-            logger.error(f'Partial success for send_user_email_task for user {user_id}. Task id: {self.request.id}. Errors: {email_task.error_message}')
-            email_task.status = 'PARTIAL_SUCCESS'
-        email_task.save()
 
-    except Exception as e:
+@celery_app.task(bind=True, max_retries=5)
+def send_user_email_task(self, user_id, notification_ids, **kwargs):
+    try:
+        send_user_digest(self.request.id, user_id, notification_ids)
+    except DigestSendError as err:
+        e = err.__cause__
+        email_task = err.email_task
         retry_count = self.request.retries
         max_retries = self.max_retries
 
@@ -133,68 +164,63 @@ def send_user_email_task(self, user_id, notification_ids, **kwargs):
             email_task.error_message = email_task.error_message + f'Max retries reached: {str(e)} \n'
             email_task.save()
             logger.error(f'Max retries reached for send_moderator_email_task for user {user_id}. Task id: {self.request.id}. Errors: {email_task.error_message}')
-            notifications_qs.update(scheduled=None)
+            err.notifications_qs.update(scheduled=None)
             return
 
         email_task, _ = EmailTask.objects.get_or_create(task_id=self.request.id)
-        email_task.user = user
+        email_task.user = err.user
         email_task.status = 'RETRY'
         email_task.error_message = f'{str(e)} \n'
         email_task.error_message = email_task.error_message + f'Retry {retry_count}: {str(e)} \n'
         email_task.save()
         raise self.retry(exc=e)
 
-@celery_app.task(bind=True, max_retries=5)
-def send_moderator_email_task(self, user_id, notification_ids, provider_content_type_id, provider_id, **kwargs):
-    user, email_task = get_user_and_email_task(self.request.id, user_id)
+
+def send_moderator_digest(task_id, user_id, notification_ids, provider_content_type_id, provider_id, providers=None):
+    """Render and send the moderation digest of `notification_ids` for provider `provider_id` to the
+    user with guid `user_id`, recording the outcome in the EmailTask `task_id`. Raises DigestSendError
+    if sending failed.
+
+    :param dict providers: provider id -> provider, to reuse providers across the digests of a batch
+    """
+    user, email_task = get_user_and_email_task(task_id, user_id)
     if not user:
         return
 
-    destination_address = user.email
-    validator = EmailValidator()
-    try:
-        validator(destination_address)
-    except ValidationError:
-        emails_qs = user.emails
-        if emails_qs.exists():
-            destination_address = emails_qs.first().address
-        try:
-            validator(destination_address)
-        except ValidationError:
-            Notification.objects.filter(id__in=notification_ids).update(sent=timezone.now())
-            logger.error(f'User {user_id} has an invalid email address.')
-            email_task.status = 'Failure'
-            email_task.error_message = f'User {user_id} has an invalid email address.'
-            email_task.save()
-            return
+    if get_destination_address(user) is None:
+        Notification.objects.filter(id__in=notification_ids).update(sent=timezone.now())
+        logger.error(f'User {user_id} has an invalid email address.')
+        email_task.status = 'Failure'
+        email_task.error_message = f'User {user_id} has an invalid email address.'
+        email_task.save()
+        return
 
+    notifications_qs = Notification.objects.filter(id__in=notification_ids, sent__isnull=True)
     try:
-        notifications_qs = Notification.objects.filter(id__in=notification_ids, sent__isnull=True)
         rendered_notifications, failed_notifications = safe_render_notification(notifications_qs, email_task)
         notifications_qs = notifications_qs.exclude(id__in=failed_notifications)
 
         if not rendered_notifications:
-            email_task.status = 'SUCCESS'
-            if email_task.error_message:
-                logger.error(f'Partial success for send_moderator_email_task for user {user_id}. Task id: {self.request.id}. Errors: {email_task.error_message}')
-                email_task.status = 'PARTIAL_SUCCESS'
-            email_task.save()
+            _finish_email_task(email_task, 'send_moderator_email_task', user_id, task_id)
             return
 
-        try:
-            provider = AbstractProvider.objects.get(id=provider_id)
-        except AbstractProvider.DoesNotExist:
-            log_message(f'Provider with id {provider_id} does not exist for model {provider.type}')
-            email_task.status = 'FAILURE'
-            email_task.error_message = f'Provider with id {provider_id} does not exist for model {provider.type}'
-            email_task.save()
-            return
-        except AttributeError as err:
-            log_message(f'Error retrieving provider with id {provider_id} for model {provider.type}: {err}')
-            email_task.status = 'FAILURE'
-            email_task.error_message = f'Error retrieving provider with id {provider_id} for model {provider.type}: {err}'
-            email_task.save()
-            return
+        providers = providers if providers is not None else {}
+        provider = providers.get(provider_id)
+        if provider is None:
+            try:
+                provider = providers[provider_id] = AbstractProvider.objects.get(id=provider_id)
+            except AbstractProvider.DoesNotExist:
+                log_message(f'Provider with id {provider_id} does not exist for model {provider.type}')
+                email_task.status = 'FAILURE'
+                email_task.error_message = f'Provider with id {provider_id} does not exist for model {provider.type}'
+                email_task.save()
+                return
+            except AttributeError as err:
+                log_message(f'Error retrieving provider with id {provider_id} for model {provider.type}: {err}')
+                email_task.status = 'FAILURE'
+                email_task.error_message = f'Error retrieving provider with id {provider_id} for model {provider.type}: {err}'
+                email_task.save()
+                return
 
         if provider is None:
             log_message(f'Provider with id {provider_id} does not exist for model {provider.type}')
@@ -276,14 +302,18 @@ def send_moderator_email_task(self, user_id, notification_ids, provider_content_
         )
 
         notifications_qs.update(sent=timezone.now())
+        _finish_email_task(email_task, 'send_moderator_email_task', user_id, task_id)
+    except Exception as e:
+        raise DigestSendError(user, email_task, notifications_qs) from e
 
-        email_task.status = 'SUCCESS'
-        if email_task.error_message:
-            logger.error(f'Partial success for send_moderator_email_task for user {user_id}. Task id: {self.request.id}. Errors: {email_task.error_message}')
-            email_task.status = 'PARTIAL_SUCCESS'
-        email_task.save()
 
-    except Exception as e:
+@celery_app.task(bind=True, max_retries=5)
+def send_moderator_email_task(self, user_id, notification_ids, provider_content_type_id, provider_id, **kwargs):
+    try:
+        send_moderator_digest(self.request.id, user_id, notification_ids, provider_content_type_id, provider_id)
+    except DigestSendError as err:
+        e = err.__cause__
+        email_task = err.email_task
         retry_count = self.request.retries
         max_retries = self.max_retries
 
@@ -292,7 +322,7 @@ def send_moderator_email_task(self, user_id, notification_ids, provider_content_
             email_task.error_message = email_task.error_message + f'\nMax retries reached: {str(e)}'
             email_task.save()
             logger.error(f'Max retries reached for send_moderator_email_task for user {user_id}. Task id: {self.request.id}. Errors: {email_task.error_message}')
-            notifications_qs.update(scheduled=None)
+            err.notifications_qs.update(scheduled=None)
             return
 
         email_task.status = 'RETRY'
@@ -300,136 +330,281 @@ def send_moderator_email_task(self, user_id, notification_ids, provider_content_
         email_task.save()
         raise self.retry(exc=e)
 
-@celery_app.task(name='notifications.tasks.send_users_digest_email')
-def send_users_digest_email(dry_run=False):
-    today = date.today()
 
+def _hand_off_failed_digest(err, retry_task, args):
+    """Record a digest that failed inside a batch and queue it on its own task, which retries it"""
+    email_task = err.email_task
+    email_task.status = 'RETRY'
+    email_task.error_message = email_task.error_message + f'Batch attempt: {str(err.__cause__)} \n'
+    email_task.save()
+    retry_task.apply_async(args, countdown=retry_task.default_retry_delay)
+
+
+def _send_batched_digest(send_digest, retry_task, args):
+    """Send one digest of a batch without letting its failure abort the rest of the batch.
+
+    Digests that failed to render or send are handed off to `retry_task`. The notifications of a
+    digest that failed in any other way are unscheduled, so that the next digest run picks them
+    up again instead of leaving them stamped as scheduled for good.
+
+    :param send_digest: callable sending the digest
+    :param tuple args: the digest's arguments for `retry_task`, notification ids second
+    """
+    try:
+        send_digest()
+        return
+    except DigestSendError as err:
+        try:
+            _hand_off_failed_digest(err, retry_task, args)
+            return
+        except Exception:
+            logger.exception(f'Could not hand off the failed digest for user {args[0]} to {retry_task.name}')
+    except Exception:
+        logger.exception(f'Digest for user {args[0]} failed in batch')
+    Notification.objects.filter(id__in=args[1], sent__isnull=True).update(scheduled=None)
+
+
+@celery_app.task(bind=True, name='notifications.tasks.send_user_digest_batch')
+def send_user_digest_batch(self, digests):
+    """Send many user digests in one worker invocation.
+
+    :param list digests: [user guid, notification ids] pairs
+    """
+    for user_id, notification_ids in digests:
+        _send_batched_digest(
+            partial(send_user_digest, f'{self.request.id}:{user_id}', user_id, notification_ids),
+            send_user_email_task,
+            (user_id, notification_ids),
+        )
+
+
+@celery_app.task(bind=True, name='notifications.tasks.send_moderator_digest_batch')
+def send_moderator_digest_batch(self, digests):
+    """Send many moderator digests in one worker invocation.
+
+    :param list digests: [user guid, notification ids, provider content type id, provider id] lists
+    """
+    providers = {}
+    for user_id, notification_ids, provider_content_type_id, provider_id in digests:
+        _send_batched_digest(
+            partial(
+                send_moderator_digest,
+                f'{self.request.id}:{user_id}:{provider_id}',
+                user_id,
+                notification_ids,
+                provider_content_type_id,
+                provider_id,
+                providers=providers,
+            ),
+            send_moderator_email_task,
+            (user_id, notification_ids, provider_content_type_id, provider_id),
+        )
+
+
+def get_digest_frequencies(today=None):
+    today = today or date.today()
     frequencies = ['daily']
     if today.weekday() == 0:
         frequencies.append('weekly')
     if today.day == monthrange(today.year, today.month)[1]:
         frequencies.append('monthly')
+    return frequencies
+
+
+def dispatch_digests(batches, batch_task, to_args, dry_run=False, schedule=True):
+    """Queue the digests of each batch of recipients in `batches` on `batch_task`,
+    `DIGESTS_PER_TASK` recipients per task.
+
+    :param batches: iterable of lists of groups, as yielded by `iter_users_emails`
+    :param to_args: group -> the digest's arguments for `batch_task`
+    :param bool schedule: stamp the batch's notifications as scheduled, with one UPDATE per batch
+    :return dict: recipients, notifications and tasks queued, and the time taken in seconds
+    """
+    start = time.monotonic()
+    stats = {'recipients': 0, 'notifications': 0, 'tasks': 0}
+    for groups in batches:
+        notification_ids = [msg['notification_id'] for group in groups for msg in group['info']]
+        stats['recipients'] += len(groups)
+        stats['notifications'] += len(notification_ids)
+        if dry_run:
+            continue
+        if schedule:
+            Notification.objects.filter(id__in=notification_ids).update(scheduled=timezone.now())
+        for i in range(0, len(groups), settings.DIGESTS_PER_TASK):
+            batch_task.delay([to_args(group) for group in groups[i:i + settings.DIGESTS_PER_TASK]])
+            stats['tasks'] += 1
+    stats['seconds'] = round(time.monotonic() - start, 3)
+    return stats
+
+
+def _log_dispatch(name, freq, stats):
+    rate = stats['recipients'] / stats['seconds'] if stats['seconds'] else stats['recipients']
+    logger.info(
+        f'{name} [{freq}]: queued {stats["recipients"]} digests ({stats["notifications"]} notifications) '
+        f'in {stats["tasks"]} tasks in {stats["seconds"]}s ({rate:.1f} digests/s)'
+    )
 
-    for freq in frequencies:
-        grouped_emails = get_users_emails(freq)
-        for group in grouped_emails:
-            user_id = group['user_id']
-            notification_ids = [msg['notification_id'] for msg in group['info']]
-            if not dry_run:
-                notifications_qs = Notification.objects.filter(id__in=notification_ids)
-                notifications_qs.update(scheduled=timezone.now())
-                send_user_email_task.delay(user_id, notification_ids)
+
+def _user_digest_args(group):
+    return [group['user_id'], [msg['notification_id'] for msg in group['info']]]
+
+
+def _moderator_digest_args(group):
+    return [
+        group['user_id'],
+        [msg['notification_id'] for msg in group['info']],
+        group['provider_content_type_id'],
+        group['provider_id'],
+    ]
+
+
+@celery_app.task(name='notifications.tasks.send_users_digest_email')
+def send_users_digest_email(dry_run=False):
+    results = {}
+    for freq in get_digest_frequencies():
+        results[freq] = dispatch_digests(iter_users_emails(freq), send_user_digest_batch, _user_digest_args, dry_run=dry_run)
+        _log_dispatch('send_users_digest_email', freq, results[freq])
+    return results
 
 @celery_app.task(name='notifications.tasks.send_moderators_digest_email')
 def send_moderators_digest_email(dry_run=False):
-    today = date.today()
+    results = {}
+    for freq in get_digest_frequencies():
+        results[freq] = dispatch_digests(iter_moderators_emails(freq), send_moderator_digest_batch, _moderator_digest_args, dry_run=dry_run)
+        _log_dispatch('send_moderators_digest_email', freq, results[freq])
+    return results
+
+MODERATORS_EMAILS_SQL = """
+    SELECT
+        json_build_object(
+            'user_id', osf_guid._id,
+            'provider_id', ns.object_id,
+            'provider_content_type_id', ns.content_type_id,
+            'info', json_agg(
+                json_build_object(
+                    'notification_id', n.id
+                )
+            )
+        )
+    FROM osf_notification AS n
+    INNER JOIN osf_notificationsubscription_v2 AS ns ON n.subscription_id = ns.id
+    INNER JOIN osf_notificationtype AS nt ON ns.notification_type_id = nt.id
+    LEFT JOIN osf_guid ON ns.user_id = osf_guid.object_id
+    WHERE n.sent IS NULL
+        AND n.scheduled IS NULL
+        AND ns.message_frequency = %s
+        AND nt.name IN (%s, %s)
+        AND nt.name NOT IN (%s, %s, %s)
+        AND osf_guid.content_type_id = (
+            SELECT id FROM django_content_type WHERE model = 'osfuser'
+        )
+        AND (osf_guid._id, ns.object_id, ns.content_type_id) > (%s, %s, %s)
+    GROUP BY osf_guid._id, ns.object_id, ns.content_type_id
+    ORDER BY osf_guid._id ASC, ns.object_id ASC, ns.content_type_id ASC
+    LIMIT %s
+"""
+
+USERS_EMAILS_SQL = """
+    SELECT
+        json_build_object(
+            'user_id', osf_guid._id,
+            'info', json_agg(
+                json_build_object(
+                    'notification_id', n.id
+                )
+            )
+        )
+    FROM osf_notification AS n
+    INNER JOIN osf_notificationsubscription_v2 AS ns ON n.subscription_id = ns.id
+    INNER JOIN osf_notificationtype AS nt ON ns.notification_type_id = nt.id
+    LEFT JOIN osf_guid ON ns.user_id = osf_guid.object_id
+    WHERE n.sent IS NULL
+        AND n.scheduled IS NULL
+        AND ns.message_frequency = %s
+        AND nt.name NOT IN (%s, %s, %s, %s, %s)
+        AND osf_guid.content_type_id = (
+            SELECT id FROM django_content_type WHERE model = 'osfuser'
+        )
+        AND osf_guid._id > %s
+    GROUP BY osf_guid._id
+    ORDER BY osf_guid._id ASC
+    LIMIT %s
+"""
 
-    frequencies = ['daily']
-    if today.weekday() == 0:
-        frequencies.append('weekly')
-    if today.day == monthrange(today.year, today.month)[1]:
-        frequencies.append('monthly')
 
-    for freq in frequencies:
-        grouped_emails = get_moderators_emails(freq)
-        for group in grouped_emails:
-            user_id = group['user_id']
-            provider_id = group['provider_id']
-            provider_content_type_id = group['provider_content_type_id']
-            notification_ids = [msg['notification_id'] for msg in group['info']]
-            if not dry_run:
-                notifications_qs = Notification.objects.filter(id__in=notification_ids)
-                notifications_qs.update(scheduled=timezone.now())
-                send_moderator_email_task.delay(user_id, notification_ids, provider_content_type_id, provider_id)
+def iter_moderators_emails(message_freq, batch_size=None):
+    """Yield the moderator digests that need to be sent, grouped by users AND providers, in lists
+    of at most `batch_size`. Pages are keyed on the last group seen, so stamping the notifications
+    of a page as scheduled before asking for the next one doesn't skip anything.
+    """
+    batch_size = batch_size or settings.DIGEST_RECIPIENT_BATCH_SIZE
+    last = ('', -1, -1)
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(MODERATORS_EMAILS_SQL,
+                [
+                    message_freq,
+                    NotificationTypeEnum.PROVIDER_NEW_PENDING_SUBMISSIONS.value,
+                    NotificationTypeEnum.PROVIDER_NEW_PENDING_WITHDRAW_REQUESTS.value,
+                    NotificationTypeEnum.DIGEST_REVIEWS_MODERATORS.value,
+                    NotificationTypeEnum.USER_DIGEST.value,
+                    NotificationTypeEnum.USER_NO_ADDON.value,
+                    *last,
+                    batch_size,
+                ]
+            )
+            groups = [row[0] for row in cursor.fetchall()]
+        if not groups:
+            return
+        yield groups
+        if len(groups) < batch_size:
+            return
+        last = (groups[-1]['user_id'], groups[-1]['provider_id'], groups[-1]['provider_content_type_id'])
+
 
 def get_moderators_emails(message_freq: str):
     """Get all emails for reviews moderators that need to be sent, grouped by users AND providers.
     :param send_type: from NOTIFICATION_TYPES, could be "email_digest" or "email_transactional"
     :return Iterable of dicts of the form:
     """
-    sql = """
-        SELECT
-            json_build_object(
-                'user_id', osf_guid._id,
-                'provider_id', ns.object_id,
-                'provider_content_type_id', ns.content_type_id,
-                'info', json_agg(
-                    json_build_object(
-                        'notification_id', n.id
-                    )
-                )
-            )
-        FROM osf_notification AS n
-        INNER JOIN osf_notificationsubscription_v2 AS ns ON n.subscription_id = ns.id
-        INNER JOIN osf_notificationtype AS nt ON ns.notification_type_id = nt.id
-        LEFT JOIN osf_guid ON ns.user_id = osf_guid.object_id
-        WHERE n.sent IS NULL
-            AND n.scheduled IS NULL
-            AND ns.message_frequency = %s
-            AND nt.name IN (%s, %s)
-            AND nt.name NOT IN (%s, %s, %s)
-            AND osf_guid.content_type_id = (
-                SELECT id FROM django_content_type WHERE model = 'osfuser'
-            )
-        GROUP BY osf_guid._id, ns.object_id, ns.content_type_id
-        ORDER BY osf_guid._id ASC
+    return itertools.chain.from_iterable(iter_moderators_emails(message_freq))
+
+
+def iter_users_emails(message_freq, batch_size=None):
+    """Yield the user digests that need to be sent in lists of at most `batch_size`,
+    paging on the user guid like `iter_moderators_emails`.
+    NOTE: These do not include reviews triggered emails for moderators.
     """
+    batch_size = batch_size or settings.DIGEST_RECIPIENT_BATCH_SIZE
+    last_user_id = ''
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(USERS_EMAILS_SQL,
+                [
+                    message_freq,
+                    NotificationTypeEnum.PROVIDER_NEW_PENDING_SUBMISSIONS.value,
+                    NotificationTypeEnum.PROVIDER_NEW_PENDING_WITHDRAW_REQUESTS.value,
+                    NotificationTypeEnum.DIGEST_REVIEWS_MODERATORS.value,
+                    NotificationTypeEnum.USER_DIGEST.value,
+                    NotificationTypeEnum.USER_NO_ADDON.value,
+                    last_user_id,
+                    batch_size,
+                ]
+            )
+            groups = [row[0] for row in cursor.fetchall()]
+        if not groups:
+            return
+        yield groups
+        if len(groups) < batch_size:
+            return
+        last_user_id = groups[-1]['user_id']
 
-    with connection.cursor() as cursor:
-        cursor.execute(sql,
-            [
-                message_freq,
-                NotificationTypeEnum.PROVIDER_NEW_PENDING_SUBMISSIONS.value,
-                NotificationTypeEnum.PROVIDER_NEW_PENDING_WITHDRAW_REQUESTS.value,
-                NotificationTypeEnum.DIGEST_REVIEWS_MODERATORS.value,
-                NotificationTypeEnum.USER_DIGEST.value,
-                NotificationTypeEnum.USER_NO_ADDON.value,
-            ]
-        )
-        return itertools.chain.from_iterable(cursor.fetchall())
 
 def get_users_emails(message_freq):
     """Get all emails that need to be sent.
     NOTE: These do not include reviews triggered emails for moderators.
     """
-
-    sql = """
-        SELECT
-            json_build_object(
-                'user_id', osf_guid._id,
-                'info', json_agg(
-                    json_build_object(
-                        'notification_id', n.id
-                    )
-                )
-            )
-        FROM osf_notification AS n
-        INNER JOIN osf_notificationsubscription_v2 AS ns ON n.subscription_id = ns.id
-        INNER JOIN osf_notificationtype AS nt ON ns.notification_type_id = nt.id
-        LEFT JOIN osf_guid ON ns.user_id = osf_guid.object_id
-        WHERE n.sent IS NULL
-            AND n.scheduled IS NULL
-            AND ns.message_frequency = %s
-            AND nt.name NOT IN (%s, %s, %s, %s, %s)
-            AND osf_guid.content_type_id = (
-                SELECT id FROM django_content_type WHERE model = 'osfuser'
-            )
-        GROUP BY osf_guid._id
-        ORDER BY osf_guid._id ASC
-    """
-
-    with connection.cursor() as cursor:
-        cursor.execute(sql,
-            [
-                message_freq,
-                NotificationTypeEnum.PROVIDER_NEW_PENDING_SUBMISSIONS.value,
-                NotificationTypeEnum.PROVIDER_NEW_PENDING_WITHDRAW_REQUESTS.value,
-                NotificationTypeEnum.DIGEST_REVIEWS_MODERATORS.value,
-                NotificationTypeEnum.USER_DIGEST.value,
-                NotificationTypeEnum.USER_NO_ADDON.value,
-            ]
-        )
-        return itertools.chain.from_iterable(cursor.fetchall())
+    return itertools.chain.from_iterable(iter_users_emails(message_freq))
 
 
 @run_postcommit(once_per_request=False, celery=True)
@@ -459,26 +634,18 @@ def send_users_instant_digest_email(self, dry_run=False, **kwargs):
     """Send pending "instant' digest emails.
     :return:
     """
-    grouped_emails = get_users_emails('instantly')
-    for group in grouped_emails:
-        user_id = group['user_id']
-        notification_ids = [msg['notification_id'] for msg in group['info']]
-        if not dry_run:
-            send_user_email_task.delay(user_id, notification_ids)
+    stats = dispatch_digests(iter_users_emails('instantly'), send_user_digest_batch, _user_digest_args, dry_run=dry_run, schedule=False)
+    _log_dispatch('send_users_instant_digest_email', 'instantly', stats)
+    return stats
 
 @celery_app.task(bind=True, name='notifications.tasks.send_moderators_instant_digest_email')
 def send_moderators_instant_digest_email(self, dry_run=False, **kwargs):
     """Send pending "instant' digest emails.
     :return:
     """
-    grouped_emails = get_moderators_emails('instantly')
-    for group in grouped_emails:
-        user_id = group['user_id']
-        provider_id = group['provider_id']
-        provider_content_type_id = group['provider_content_type_id']
-        notification_ids = [msg['notification_id'] for msg in group['info']]
-        if not dry_run:
-            send_moderator_email_task.delay(user_id, notification_ids, provider_content_type_id, provider_id)
+    stats = dispatch_digests(iter_moderators_emails('instantly'), send_moderator_digest_batch, _moderator_digest_args, dry_run=dry_run, schedule=False)
+    _log_dispatch('send_moderators_instant_digest_email', 'instantly', stats)
+    return stats
 
 @celery_app.task(bind=True, name='notifications.tasks.send_no_addon_email')
 def send_no_addon_email(self, dry_run=False, **kwargs):
@@ -1,6 +1,10 @@
+import hashlib
 import re
 import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from api.caching import settings as cache_settings
+from api.caching.utils import domain_check_cache
 from framework import sentry
 from framework.celery_tasks import app as celery_app
 from framework.postcommit_tasks.handlers import run_postcommit
@@ -17,6 +21,8 @@ logging.basicConfig(level=logging.INFO)
 
 DOMAIN_REGEX = re.compile(r'\W*(?P<protocol>\w+://)?(?P<www>www\.)?(?P<domain>([\w-]+\.)+[a-zA-Z]+)(?P<path>[/\-\.\w]*)?\W*')
 REDIRECT_CODES = {301, 302, 303, 307, 308}
+# Distinguishes cache misses from links cached as not being urls
+_MISSING = object()
 NOTABLE_POST_NOMINALS = ['m.sc', 'm.sc.', 'msc.', 'b.sc.', 'bsc.', 'd.sc.', 'dsc.', 'phd.', 'ph.d.', 'msc.pt', 'pt.', 'prof.', 'dr.', 'md.', 'jd.', 'esq.']
 
 @celery_app.task()
@@ -48,60 +54,128 @@ def reclassify_domain_references(notable_domain_id, current_note, previous_note)
 def _check_resource_for_domains(resource, content):
     from osf.models import NotableDomain, DomainReference
 
-    spammy_domains = []
+    extracted_domains = dict(_extract_domains(content))
+    if not extracted_domains:
+        return []
+    NotableDomain.objects.bulk_create(
+        [NotableDomain(domain=domain, note=note) for domain, note in extracted_domains.items()],
+        ignore_conflicts=True,
+    )
+    # Domains are stored lowercased; keep them in the order they were found
+    notable_domains = {
+        notable_domain.domain: notable_domain
+        for notable_domain in NotableDomain.objects.filter(domain__in=extracted_domains)
+    }
+    notable_domains = [notable_domains[domain] for domain in dict.fromkeys(domain.lower() for domain in extracted_domains)]
+
     referrer_content_type = ContentType.objects.get_for_model(resource)
-    for domain, note in _extract_domains(content):
-        notable_domain, _ = NotableDomain.objects.get_or_create(
-            domain=domain,
-            defaults={'note': note}
-        )
-        if notable_domain.note == NotableDomain.Note.EXCLUDE_FROM_ACCOUNT_CREATION_AND_CONTENT.value:
-            spammy_domains.append(notable_domain.domain)
-        DomainReference.objects.get_or_create(
-            domain=notable_domain,
-            referrer_object_id=resource.id,
-            referrer_content_type=referrer_content_type,
-            defaults={
-                'is_triaged': notable_domain.note not in (NotableDomain.Note.UNKNOWN, NotableDomain.Note.UNVERIFIED)
-            }
-        )
+    DomainReference.objects.bulk_create(
+        [
+            DomainReference(
+                domain=notable_domain,
+                referrer_object_id=resource.id,
+                referrer_content_type=referrer_content_type,
+                is_triaged=notable_domain.note not in (NotableDomain.Note.UNKNOWN, NotableDomain.Note.UNVERIFIED),
+            )
+            for notable_domain in notable_domains
+        ],
+        ignore_conflicts=True,
+    )
 
-    return spammy_domains
+    return [
+        notable_domain.domain
+        for notable_domain in notable_domains
+        if notable_domain.note == NotableDomain.Note.EXCLUDE_FROM_ACCOUNT_CREATION_AND_CONTENT.value
+    ]
 
 
 def _extract_domains(content):
+    """Yields (<domain>, <note>) for each domain linked to from content, or redirected to by
+    one of its links, in order of appearance.
+
+    The first link of every domain is checked, up to DOMAIN_EXTRACTION_MAX_WORKERS at a time.
+    A domain whose first link led elsewhere is likely a link shortener, so all of its other links
+    are then checked at once too. The outcomes are gone through in order of appearance, a domain's
+    links counting until one of them turns out to lead to that domain itself.
+    """
     from osf.models import NotableDomain
 
-    extracted_domains = set()
+    # (domain, url) of each distinct link in content, in order of appearance
+    links = []
+    seen_urls = set()
     for match in DOMAIN_REGEX.finditer(content):
-        note = NotableDomain.Note.UNKNOWN
         domain = match.group('domain')
-        if not domain or domain in extracted_domains:
+        if not domain:
             continue
 
         protocol = match.group('protocol') or 'https://'
         www = match.group('www') or ''
         path = match.group('path') or ''
         constructed_url = f'{protocol}{www}{domain}{path}'
+        if constructed_url not in seen_urls:
+            seen_urls.add(constructed_url)
+            links.append((domain, constructed_url))
+    if not links:
+        return
+
+    def leads_to(domain, result):
+        return result is not None and result[0] in (None, domain)
+
+    first_urls = {}
+    for domain, url in links:
+        first_urls.setdefault(domain, url)
+    with ThreadPoolExecutor(max_workers=settings.DOMAIN_EXTRACTION_MAX_WORKERS) as executor:
+        results = dict(zip(first_urls.values(), executor.map(_check_url, first_urls.values())))
+        other_urls = [
+            url for domain, url in links
+            if url not in results and not leads_to(domain, results[first_urls[domain]])
+        ]
+        results.update(zip(other_urls, executor.map(_check_url, other_urls)))
 
-        try:
-            response = requests.head(constructed_url, timeout=settings.DOMAIN_EXTRACTION_TIMEOUT)
-        except requests.exceptions.InvalidURL:
+    extracted_domains = set()
+    for domain, url in links:
+        if domain in extracted_domains:
+            continue
+        result = results[url]
+        if result is None:
             # Likely false-positive from a filename.ext
             continue
-        except requests.exceptions.RequestException:
-            note = NotableDomain.Note.UNVERIFIED
-        else:
-            # Store the redirect location (to help catch link shorteners)
-            if response.status_code in REDIRECT_CODES and 'location' in response.headers:
-                redirect_match = DOMAIN_REGEX.match(response.headers['location'])
-                if redirect_match:
-                    domain = redirect_match.group('domain') or domain
-
+        redirect_domain, note = result
+        # Store the redirect location (to help catch link shorteners)
+        domain = redirect_domain or domain
         # Avoid returning a duplicate domain discovered via redirect
         if domain not in extracted_domains:
             extracted_domains.add(domain)
-            yield domain, note
+            yield domain, NotableDomain.Note(note)
+
+
+def _check_url(url):
+    """Returns (<the domain url redirects to, if any>, <note>), or None if url isn't a url at all.
+    Outcomes are cached for DOMAIN_CHECK_CACHE_TIMEOUT, except for failed requests, which are
+    likely to be transient.
+    """
+    from osf.models import NotableDomain
+
+    key = cache_settings.DOMAIN_CHECK_KEY.format(digest=hashlib.md5(url.encode()).hexdigest())
+    result = domain_check_cache.get(key, _MISSING)
+    if result is not _MISSING:
+        return result
+
+    result = (None, NotableDomain.Note.UNKNOWN.value)
+    try:
+        response = requests.head(url, timeout=settings.DOMAIN_EXTRACTION_TIMEOUT)
+    except requests.exceptions.InvalidURL:
+        result = None
+    except requests.exceptions.RequestException:
+        return (None, NotableDomain.Note.UNVERIFIED.value)
+    else:
+        if response.status_code in REDIRECT_CODES and 'location' in response.headers:
+            redirect_match = DOMAIN_REGEX.match(response.headers['location'])
+            if redirect_match and redirect_match.group('domain'):
+                result = (redirect_match.group('domain'), NotableDomain.Note.UNKNOWN.value)
+
+    domain_check_cache.set(key, result, timeout=settings.DOMAIN_CHECK_CACHE_TIMEOUT)
+    return result
 
 
 def check_resource_with_spam_services(resource, content, author, author_email, request_kwargs):
@@ -0,0 +1,67 @@
+"""Time serializing a page of public nodes with the API's NodeSerializer.
+
+Used to measure the cost of building relationship links, e.g.
+
+    python manage.py benchmark_node_serialization --page-size 100 --iterations 5
+"""
+import logging
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpRequest
+from rest_framework.request import Request
+
+from api.base.settings import LATEST_VERSIONS
+from api.nodes.serializers import NodeSerializer
+from osf.models import Node
+
+logger = logging.getLogger(__name__)
+
+
+def make_benchmark_request(version):
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.path = '/'
+    http_request.META['SERVER_NAME'] = 'localhost'
+    http_request.META['SERVER_PORT'] = '8000'
+    request = Request(http_request)
+    request.user = AnonymousUser()
+    request.parser_context.setdefault('kwargs', {})
+    request.parser_context['kwargs']['version'] = 'v2'
+    request.version = version
+    return request
+
+
+def benchmark_node_serialization(page_size=100, iterations=5, version=None):
+    version = version or LATEST_VERSIONS[2]
+    nodes = list(
+        Node.objects.filter(is_public=True, is_deleted=False).order_by('-modified')[:page_size],
+    )
+    request = make_benchmark_request(version)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        NodeSerializer(nodes, many=True, context={'request': request}).data
+        timings.append(time.perf_counter() - start)
+    return len(nodes), timings
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--page-size', type=int, default=100, help='Number of nodes to serialize per iteration')
+        parser.add_argument('--iterations', type=int, default=5, help='Number of times to serialize the page')
+        parser.add_argument('--version', type=str, default=None, help='API version to serialize with')
+
+    def handle(self, *args, **options):
+        count, timings = benchmark_node_serialization(
+            page_size=options['page_size'],
+            iterations=options['iterations'],
+            version=options['version'],
+        )
+        logger.info(
+            f'Serialized {count} nodes {len(timings)} times: '
+            f'min {min(timings) * 1000:.1f}ms, max {max(timings) * 1000:.1f}ms, '
+            f'mean {sum(timings) / len(timings) * 1000:.1f}ms',
+        )
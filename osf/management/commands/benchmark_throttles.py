@@ -0,0 +1,58 @@
+"""Time API throttle checks for a single busy client, comparing the sliding-window
+counters of `BaseThrottle` against the timestamp history they replaced, e.g.
+
+    python manage.py benchmark_throttles --rate 10000/hour --requests 20000
+"""
+import logging
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.request import Request
+from rest_framework.throttling import AnonRateThrottle
+
+from api.base.throttling import BaseThrottle, TimestampHistoryThrottle
+
+logger = logging.getLogger(__name__)
+
+
+def benchmark_throttle(throttle_class, rate, num_requests, cache_alias='default'):
+    bench_class = type(
+        f'Benchmark{throttle_class.__name__}',
+        (throttle_class, AnonRateThrottle),
+        {
+            # a fresh scope each run, so no state is left over from earlier runs
+            'scope': f'benchmark-{throttle_class.__name__}-{time.time_ns()}',
+            'rate': rate,
+            'cache': caches[cache_alias],
+        },
+    )
+    request = Request(RequestFactory().get('/', REMOTE_ADDR='203.0.113.7'))
+    allowed = 0
+    start = time.perf_counter()
+    for _ in range(num_requests):
+        if bench_class().allow_request(request, None):
+            allowed += 1
+    return allowed, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--rate', type=str, default='10000/hour', help='Throttle rate to benchmark')
+        parser.add_argument('--requests', type=int, default=20000, help='Number of requests to check')
+        parser.add_argument('--cache', type=str, default='default', help='Cache alias to store throttle state in')
+
+    def handle(self, *args, **options):
+        for throttle_class in (TimestampHistoryThrottle, BaseThrottle):
+            allowed, elapsed = benchmark_throttle(
+                throttle_class,
+                rate=options['rate'],
+                num_requests=options['requests'],
+                cache_alias=options['cache'],
+            )
+            logger.info(
+                f'{throttle_class.__name__}: {options["requests"]} checks, {allowed} allowed, '
+                f'{elapsed * 1000:.1f}ms total, {elapsed / options["requests"] * 1e6:.1f}us per check',
+            )
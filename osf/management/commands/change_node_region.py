@@ -1,12 +1,13 @@
 import logging
 import json
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from google.cloud.storage.client import Client
 from google.oauth2.service_account import Credentials
 
-from osf.models import AbstractNode
+from osf.models import AbstractNode, guid_cache
 from osf.utils.migrations import disable_auto_now_fields
 from addons.osfstorage.models import Region
 
@@ -83,6 +84,10 @@ def _clone_file(file_obj):
     cloned_f.save()
     # Repoint Guids
     assert cloned_f.id, f'Cloned file ID not assigned for {file_obj._id}'
+    guid_cache.invalidate(
+        file_obj.guids.values_list('_id', flat=True),
+        [(ContentType.objects.get_for_model(file_obj).id, file_obj.id)],
+    )
     file_obj.guids.update(object_id=cloned_f.id)
     # Retain original timestamps
     cloned_f.created = file_obj.created
@@ -0,0 +1,55 @@
+"""Store the ancestor ids of OSFStorage file nodes that predate the `_ancestor_ids` column.
+
+Nodes are populated a whole tree at a time, starting from each root folder, so every folder with
+stored ancestors also has them stored for all of its descendants.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from addons.osfstorage.models import OsfStorageFolder
+
+logger = logging.getLogger(__name__)
+
+
+def populate_osfstorage_ancestor_ids(batch_size=1000, limit=None, dry_run=False):
+    roots = OsfStorageFolder.objects.filter(
+        is_root=True,
+        _ancestor_ids__isnull=True,
+    ).order_by('id')
+    if limit:
+        roots = roots[:limit]
+
+    root_count = node_count = 0
+    for root in roots.iterator(chunk_size=batch_size):
+        if dry_run:
+            root_count += 1
+            continue
+        with transaction.atomic():
+            root._ancestor_ids = []
+            OsfStorageFolder.objects.filter(id=root.id).update(_ancestor_ids=[])
+            node_count += root.populate_descendant_ancestor_ids()
+        root_count += 1
+    logger.info(
+        f'{"[DRY RUN] Would populate" if dry_run else "Populated"} ancestor ids for {root_count} '
+        f'osfstorage trees ({node_count} descendant nodes)',
+    )
+    return root_count, node_count
+
+
+class Command(BaseCommand):
+    help = '''Stores ancestor ids for osfstorage file trees that do not have them yet'''
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Root folders fetched per query')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of trees to populate')
+        parser.add_argument('--dry', action='store_true', dest='dry_run', help='Count the trees without populating them')
+
+    def handle(self, *args, **options):
+        populate_osfstorage_ancestor_ids(
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            dry_run=options['dry_run'],
+        )
@@ -0,0 +1,53 @@
+"""Recompute the materialized readable nodes of users from their node permissions.
+
+Rows are kept current as permissions change (see osf.models.readable_nodes); this command fills
+the table in before `ENABLE_READABLE_NODES` is turned on, and repairs it for specific users.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from osf.models import OSFUser
+from osf.models.node import NodeGroupObjectPermission, NodeUserObjectPermission
+from osf.models.readable_nodes import refresh_readable_nodes
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_readable_nodes(guids=None, batch_size=500):
+    if guids:
+        users = OSFUser.objects.filter(guids___id__in=guids)
+    else:
+        # Only users in some node's permission groups, or with direct node permissions, can read anything private
+        users = OSFUser.objects.filter(
+            Q(groups__in=NodeGroupObjectPermission.objects.values('group_id'))
+            | Q(id__in=NodeUserObjectPermission.objects.values('user_id')),
+        ).distinct()
+    user_ids = users.values_list('id', flat=True).order_by('id')
+
+    count = 0
+    last_id = 0
+    while True:
+        batch = list(user_ids.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            refresh_readable_nodes(batch)
+        count += len(batch)
+        last_id = batch[-1]
+        logger.info(f'Rebuilt readable nodes for {count} users')
+    return count
+
+
+class Command(BaseCommand):
+    help = '''Recomputes the readable nodes of the given users, or of every user with node permissions'''
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--guids', type=str, nargs='+', help='User guids to rebuild')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users to rebuild per transaction')
+
+    def handle(self, *args, **options):
+        rebuild_readable_nodes(guids=options.get('guids'), batch_size=options['batch_size'])
@@ -1,28 +1,66 @@
 """Resend metadata for all (or some) public objects (registrations, preprints...) to SHARE/Trove
+
+By default one celery task is queued per item; with `--bulk` each chunk of items is
+instead sent from this process (see `api.share.utils.pls_bulk_send_trove_records`).
 """
+import json
 import logging
+import os
 
 from django.core.management.base import BaseCommand
 from addons.osfstorage.models import OsfStorageFile
 from osf.models import AbstractProvider, Registration, Preprint, Node, OSFUser
-from api.share.utils import task__update_share
+from api.share.utils import task__update_share, pls_bulk_send_trove_records
 from website.settings import CeleryConfig
 
 
 logger = logging.getLogger(__name__)
 
 
-def recatalog(queryset, start_id, chunk_count, chunk_size):
+class RecatalogCheckpoint:
+    """the last id recatalogued for each model, kept in a json file so an
+    interrupted run can pick up where it stopped
+    """
+
+    def __init__(self, path, scope=None):
+        self.path = path
+        self.scope = scope
+        try:
+            with open(path) as _file:
+                self._last_ids = json.load(_file)
+        except FileNotFoundError:
+            self._last_ids = {}
+
+    def start_id(self, model, default=0):
+        _last_id = self._last_ids.get(self._key(model))
+        return default if _last_id is None else max(default, _last_id + 1)
+
+    def save(self, model, last_id):
+        self._last_ids[self._key(model)] = last_id
+        _tmp_path = f'{self.path}.tmp'
+        with open(_tmp_path, 'w') as _file:
+            json.dump(self._last_ids, _file)
+        os.replace(_tmp_path, self.path)
+
+    def _key(self, model):
+        return f'{self.scope}:{model.__name__}' if self.scope else model.__name__
+
+
+def recatalog(queryset, start_id, chunk_count, chunk_size, *, bulk=False, checkpoint=None):
     _chunk_start_id = start_id
+    if checkpoint is not None:
+        _chunk_start_id = checkpoint.start_id(queryset.model, default=start_id)
     for _ in range(chunk_count):
-        _last_id = recatalog_chunk(queryset, _chunk_start_id, chunk_size)
+        _last_id = recatalog_chunk(queryset, _chunk_start_id, chunk_size, bulk=bulk)
         if _last_id is None:
             logger.info('All done!')
             return
+        if checkpoint is not None:
+            checkpoint.save(queryset.model, _last_id)
         _chunk_start_id = _last_id + 1
 
 
-def recatalog_chunk(queryset, start_id, chunk_size):
+def recatalog_chunk(queryset, start_id, chunk_size, *, bulk=False):
     item_chunk = list(
         queryset
         .filter(id__gte=start_id)
@@ -34,23 +72,39 @@ def recatalog_chunk(queryset, start_id, chunk_size):
         first_id = item_chunk[0].id
         last_id = item_chunk[-1].id
 
+        guids = []
         for item in item_chunk:
             guid = item.guids.values_list('_id', flat=True).first()
             if guid:
-                task__update_share.apply_async(
-                    kwargs={'guid': guid, 'is_backfill': True},
-                    queue=CeleryConfig.task_low_queue,  # "low priority" queue
-                )
+                guids.append(guid)
             else:
                 logger.debug('skipping item without guid: %s', item)
 
-        logger.info(f'Queued metadata recataloguing for {len(item_chunk)} {queryset.model.__name__}ses (ids in range [{first_id},{last_id}])')
+        if bulk:
+            failed_guids = pls_bulk_send_trove_records(guids, is_backfill=True)
+            for guid in failed_guids:  # leave these to the per-item task's retries
+                _queue_update_share(guid)
+            logger.info(
+                f'Sent metadata for {len(guids) - len(failed_guids)} {queryset.model.__name__}ses '
+                f'(ids in range [{first_id},{last_id}]), queued {len(failed_guids)} to retry',
+            )
+        else:
+            for guid in guids:
+                _queue_update_share(guid)
+            logger.info(f'Queued metadata recataloguing for {len(item_chunk)} {queryset.model.__name__}ses (ids in range [{first_id},{last_id}])')
     else:
         logger.info(f'Done recataloguing metadata for {queryset.model.__name__}ses!')
 
     return last_id
 
 
+def _queue_update_share(guid):
+    task__update_share.apply_async(
+        kwargs={'guid': guid, 'is_backfill': True},
+        queue=CeleryConfig.task_low_queue,  # "low priority" queue
+    )
+
+
 def _recatalog_all(queryset, chunk_size):
     recatalog(queryset, start_id=0, chunk_count=int(9e9), chunk_size=chunk_size)
 
@@ -126,6 +180,17 @@ class Command(BaseCommand):
             action='store_true',
             help='also remove private and deleted items from the catalog',
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='send each chunk in bulk from this process instead of queueing a celery task per item',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=None,
+            help='json file recording progress; a rerun with the same file resumes where the last one stopped',
+        )
 
     def handle(self, *args, **options):
         pls_all_types = options['all_types']
@@ -139,6 +204,8 @@ class Command(BaseCommand):
         chunk_size = options['chunk_size']
         chunk_count = options['chunk_count']
         also_decatalog = options['also_decatalog']
+        bulk = options['bulk']
+        checkpoint = RecatalogCheckpoint(options['checkpoint']) if options['checkpoint'] else None
 
         if pls_all_types:
             assert not start_id, 'choose a specific type to resume with --start-id'
@@ -173,4 +240,4 @@ class Command(BaseCommand):
                     _queryset = _queryset.filter(is_public=True, is_published=True, deleted__isnull=True)
                 else:
                     _queryset = _queryset.filter(is_public=True, deleted__isnull=True)
-            recatalog(_queryset, start_id, chunk_count, chunk_size)
+            recatalog(_queryset, start_id, chunk_count, chunk_size, bulk=bulk, checkpoint=checkpoint)
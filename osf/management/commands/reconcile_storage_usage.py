@@ -0,0 +1,48 @@
+"""Recount the persisted OSFStorage usage of nodes from their file versions.
+
+Usage counters are adjusted incrementally as WaterButler reports file changes; this command
+recomputes them from scratch, either for specific nodes or for every node that has a counter.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from api.caching.tasks import update_storage_usage_cache
+from osf.models import AbstractNode, NodeStorageUsage
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_storage_usage(guids=None, run_async=False, batch_size=1000):
+    if guids:
+        nodes = AbstractNode.objects.filter(guids___id__in=guids)
+    else:
+        nodes = AbstractNode.objects.filter(
+            id__in=NodeStorageUsage.objects.values('node_id'),
+        )
+    count = 0
+    for node_id, guid in nodes.values_list('id', 'guids___id').order_by('id').iterator(chunk_size=batch_size):
+        if run_async:
+            update_storage_usage_cache.delay(node_id, guid)
+        else:
+            update_storage_usage_cache(node_id, guid)
+        count += 1
+    logger.info(f'{"Queued" if run_async else "Reconciled"} storage usage for {count} nodes')
+    return count
+
+
+class Command(BaseCommand):
+    help = '''Recounts persisted storage usage for the given nodes, or for every node with a usage counter'''
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--guids', type=str, nargs='+', help='Node guids to recount')
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue a celery task per node instead of recounting inline',
+        )
+
+    def handle(self, *args, **options):
+        reconcile_storage_usage(guids=options.get('guids'), run_async=options['run_async'])
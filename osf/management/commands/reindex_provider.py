@@ -2,24 +2,32 @@
 import logging
 
 from django.core.management.base import BaseCommand
+from osf.management.commands.recatalog_metadata import RecatalogCheckpoint, recatalog
 from osf.models import AbstractProvider, AbstractNode, Preprint
 from api.share.utils import update_share
+from website import settings
 
 logger = logging.getLogger(__name__)
 
 
-def reindex_provider(provider):
+def reindex_provider(provider, bulk=False, checkpoint=None, chunk_size=500):
     preprints = Preprint.objects.filter(provider=provider)
     if preprints:
         logger.info(f'Sending {provider.preprints.count()} preprints to SHARE...')
-        for preprint in preprints:
-            update_share(preprint)
+        if bulk:
+            recatalog(preprints, 0, int(9e9), chunk_size, bulk=True, checkpoint=checkpoint)
+        else:
+            for preprint in preprints:
+                update_share(preprint)
 
     nodes = AbstractNode.objects.filter(provider=provider)
     if nodes:
         logger.info(f'Sending {AbstractNode.objects.filter(provider=provider).count()} AbstractNodes to SHARE...')
-        for abstract_node in nodes:
-            update_share(abstract_node)
+        if bulk:
+            recatalog(nodes, 0, int(9e9), chunk_size, bulk=True, checkpoint=checkpoint)
+        else:
+            for abstract_node in nodes:
+                update_share(abstract_node)
 
 
 class Command(BaseCommand):
@@ -27,10 +35,27 @@ class Command(BaseCommand):
         super().add_arguments(parser)
         parser.add_argument('--providers', type=str, nargs='+', help='Provider _ids')
         parser.add_argument('--type', type=str, help='what type of provider to reindex', default=None)
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='send items in bulk from this process instead of queueing a celery task per item',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=None,
+            help='(with --bulk) json file recording progress, to resume an interrupted run',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='(with --bulk) items to send per chunk')
 
     def handle(self, *args, **options):
         provider_ids = options.get('providers', [])
         type = options.get('type', None)
+        bulk = options['bulk']
+
+        if bulk and not settings.SHARE_ENABLED:
+            logger.warning('SHARE_ENABLED is off; not sending anything')
+            return
 
         if type:
             providers = AbstractProvider.objects.filter(type__contains=type, _id__in=provider_ids)
@@ -39,4 +64,9 @@ class Command(BaseCommand):
 
         for provider in providers:
             logger.info(f'Reindexing {provider._id}...')
-            reindex_provider(provider)
+            checkpoint = (
+                RecatalogCheckpoint(options['checkpoint'], scope=provider._id)
+                if options['checkpoint']
+                else None
+            )
+            reindex_provider(provider, bulk=bulk, checkpoint=checkpoint, chunk_size=options['chunk_size'])
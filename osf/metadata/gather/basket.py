@@ -1,8 +1,13 @@
 '''a gather.Basket holds gathered metadata and coordinates gatherer actions.
 
 '''
+import collections
+import concurrent.futures
+import logging
+import time
 import typing
 
+from django import db
 import rdflib
 
 from osf.metadata import rdfutils
@@ -10,23 +15,30 @@ from .focus import Focus
 from .gatherer import get_gatherers, Gatherer
 
 
+logger = logging.getLogger(__name__)
+
+
 class Basket:
     focus: Focus                     # the thing to gather metadata from.
     gathered_metadata: rdflib.Graph  # heap of metadata already gathered.
+    gatherer_timings: dict           # seconds spent in each gatherer, by name.
+    max_workers: int                 # gatherers to run at once (1 runs them in turn).
     _gathertasks_done: set           # memory of gatherings already done.
     _known_focus_dict: dict
 
-    def __init__(self, focus: Focus):
+    def __init__(self, focus: Focus, *, max_workers: int = 1):
         assert isinstance(focus, Focus)
         self.focus = focus
+        self.max_workers = max_workers
         self.reset()  # start with an empty basket
 
     def reset(self):
         self._gathertasks_done = set()
         self._known_focus_dict = {self.focus.iri: {self.focus}}
         self.gathered_metadata = rdfutils.contextualized_graph()
+        self.gatherer_timings = collections.defaultdict(float)
 
-    def pls_gather(self, predicate_map, *, include_defaults=True):  # TODO: async
+    def pls_gather(self, predicate_map, *, include_defaults=True):
         '''go gatherers, go!
 
         @predicate_map: dict with rdflib.URIRef keys
@@ -46,6 +58,12 @@ class Basket:
                 },
             },
         })
+        ```
+
+        related foci reached by the same predicate (e.g. every file of a registration)
+        are gathered together as a batch, so each gatherer's declared `prefetch` is
+        loaded once for the whole batch (see `Focus.prefetch`) -- with `max_workers`
+        above 1, the gatherers for a batch run concurrently.
         '''
         self._do_gather(self.focus, predicate_map, include_defaults=include_defaults)
 
@@ -98,39 +116,91 @@ class Basket:
             raise ValueError(f'expected `iri_or_focus` to be Focus or URIRef (got {iri_or_focus})')
 
     def _do_gather(self, focus, predicate_map, *, include_defaults=True):
-        if include_defaults:
-            self._add_focus_reference(focus)
+        self._do_gather_batch([focus], predicate_map, include_defaults=include_defaults)
+
+    def _do_gather_batch(self, foci, predicate_map, *, include_defaults=True):
         if not isinstance(predicate_map, dict):
             # allow iterable of predicates with no deeper paths
             predicate_map = {
                 predicate_iri: None
                 for predicate_iri in predicate_map
             }
-        for gatherer in get_gatherers(
-            focus.rdftype,
-            predicate_map.keys(),
-            include_focustype_defaults=include_defaults,
-        ):
-            for (subj, pred, obj) in self._do_a_gathertask(gatherer, focus):
+        foci_by_gatherer = {}
+        for focus in foci:
+            if include_defaults:
+                self._add_focus_reference(focus)
+            for gatherer in get_gatherers(
+                focus.rdftype,
+                predicate_map.keys(),
+                include_focustype_defaults=include_defaults,
+            ):
+                if (gatherer, focus) not in self._gathertasks_done:
+                    self._gathertasks_done.add((gatherer, focus))  # eager
+                    foci_by_gatherer.setdefault(gatherer, []).append(focus)
+        if not foci_by_gatherer:
+            return
+        if len(foci) > 1:
+            self._prefetch(foci_by_gatherer)
+        next_foci_by_predicate = {}
+        for focus, gathered_triples in self._run_gatherers(foci_by_gatherer):
+            for (subj, pred, obj) in gathered_triples:
                 if isinstance(obj, Focus):
                     self._add_focus_reference(obj)
                     self.gathered_metadata.add((subj, pred, obj.iri))
-                    if subj == focus.iri:
-                        next_steps = predicate_map.get(pred, None)
-                        if next_steps:
-                            self._do_gather(
-                                focus=obj,
-                                predicate_map=next_steps,
-                            )
+                    if subj == focus.iri and predicate_map.get(pred, None):
+                        next_foci_by_predicate.setdefault(pred, {})[obj] = None  # ordered set
                 else:
                     self.gathered_metadata.add((subj, pred, obj))
+        for pred, next_foci in next_foci_by_predicate.items():
+            self._do_gather_batch(list(next_foci), predicate_map[pred])
 
-    def _do_a_gathertask(self, gatherer: Gatherer, focus: Focus):
-        '''invoke gatherer with the given focus, but only if it hasn't already been done
+    def _prefetch(self, foci_by_gatherer):
+        '''let each kind of focus load what its gatherers declared they need, all at once
+        '''
+        for gatherer, foci in foci_by_gatherer.items():
+            _lookups = getattr(gatherer, 'prefetch', ())
+            if not _lookups:
+                continue
+            _foci_by_type = {}
+            for focus in foci:
+                _foci_by_type.setdefault(type(focus), []).append(focus)
+            for focus_type, typed_foci in _foci_by_type.items():
+                focus_type.prefetch(typed_foci, _lookups)
+
+    def _run_gatherers(self, foci_by_gatherer):
+        '''run each gatherer on its foci, yielding (focus, gathered triples) in a stable order
         '''
-        if (gatherer, focus) not in self._gathertasks_done:
-            self._gathertasks_done.add((gatherer, focus))  # eager
-            yield from gatherer(focus)
+        if self.max_workers > 1 and len(foci_by_gatherer) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._run_gatherer_in_thread, gatherer, foci)
+                    for gatherer, foci in foci_by_gatherer.items()
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [
+                self._run_gatherer(gatherer, foci)
+                for gatherer, foci in foci_by_gatherer.items()
+            ]
+        for gatherer, elapsed, gathered in results:
+            self.gatherer_timings[gatherer.__name__] += elapsed
+            logger.debug('%s gathered for %s foci in %.3fs', gatherer.__name__, len(gathered), elapsed)
+            yield from gathered
+
+    def _run_gatherer(self, gatherer: Gatherer, foci):
+        _start = time.perf_counter()
+        gathered = [
+            (focus, list(gatherer(focus)))
+            for focus in foci
+        ]
+        return gatherer, time.perf_counter() - _start, gathered
+
+    def _run_gatherer_in_thread(self, gatherer: Gatherer, foci):
+        try:
+            return self._run_gatherer(gatherer, foci)
+        finally:
+            # each thread gets its own database connection; don't leave it open
+            db.connections.close_all()
 
     def _add_focus_reference(self, focus: Focus):
         (
@@ -33,5 +33,12 @@ class Focus:
     def __str__(self):
         return repr(self)
 
+    @classmethod
+    def prefetch(cls, foci: typing.Iterable['Focus'], lookups: typing.Iterable[str]):
+        '''hook for subclasses to load, for many foci at once, the related data
+        named by gatherers' `prefetch` (no-op by default)
+        '''
+        pass
+
     def reference_triples(self) -> typing.Iterable[tuple[Node, Node, Node]]:
         yield self.iri, rdfutils.RDF.type, self.rdftype
@@ -24,7 +24,7 @@ GathererRegistry = dict[             # outer dict maps
 __gatherer_registry: GathererRegistry = {}
 
 
-def gatherer(*predicate_iris, focustype_iris=None):
+def gatherer(*predicate_iris, focustype_iris=None, prefetch=()):
     """decorator to register metadata gatherer functions
 
     for example:
@@ -35,9 +35,13 @@ def gatherer(*predicate_iris, focustype_iris=None):
         def gather_language(focus: gather.Focus):
             yield (DCTERMS.language, getattr(focus.dbmodel, 'language'))
         ```
+
+    @prefetch: names of related data the gatherer will use, for the focus type
+               to load at once when a batch of foci is gathered (see `Focus.prefetch`)
     """
     def _decorator(gatherer: Gatherer):
         tidy_gatherer = _make_gatherer_tidy(gatherer)
+        tidy_gatherer.prefetch = frozenset(prefetch)
         add_gatherer(tidy_gatherer, predicate_iris, focustype_iris)
         return tidy_gatherer
     return _decorator
@@ -2,6 +2,7 @@
 '''
 import datetime
 import enum
+import functools
 import logging
 
 from django.contrib.contenttypes.models import ContentType
@@ -61,7 +62,7 @@ def pls_get_magic_metadata_basket(osf_item) -> gather.Basket:
     @osf_item: the thing (an instance of osf.models.base.GuidMixin or a 5-ish character osf:id string)
     '''
     focus = OsfFocus(osf_item)
-    return gather.Basket(focus)
+    return gather.Basket(focus, max_workers=website_settings.METADATA_GATHER_MAX_WORKERS)
 
 
 ##### END "public" api #####
@@ -323,6 +324,10 @@ class OsfmapPartition(enum.Enum):
 ##### END osfmap #####
 
 
+# name for gatherers to `prefetch` the focus's GuidMetadataRecord
+GUID_METADATA_RECORD = 'guid_metadata_record'
+
+
 class OsfFocus(gather.Focus):
     def __init__(self, osf_item):
         if isinstance(osf_item, str):
@@ -333,16 +338,66 @@ class OsfFocus(gather.Focus):
             provider_id=osf_item.provider._id if (osf_item and getattr(osf_item, 'type', '') == 'osf.registration' and osf_item.provider) else None
         )
         self.dbmodel = osf_item
+
+    @functools.cached_property
+    def guid_metadata_record(self):
         try:
-            self.guid_metadata_record = osfdb.GuidMetadataRecord.objects.for_guid(osf_item)
+            return osfdb.GuidMetadataRecord.objects.for_guid(self.dbmodel)
         except osfdb.base.InvalidGuid:
-            pass  # is ok for a focus to be something non-osfguidy
+            # is ok for a focus to be something non-osfguidy
+            raise AttributeError(f'no guid_metadata_record for {self}')
+
+    @classmethod
+    def prefetch(cls, foci, lookups):
+        '''prefetch_related for the foci's database models (plus GUID_METADATA_RECORD),
+        skipping lookups that don't apply to a model
+        '''
+        _lookups = set(lookups)
+        _with_metadata_records = (GUID_METADATA_RECORD in _lookups)
+        if _with_metadata_records:
+            _lookups.discard(GUID_METADATA_RECORD)
+            _lookups.add('guids')
+        _dbmodels_by_class = {}
+        for _focus in foci:
+            _dbmodels_by_class.setdefault(type(_focus.dbmodel), []).append(_focus.dbmodel)
+        for _model_cls, _dbmodels in _dbmodels_by_class.items():
+            _model_lookups = [
+                _lookup
+                for _lookup in _lookups
+                if hasattr(_model_cls, _lookup.split('__')[0])
+            ]
+            if _model_lookups:
+                db.models.prefetch_related_objects(_dbmodels, *_model_lookups)
+        if _with_metadata_records:
+            cls._prefetch_guid_metadata_records(foci)
+
+    @staticmethod
+    def _prefetch_guid_metadata_records(foci):
+        _guid_by_focus = {}
+        for _focus in foci:
+            if GUID_METADATA_RECORD in _focus.__dict__:
+                continue  # already loaded
+            try:
+                _guid_by_focus[_focus] = osfdb.base.coerce_guid(_focus.dbmodel)
+            except osfdb.base.InvalidGuid:
+                continue  # leave it to `guid_metadata_record`
+        _records_by_guid_id = {
+            _record.guid_id: _record
+            for _record in osfdb.GuidMetadataRecord.objects.filter(
+                guid__in=[_guid.id for _guid in _guid_by_focus.values()],
+            )
+        }
+        for _focus, _guid in _guid_by_focus.items():
+            _focus.__dict__[GUID_METADATA_RECORD] = (
+                _records_by_guid_id.get(_guid.id)
+                or osfdb.GuidMetadataRecord(guid=_guid)  # new, unsaved
+            )
 
 
 ##### BEGIN the gatherers #####
 #
 
-@gather.er(DCTERMS.identifier, rdflib.OWL.sameAs)
+@gather.er(DCTERMS.identifier, rdflib.OWL.sameAs, prefetch=['guids'])
 def gather_identifiers(focus: gather.Focus):
     try:
         _iris = focus.dbmodel.get_semantic_iris()
@@ -355,7 +410,7 @@ def gather_identifiers(focus: gather.Focus):
             yield (DCTERMS.identifier, rdflib.Literal(_iri))
 
 
-@gather.er(DCTERMS.type)
+@gather.er(DCTERMS.type, prefetch=[GUID_METADATA_RECORD])
 def gather_flexible_types(focus):
     _type_label = None
     try:
@@ -503,7 +558,7 @@ def _rights_for_item(item):
             yield (license_id, FOAF.name, license.name)
 
 
-@gather.er(DCTERMS.title)
+@gather.er(DCTERMS.title, prefetch=[GUID_METADATA_RECORD])
 def gather_title(focus):
     yield (DCTERMS.title, _language_text(focus, getattr(focus.dbmodel, 'title', None)))
     if hasattr(focus, 'guid_metadata_record'):
@@ -526,12 +581,12 @@ def _get_language(focus):
     return None
 
 
-@gather.er(DCTERMS.language)
+@gather.er(DCTERMS.language, prefetch=[GUID_METADATA_RECORD])
 def gather_language(focus):
     yield (DCTERMS.language, _get_language(focus))
 
 
-@gather.er(DCTERMS.description)
+@gather.er(DCTERMS.description, prefetch=[GUID_METADATA_RECORD])
 def gather_description(focus):
     yield (DCTERMS.description, _language_text(focus, getattr(focus.dbmodel, 'description', None)))
     if hasattr(focus, 'guid_metadata_record'):
@@ -592,7 +647,7 @@ def _subject_scheme_triples(dbsubject, subject_ref):
     yield (_scheme_ref, DCTERMS.title, _scheme_title)
 
 
-@gather.er(focustype_iris=[OSF.File])
+@gather.er(focustype_iris=[OSF.File], prefetch=['target'])
 def gather_file_basics(focus):
     if isinstance(focus.dbmodel, osfdb.BaseFileNode):
         yield (OSF.isContainedBy, OsfFocus(focus.dbmodel.target))
@@ -603,10 +658,11 @@ def gather_file_basics(focus):
 @gather.er(
     OSF.hasFileVersion,
     focustype_iris=[OSF.File],
+    prefetch=['versions__creator', 'versions__region'],
 )
 def gather_versions(focus):
     if hasattr(focus.dbmodel, 'versions'):  # quacks like BaseFileNode
-        last_fileversion = focus.dbmodel.versions.last()  # just the last version, for now
+        last_fileversion = _last_fileversion(focus.dbmodel)  # just the last version, for now
         if last_fileversion is not None:  # quacks like OsfStorageFileNode
             fileversion_iri = rdflib.URIRef(
                 f'{focus.iri}?revision={last_fileversion.identifier}'
@@ -623,6 +679,13 @@ def gather_versions(focus):
                         yield (blankversion, DCTERMS.requires, checksum_iri(checksum_algorithm, checksum_value))
 
 
+def _last_fileversion(file):
+    if 'versions' in getattr(file, '_prefetched_objects_cache', {}):
+        _versions = file.versions.all()
+        return _versions[len(_versions) - 1] if _versions else None
+    return file.versions.last()
+
+
 def _gather_fileversion(fileversion, fileversion_iri):
     yield (fileversion_iri, RDF.type, OSF.FileVersion)
     if fileversion.creator is not None:
@@ -887,7 +950,7 @@ def gather_affiliated_institutions(focus):
         yield (institution_iri, DCTERMS.identifier, osf_institution.identifier_domain)
 
 
-@gather.er(OSF.funder, OSF.hasFunding)
+@gather.er(OSF.funder, OSF.hasFunding, prefetch=[GUID_METADATA_RECORD])
 def gather_funding(focus):
     if hasattr(focus, 'guid_metadata_record'):
         for _funding in focus.guid_metadata_record.funding_info:
@@ -1,13 +1,19 @@
+import collections
 import dataclasses
+import itertools
 
+from django.conf import settings
+from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q, F, Sum
+from django.db.models import Count, Q, F, Max, Sum
 
 from osf import models as osfdb
+from osf.models.node import NodeGroupObjectPermission
 from osf.models.spam import SpamStatus
 from addons.osfstorage.models import OsfStorageFile
 from osf.metrics.utils import YearMonth
 from osf.metrics.monthly_reports import MonthlyInstitutionalUserReport
+from osf.utils.permissions import READ_NODE
 from ._base import MonthlyReporter
 
 
@@ -17,9 +23,13 @@ class InstitutionalUsersReporter(MonthlyReporter):
     built for the institution dashboard at ://osf.example/institutions/<id>/dashboard/,
     which offers institutional admins insight into how people at their institution are
     using osf, based on their explicitly-affiliated osf objects
+
+    users are reported on in chunks of `INSTITUTIONAL_USERS_REPORT_CHUNK_SIZE`, with counts
+    for the whole chunk gathered in a few grouped queries (or one user at a time, if 0)
     '''
     def iter_report_kwargs(self, continue_after: dict | None = None):
         _before_datetime = self.yearmonth.month_end()
+        _chunk_size = settings.INSTITUTIONAL_USERS_REPORT_CHUNK_SIZE
         _inst_qs = (
             osfdb.Institution.objects
             .filter(created__lt=_before_datetime)
@@ -28,14 +38,32 @@ class InstitutionalUsersReporter(MonthlyReporter):
         if continue_after:
             _inst_qs = _inst_qs.filter(pk__gte=continue_after['institution_pk'])
         for _institution in _inst_qs:
-            _user_qs = _institution.get_institution_users().filter(created__lt=_before_datetime)
+            _user_qs = (
+                _institution.get_institution_users()
+                .filter(created__lt=_before_datetime)
+                .order_by('pk')
+            )
             if continue_after and (_institution.pk == continue_after['institution_pk']):
-                _user_qs = _user_qs.filter(pk__gt=continue_after['user_pk'])
-            for _user_pk in _user_qs.values_list('pk', flat=True):
-                yield {'institution_pk': _institution.pk, 'user_pk': _user_pk}
+                _last_user_pk = (
+                    continue_after['user_pks'][-1]
+                    if 'user_pks' in continue_after
+                    else continue_after['user_pk']
+                )
+                _user_qs = _user_qs.filter(pk__gt=_last_user_pk)
+            _user_pks = _user_qs.values_list('pk', flat=True).iterator()
+            if not _chunk_size:
+                for _user_pk in _user_pks:
+                    yield {'institution_pk': _institution.pk, 'user_pk': _user_pk}
+                continue
+            while _chunk := list(itertools.islice(_user_pks, _chunk_size)):
+                yield {'institution_pk': _institution.pk, 'user_pks': _chunk}
 
     def report(self, **report_kwargs):
         _institution = osfdb.Institution.objects.get(pk=report_kwargs['institution_pk'])
+        if 'user_pks' in report_kwargs:
+            _bulk_helper = _InstiUsersBulkReportHelper(_institution, report_kwargs['user_pks'], self.yearmonth)
+            yield from _bulk_helper.build_reports()
+            return
         _user = osfdb.OSFUser.objects.get(pk=report_kwargs['user_pk'])
         _helper = _InstiUserReportHelper(_institution, _user, self.yearmonth)
         yield _helper.build_report()
@@ -189,3 +217,197 @@ class _InstiUserReportHelper:
             return YearMonth.from_date(latest_activity_date)
         else:
             return None
+
+
+@dataclasses.dataclass
+class _InstiUsersBulkReportHelper:
+    '''builds the same reports as `_InstiUserReportHelper` for many users at once,
+    with each count gathered for all the users in one grouped query
+    '''
+    institution: osfdb.Institution
+    user_pks: list[int]
+    yearmonth: YearMonth
+
+    @property
+    def before_datetime(self):
+        return self.yearmonth.month_end()
+
+    def build_reports(self):
+        _affiliations = dict(
+            osfdb.InstitutionAffiliation.objects
+            .filter(institution=self.institution, user_id__in=self.user_pks)
+            .values_list('user_id', 'sso_department')
+        )
+        _node_counts, _public_node_ids = self._node_counts()
+        _preprint_ids = self._published_preprint_ids()
+        _node_files = self._file_counts(osfdb.AbstractNode, set(itertools.chain.from_iterable(_public_node_ids.values())))
+        _preprint_files = self._file_counts(osfdb.Preprint, set(itertools.chain.from_iterable(_preprint_ids.values())))
+        _last_active = self._last_active()
+        for _user in osfdb.OSFUser.objects.filter(pk__in=self.user_pks).order_by('pk'):
+            _counts = _node_counts.get(_user.pk, {})
+            _file_counts = [
+                _node_files.get(_node_id, (0, 0))
+                for _node_id in _public_node_ids.get(_user.pk, ())
+            ] + [
+                _preprint_files.get(_preprint_id, (0, 0))
+                for _preprint_id in _preprint_ids.get(_user.pk, ())
+            ]
+            yield MonthlyInstitutionalUserReport(
+                report_yearmonth=self.yearmonth,
+                institution_id=self.institution._id,
+                user_id=_user._id,
+                user_name=_user.fullname,
+                department_name=(_affiliations.get(_user.pk) or None),
+                month_last_login=(
+                    YearMonth.from_date(_user.date_last_login)
+                    if _user.date_last_login is not None
+                    else None
+                ),
+                month_last_active=(
+                    YearMonth.from_date(_last_active[_user.pk])
+                    if _user.pk in _last_active
+                    else None
+                ),
+                account_creation_date=YearMonth.from_date(_user.created),
+                orcid_id=_user.get_verified_external_id('ORCID', verified_only=True),
+                public_project_count=_counts.get('public_project_count', 0),
+                private_project_count=_counts.get('private_project_count', 0),
+                public_registration_count=_counts.get('public_registration_count', 0),
+                embargoed_registration_count=_counts.get('embargoed_registration_count', 0),
+                public_file_count=sum(_file_count for _file_count, _ in _file_counts),
+                published_preprint_count=len(_preprint_ids.get(_user.pk, ())),
+                storage_byte_count=sum(_byte_count for _, _byte_count in _file_counts),
+            )
+
+    def _readable_node_permissions(self):
+        '''(user, node) pairs for the institution's nodes the users can read,
+        as in `AbstractNodeQuerySet.get_nodes_for_user`
+        '''
+        _institution_node_qs = self.institution.nodes.filter(
+            created__lt=self.before_datetime,
+            is_deleted=False,
+        ).exclude(spam_status=SpamStatus.SPAM)
+        return (
+            NodeGroupObjectPermission.objects
+            .filter(
+                permission_id=Permission.objects.get(codename=READ_NODE).id,
+                content_object_id__in=_institution_node_qs.values('pk'),
+                group__user__id__in=self.user_pks,
+            )
+        )
+
+    def _node_counts(self):
+        '''returns per-user project and registration counts,
+        and the ids of the public nodes each user can read (for counting files)
+        '''
+        _root_q = Q(content_object__root_id=F('content_object_id'))  # only root nodes
+        _project_q = _root_q & Q(content_object__type='osf.node')  # `type` field from TypedModel
+        _registration_q = _root_q & Q(content_object__type='osf.registration')
+        _public_q = Q(content_object__is_public=True)
+        _rows = (
+            self._readable_node_permissions()
+            .values('group__user__id')
+            .annotate(
+                public_project_count=Count('content_object_id', filter=_project_q & _public_q, distinct=True),
+                private_project_count=Count('content_object_id', filter=_project_q & ~_public_q, distinct=True),
+                public_registration_count=Count('content_object_id', filter=_registration_q & _public_q, distinct=True),
+                embargoed_registration_count=Count(
+                    'content_object_id',
+                    filter=(
+                        _registration_q
+                        & ~_public_q
+                        & Q(content_object__embargo__end_date__gte=self.before_datetime)
+                    ),
+                    distinct=True,
+                ),
+            )
+            .order_by()
+        )
+        _counts = {_row.pop('group__user__id'): _row for _row in _rows}
+        _public_node_ids = collections.defaultdict(set)
+        _pairs = (
+            self._readable_node_permissions()
+            .filter(content_object__is_public=True)
+            .values_list('group__user__id', 'content_object_id')
+            .distinct()
+        )
+        for _user_pk, _node_pk in _pairs:
+            _public_node_ids[_user_pk].add(_node_pk)
+        return _counts, _public_node_ids
+
+    def _published_preprint_ids(self):
+        _preprint_qs = (
+            osfdb.Preprint.objects.can_view()  # published/publicly-viewable
+            .filter(
+                affiliated_institutions=self.institution,
+                date_published__lt=self.before_datetime,
+            )
+            .exclude(spam_status=SpamStatus.SPAM)
+        )
+        _preprint_ids = collections.defaultdict(set)
+        _pairs = (
+            osfdb.PreprintContributor.objects
+            .filter(user_id__in=self.user_pks, preprint_id__in=_preprint_qs.values('pk'))
+            .values_list('user_id', 'preprint_id')
+        )
+        for _user_pk, _preprint_pk in _pairs:
+            _preprint_ids[_user_pk].add(_preprint_pk)
+        return _preprint_ids
+
+    def _file_counts(self, target_model, target_ids):
+        '''returns a dict of target id -> (public osfstorage file count, storage bytes)'''
+        if not target_ids:
+            return {}
+        _content_type = ContentType.objects.get_for_model(target_model)
+        _file_counts = (
+            OsfStorageFile.objects
+            .filter(
+                target_content_type=_content_type,
+                target_object_id__in=target_ids,
+                created__lt=self.before_datetime,
+                deleted__isnull=True,
+                purged__isnull=True,
+            )
+            .values('target_object_id')
+            .annotate(file_count=Count('id'))
+            .order_by()
+            .values_list('target_object_id', 'file_count')
+        )
+        _byte_counts = dict(
+            osfdb.FileVersion.objects
+            .filter(
+                size__gt=0,
+                created__lt=self.before_datetime,
+                purged__isnull=True,
+                basefilenode__type=OsfStorageFile._typedmodels_type,
+                basefilenode__target_content_type=_content_type,
+                basefilenode__target_object_id__in=target_ids,
+                basefilenode__created__lt=self.before_datetime,
+                basefilenode__deleted__isnull=True,
+                basefilenode__purged__isnull=True,
+            )
+            .values('basefilenode__target_object_id')
+            .annotate(storage_bytes=Sum('size'))
+            .order_by()
+            .values_list('basefilenode__target_object_id', 'storage_bytes')
+        )
+        return {
+            _target_id: (_file_count, _byte_counts.get(_target_id, 0))
+            for _target_id, _file_count in _file_counts
+        }
+
+    def _last_active(self):
+        _last_active = {}
+        for _log_model in (osfdb.NodeLog, osfdb.PreprintLog):
+            _rows = (
+                _log_model.objects
+                .filter(user_id__in=self.user_pks, created__lt=self.before_datetime)
+                .values('user_id')
+                .annotate(last_created=Max('created'))
+                .order_by()
+                .values_list('user_id', 'last_created')
+            )
+            for _user_pk, _last_created in _rows:
+                if _user_pk not in _last_active or _last_created > _last_active[_user_pk]:
+                    _last_active[_user_pk] = _last_created
+        return _last_active
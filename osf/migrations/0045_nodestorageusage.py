@@ -0,0 +1,29 @@
+# Generated by Django 4.2.26 on 2026-10-18 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0044_notification_scheduled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeStorageUsage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('total', models.BigIntegerField(default=0)),
+                ('reconciled', models.DateTimeField(blank=True, null=True)),
+                ('node', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='storage_usage_counter', to='osf.abstractnode')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
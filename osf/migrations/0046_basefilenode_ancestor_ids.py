@@ -0,0 +1,27 @@
+# Generated by Django 4.2.26 on 2026-10-18 11:02
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('osf', '0045_nodestorageusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='basefilenode',
+            name='_ancestor_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, null=True, size=None),
+        ),
+        AddIndexConcurrently(
+            model_name='basefilenode',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['_ancestor_ids'], name='osf_basefilenode_ancestors'),
+        ),
+    ]
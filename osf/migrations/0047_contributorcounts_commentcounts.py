@@ -0,0 +1,46 @@
+# Generated by Django 4.2.26 on 2026-10-18 12:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('osf', '0046_basefilenode_ancestor_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContributorCounts',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('object_id', models.PositiveIntegerField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('bibliographic', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CommentCounts',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('last_activity', osf.utils.fields.NonNaiveDateTimeField(blank=True, null=True)),
+                ('root_target', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='comment_counts', to='osf.guid')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
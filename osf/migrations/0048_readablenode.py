@@ -0,0 +1,27 @@
+# Generated by Django 4.2.26 on 2026-10-18 13:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0047_contributorcounts_commentcounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadableNode',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField(choices=[(0, 'implicit read'), (1, 'read'), (2, 'write'), (3, 'admin')])),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readers', to='osf.abstractnode')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readable_nodes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'node')},
+            },
+        ),
+    ]
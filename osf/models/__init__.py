@@ -34,6 +34,7 @@ from .contributor import (
     PreprintContributor,
     RecentlyAddedContributor,
 )
+from .counters import CommentCounts, ContributorCounts
 from .draft_node import DraftNode
 from .dismissed_alerts import DismissedAlert
 from .external import ExternalAccount, ExternalProvider
@@ -92,6 +93,7 @@ from .registrations import (
 )
 from .registration_bulk_upload_job import RegistrationBulkUploadJob
 from .registration_bulk_upload_row import RegistrationBulkUploadRow
+from .readable_nodes import ReadableNode
 from .request import NodeRequest, PreprintRequest
 from .sanctions import (
     Embargo,
@@ -105,6 +107,7 @@ from .schema_response_block import SchemaResponseBlock
 from .session import UserSessionMap
 from .spam import SpamStatus, SpamMixin
 from .storage import ProviderAssetFile, InstitutionAssetFile
+from .storage_usage import NodeStorageUsage
 from .subject import Subject
 from .tag import Tag
 from .user import (
@@ -5,17 +5,19 @@ import random
 import bson
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import MultipleObjectsReturned
+from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import connections, models
 from django.db.models import ForeignKey, UniqueConstraint
 from django.db.models.query import QuerySet
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django_extensions.db.models import TimeStampedModel
 
 from framework import sentry
 from osf.exceptions import ValidationError
+from osf.models import guid_cache
+from osf.models.guid_cache import GuidResolution
 from osf.utils.caching import cached_property
 from osf.utils.fields import LowercaseCharField, NonNaiveDateTimeField
 from website import settings as website_settings
@@ -242,9 +244,15 @@ class Guid(BaseModel):
         if not data:
             return None
         base_guid_str, version = cls.split_guid(data)
+        if not select_for_update:
+            resolution = guid_cache.get(base_guid_str)
+            if resolution is not None:
+                return cls._from_resolution(resolution)
         try:
             if not select_for_update:
-                return cls.objects.get(_id=base_guid_str)
+                guid = cls.objects.get(_id=base_guid_str)
+                guid_cache.remember({base_guid_str: GuidResolution.from_guid(guid)})
+                return guid
             return cls.objects.filter(_id=base_guid_str).select_for_update().get()
         except cls.DoesNotExist:
             if not skip_log_not_found:
@@ -252,12 +260,58 @@ class Guid(BaseModel):
                              f'[data={data}, base_guid={base_guid_str}, version={version}]')
             return None
 
+    @classmethod
+    def _from_resolution(cls, resolution):
+        guid = cls(
+            id=resolution.id,
+            _id=resolution._id,
+            content_type_id=resolution.content_type_id,
+            object_id=resolution.object_id,
+            created=resolution.created,
+        )
+        guid._state.adding = False
+        guid._state.db = 'default'
+        return guid
+
+    @classmethod
+    def load_many(cls, guid_strs):
+        """Bulk version of `load`: return a dict of guid str -> Guid for those of `guid_strs` that exist"""
+        base_guid_strs = {guid_str: cls.split_guid(guid_str)[0] for guid_str in guid_strs if guid_str}
+        resolutions = guid_cache.get_many(set(base_guid_strs.values()))
+        missing = set(base_guid_strs.values()) - set(resolutions)
+        if missing:
+            loaded = {guid._id: GuidResolution.from_guid(guid) for guid in cls.objects.filter(_id__in=missing)}
+            guid_cache.remember(loaded)
+            resolutions.update(loaded)
+        return {
+            guid_str: cls._from_resolution(resolutions[base_guid_str])
+            for guid_str, base_guid_str in base_guid_strs.items()
+            if base_guid_str in resolutions
+        }
+
+    @staticmethod
+    def _load_resolved_referent(guid_str, resolution):
+        try:
+            content_type = ContentType.objects.get_for_id(resolution.content_type_id)
+            return content_type.get_object_for_this_type(pk=resolution.object_id)
+        except ObjectDoesNotExist:
+            # The referent went away without its guid being touched
+            guid_cache.invalidate([guid_str])
+            return None
+
     @classmethod
     def load_referent(cls, guid_str):
         """Find and return the referent from a given guid str.
         """
         if not guid_str:
             return None, None
+        resolution = guid_cache.get(guid_str)
+        if resolution is not None:
+            referent = cls._load_resolved_referent(guid_str, resolution)
+            if referent is not None:
+                if resolution.version is not None:
+                    return referent, resolution.version
+                return referent, getattr(referent, 'version', None)
         base_guid_str, version = cls.split_guid(guid_str)
         base_guid_obj = cls.load(base_guid_str)
         if not base_guid_obj:
@@ -272,12 +326,25 @@ class Guid(BaseModel):
             else:
                 sentry.log_message(f'The guid object does not support versioning: [guid={base_guid_str}, version={version}]')
                 return None, None
-            referent = versioned_obj_qs.first().referent
+            versioned_guid = versioned_obj_qs.first()
+            referent = versioned_guid.referent
+            guid_cache.remember({
+                guid_str: GuidResolution(
+                    base_guid_obj.id,
+                    base_guid_obj._id,
+                    versioned_guid.content_type_id,
+                    versioned_guid.object_id,
+                    base_guid_obj.created,
+                    versioned_guid.version,
+                ),
+            })
             return referent, referent.version
         # Handles guid str without version
         referent = base_guid_obj.referent
         # If the guid str doesn't have version but supports versioning, we need to check and return the version
         version = referent.version if hasattr(referent, 'version') else None
+        if version is not None:
+            guid_cache.remember({base_guid_str: GuidResolution.from_guid(base_guid_obj, version)})
         return referent, version
 
     @property
@@ -469,11 +536,20 @@ class GuidMixin(BaseIDMixin):
 
     @cached_property
     def _id(self):
+        content_type_id = None
+        if self.pk and 'guids' not in getattr(self, '_prefetched_objects_cache', {}) and guid_cache.is_enabled():
+            # Another instance of this object may have looked its guid up already
+            content_type_id = ContentType.objects.get_for_model(self).id
+            guid_str = guid_cache.get_primary_guid(content_type_id, self.pk)
+            if guid_str:
+                return guid_str
         try:
             guid = self.guids.first()
         except IndexError:
             return None
         if guid:
+            if content_type_id:
+                guid_cache.remember_primary_guid(content_type_id, self.pk, guid._id)
             return guid._id
         return None
 
@@ -499,13 +575,64 @@ class GuidMixin(BaseIDMixin):
         # Minor optimization--no need to query if q is None or ''
         if not q:
             return None
+        if not select_for_update:
+            obj = cls._load_resolved(q)
+            if obj is not None:
+                return obj
         try:
             # guids___id__isnull=False forces an INNER JOIN
             if select_for_update:
                 return cls.objects.filter(guids___id__isnull=False, guids___id=q).select_for_update()[:1].get()
-            return cls.objects.filter(guids___id__isnull=False, guids___id=q)[:1].get()
+            obj = cls.objects.filter(guids___id__isnull=False, guids___id=q)[:1].get()
         except cls.DoesNotExist:
             return None
+        cls._remember_guids(obj)
+        return obj
+
+    @classmethod
+    def load_many(cls, guid_strs):
+        """Bulk version of `load` for list views and tasks: return a dict of guid str -> object
+        for those of `guid_strs` that refer to an object of this class, using at most three queries.
+        """
+        content_type_id = ContentType.objects.get_for_model(cls).id
+        resolutions = {
+            guid_str: resolution
+            for guid_str, resolution in guid_cache.get_many({guid_str for guid_str in guid_strs if guid_str}).items()
+            if resolution.content_type_id == content_type_id
+        }
+        missing = {guid_str.lower(): guid_str for guid_str in guid_strs if guid_str and guid_str not in resolutions}
+        if missing:
+            loaded = {
+                missing[guid._id]: GuidResolution.from_guid(guid)
+                for guid in Guid.objects.filter(_id__in=missing, content_type_id=content_type_id)
+            }
+            guid_cache.remember(loaded)
+            resolutions.update(loaded)
+        objects = cls.objects.in_bulk({resolution.object_id for resolution in resolutions.values()})
+        for obj in objects.values():
+            cls._remember_guids(obj)
+        return {
+            guid_str: objects[resolution.object_id]
+            for guid_str, resolution in resolutions.items()
+            if resolution.object_id in objects
+        }
+
+    @classmethod
+    def _load_resolved(cls, guid_str):
+        resolution = guid_cache.get(guid_str)
+        if resolution is None or resolution.content_type_id != ContentType.objects.get_for_model(cls).id:
+            return None
+        return next(iter(cls.objects.filter(pk=resolution.object_id)[:1]), None)
+
+    @classmethod
+    def _remember_guids(cls, obj):
+        """Cache the resolutions of the guids prefetched on `obj`"""
+        guids = getattr(obj, '_prefetched_objects_cache', {}).get('guids')
+        if guids is None:
+            return
+        guid_cache.remember({guid._id: GuidResolution.from_guid(guid) for guid in guids})
+        if guids and not isinstance(obj, VersionedGuidMixin):
+            guid_cache.remember_primary_guid(guids[0].content_type_id, obj.pk, obj._id)
 
     @property
     def deep_url(self):
@@ -546,20 +673,17 @@ class VersionedGuidMixin(GuidMixin):
 
     @cached_property
     def _id(self):
-        try:
-            versioned_guid = self.versioned_guids
-            if not versioned_guid.exists():
-                # This can happen during the gap AFTER preprint version is created and BEFORE versioned guid is created.
-                # This happens every time recursively inside `.super().save()` when the `preprint.save()` is called for
-                # the first time during preprint creation and new preprint version creation.
-                sentry.log_message(
-                    f'`self.versioned_guids` does not exist: [self={self.pk}, type={type(self).__name__}]'
-                )
-                return None
-            _current_versioned_guid = versioned_guid.first()
-        except IndexError as e:
-            sentry.log_exception(e)
+        _current_versioned_guid = self.versioned_guids.select_related('guid').first()
+        if _current_versioned_guid is None:
+            # This can happen during the gap AFTER preprint version is created and BEFORE versioned guid is created.
+            # This happens every time recursively inside `.super().save()` when the `preprint.save()` is called for
+            # the first time during preprint creation and new preprint version creation.
+            sentry.log_message(
+                f'`self.versioned_guids` does not exist: [self={self.pk}, type={type(self).__name__}]'
+            )
             return None
+        # The same row backs `version`
+        self._version_cache = _current_versioned_guid.version
         return _current_versioned_guid.versioned_osfid()
 
     @_id.setter
@@ -582,6 +706,10 @@ class VersionedGuidMixin(GuidMixin):
         """
         if not guid_str:
             return None
+        if not select_for_update:
+            obj = cls._load_resolved(guid_str)
+            if obj is not None:
+                return obj
         try:
             base_guid_str, version = Guid.split_guid(guid_str)
             # Version exists
@@ -662,3 +790,24 @@ def ensure_guid(sender, instance, **kwargs):
         _id=generate_guid(instance.__guid_min_length__)
     )
     return True
+
+
+@receiver(pre_save, sender=Guid)
+def remember_previous_referent(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_referent = Guid.objects.filter(pk=instance.pk).values_list('content_type_id', 'object_id').first()
+
+
+@receiver(post_save, sender=Guid)
+@receiver(post_delete, sender=Guid)
+def invalidate_guid_resolution(sender, instance, **kwargs):
+    referents = [(instance.content_type_id, instance.object_id)]
+    if getattr(instance, '_previous_referent', None):
+        referents.append(instance._previous_referent)
+    guid_cache.invalidate([instance._id], referents)
+
+
+@receiver(post_save, sender=GuidVersionsThrough)
+@receiver(post_delete, sender=GuidVersionsThrough)
+def invalidate_versioned_guid_resolution(sender, instance, **kwargs):
+    guid_cache.invalidate([instance.versioned_osfid()])
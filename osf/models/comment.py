@@ -5,6 +5,7 @@ from django.utils import timezone
 from .node import Node
 from .nodelog import NodeLog
 from .base import GuidMixin, Guid, BaseModel
+from .counters import CommentCounts
 from .mixins import CommentableMixin
 from .spam import SpamMixin
 from .validators import CommentMaxLength, string_required
@@ -125,6 +126,12 @@ class Comment(GuidMixin, SpamMixin, CommentableMixin, BaseModel):
             if not view_timestamp.tzinfo:
                 view_timestamp = view_timestamp.replace(tzinfo=pytz.utc)
 
+            if root_target is not None:
+                # Nothing can be unread if no comment was added or edited since the user last looked
+                counts = CommentCounts.get_for(root_target)
+                if not counts.total or counts.last_activity <= view_timestamp:
+                    return 0
+
             return cls.objects.filter(
                 Q(node=node) & ~Q(user=user) & Q(is_deleted=False) &
                 (Q(created__gt=view_timestamp) | Q(modified__gt=view_timestamp)) &
@@ -0,0 +1,129 @@
+"""Denormalized counts that would otherwise take a COUNT(*) on every page of a list.
+
+`ContributorCounts` holds the number of contributors and bibliographic contributors of a node,
+preprint or draft registration, and `CommentCounts` the number of live comments on a root
+target along with when one was last added or edited. Both are recounted, under a row lock, in
+the transaction that changes what they count: by the receivers at the bottom of this module
+when contributors and comments are saved or deleted, and explicitly by code that changes them
+with `QuerySet.update` or `bulk_create`. Rows are created the first time they're needed.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from osf.utils.fields import NonNaiveDateTimeField
+from .base import BaseModel, Guid
+from .contributor import Contributor, DraftRegistrationContributor, PreprintContributor
+
+# The field pointing each contributor class at its resource
+CONTRIBUTOR_RESOURCE_FIELDS = {
+    Contributor: 'node',
+    PreprintContributor: 'preprint',
+    DraftRegistrationContributor: 'draft_registration',
+}
+
+
+class ContributorCounts(BaseModel):
+    """Contributor counts of a node, preprint or draft registration."""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    total = models.PositiveIntegerField(default=0)
+    bibliographic = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __unicode__(self):
+        return f'{self.content_type_id}/{self.object_id}: {self.bibliographic}/{self.total}'
+
+    @classmethod
+    def get_for(cls, resource):
+        counts = cls.objects.filter(
+            content_type=ContentType.objects.get_for_model(resource),
+            object_id=resource.id,
+        ).first()
+        return counts or cls.recount(resource.contributor_class, resource.id)
+
+    @classmethod
+    def recount(cls, contributor_class, resource_id):
+        """Recount the contributors of the resource `resource_id` of `contributor_class`"""
+        resource_field = CONTRIBUTOR_RESOURCE_FIELDS[contributor_class]
+        resource_model = contributor_class._meta.get_field(resource_field).related_model
+        with transaction.atomic():
+            # Lock the row before counting, so concurrent changes to the same resource are
+            # counted one after the other and the last count sees all of them
+            counts, _ = cls.objects.select_for_update().get_or_create(
+                content_type=ContentType.objects.get_for_model(resource_model),
+                object_id=resource_id,
+            )
+            counted = contributor_class.objects.filter(**{f'{resource_field}_id': resource_id}).aggregate(
+                total=Count('id'),
+                bibliographic=Count('id', filter=Q(visible=True)),
+            )
+            counts.total = counted['total']
+            counts.bibliographic = counted['bibliographic']
+            counts.save(update_fields=['total', 'bibliographic', 'modified'])
+        return counts
+
+
+class CommentCounts(BaseModel):
+    """Live comment count of a root target (a node, file or wiki page's guid)."""
+    root_target = models.OneToOneField(Guid, related_name='comment_counts', on_delete=models.CASCADE)
+    total = models.PositiveIntegerField(default=0)
+    # The latest creation or edit among the live comments, None if there are none
+    last_activity = NonNaiveDateTimeField(null=True, blank=True)
+
+    def __unicode__(self):
+        return f'{self.root_target_id}: {self.total}'
+
+    @classmethod
+    def get_for(cls, root_target):
+        counts = cls.objects.filter(root_target_id=root_target.id).first()
+        return counts or cls.recount(root_target.id)
+
+    @classmethod
+    def recount(cls, root_target_id, create=True):
+        """Recount the comments on `root_target_id`. With `create` False, only an existing
+        row is updated, e.g. while the root target itself may be being deleted.
+        """
+        from .comment import Comment
+        with transaction.atomic():
+            if create:
+                counts, _ = cls.objects.select_for_update().get_or_create(root_target_id=root_target_id)
+            else:
+                counts = cls.objects.select_for_update().filter(root_target_id=root_target_id).first()
+                if counts is None:
+                    return None
+            counted = Comment.objects.filter(root_target_id=root_target_id, is_deleted=False).aggregate(
+                total=Count('id'),
+                last_activity=Max(Greatest('created', 'modified')),
+            )
+            counts.total = counted['total']
+            counts.last_activity = counted['last_activity']
+            counts.save(update_fields=['total', 'last_activity', 'modified'])
+        return counts
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_save, sender=PreprintContributor)
+@receiver(post_save, sender=DraftRegistrationContributor)
+@receiver(post_delete, sender=Contributor)
+@receiver(post_delete, sender=PreprintContributor)
+@receiver(post_delete, sender=DraftRegistrationContributor)
+def recount_contributors(sender, instance, **kwargs):
+    ContributorCounts.recount(sender, getattr(instance, f'{CONTRIBUTOR_RESOURCE_FIELDS[sender]}_id'))
+
+
+@receiver(post_save, sender='osf.Comment')
+def recount_comments_on_save(sender, instance, **kwargs):
+    if instance.root_target_id:
+        CommentCounts.recount(instance.root_target_id)
+
+
+@receiver(post_delete, sender='osf.Comment')
+def recount_comments_on_delete(sender, instance, **kwargs):
+    if instance.root_target_id:
+        CommentCounts.recount(instance.root_target_id, create=False)
@@ -4,6 +4,8 @@ import os
 import requests
 from dateutil.parser import parse as parse_date
 from django.apps import apps
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models, IntegrityError
 from django.db.models import Manager
 from django.core.exceptions import ObjectDoesNotExist
@@ -101,6 +103,8 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
     name = models.TextField(blank=True)
     _path = models.TextField(blank=True, null=True)  # 1950 on prod
     _materialized_path = models.TextField(blank=True, null=True)  # 482 on staging
+    # ids of this node's ancestors, root first. Maintained by OSFStorage, see OsfStorageFileNode.save
+    _ancestor_ids = ArrayField(models.IntegerField(), blank=True, null=True)
 
     is_deleted = False
     deleted_on = NonNaiveDateTimeField(blank=True, null=True)
@@ -117,6 +121,9 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
         index_together = (
             ('target_content_type', 'target_object_id', )
         )
+        indexes = [
+            GinIndex(fields=['_ancestor_ids'], name='osf_basefilenode_ancestors'),
+        ]
 
     @property
     def history(self):
@@ -0,0 +1,122 @@
+"""Resolution of guid strings to the objects they refer to, without a query every time.
+
+A resolution is the guid row a guid string stands for along with the content type, object id
+and, when known, version of its referent. For a versioned guid string such as 'abcde_v2' the
+referent is that version, while the guid row is the base guid's.
+
+Resolutions, and the primary guid of each referent (what `GuidMixin._id` returns), are kept
+on the current request and, when `ENABLE_GUID_CACHE` is set, in the guid cache. They are
+filled in by the queries `Guid.load`, `GuidMixin.load` and friends already run, and dropped by
+the receivers in `osf.models.base` when guids are created, repointed or deleted. Code that
+repoints guids with `QuerySet.update` must call `invalidate` itself.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+
+from api.caching import settings as cache_settings
+from api.caching.utils import guid_cache
+from osf.utils.requests import get_request_cache
+from website import settings
+
+REQUEST_CACHE_ATTR = '_guid_resolutions'
+
+
+class GuidResolution(namedtuple('GuidResolution', ['id', '_id', 'content_type_id', 'object_id', 'created', 'version'])):
+    """A guid row and where it points. `version` is None when the referent isn't versioned,
+    or when its version hasn't been looked up yet.
+    """
+
+    @classmethod
+    def from_guid(cls, guid, version=None):
+        return cls(guid.id, guid._id, guid.content_type_id, guid.object_id, guid.created, version)
+
+
+def _resolution_key(guid_str):
+    return cache_settings.GUID_RESOLUTION_KEY.format(guid=guid_str.lower())
+
+
+def _primary_key(content_type_id, object_id):
+    return cache_settings.GUID_PRIMARY_KEY.format(content_type_id=content_type_id, object_id=object_id)
+
+
+def _get_many(keys):
+    """Look `keys` up on the request, then in the shared cache. Returns a dict of the keys found."""
+    found = {}
+    request_cache = get_request_cache(REQUEST_CACHE_ATTR)
+    if request_cache is not None:
+        found.update((key, request_cache[key]) for key in keys if key in request_cache)
+    missing = [key for key in keys if key not in found]
+    if missing and settings.ENABLE_GUID_CACHE:
+        shared = guid_cache.get_many(missing)
+        if request_cache is not None:
+            request_cache.update(shared)
+        found.update(shared)
+    return found
+
+
+def _set_many(values):
+    request_cache = get_request_cache(REQUEST_CACHE_ATTR)
+    if request_cache is not None:
+        request_cache.update(values)
+    if settings.ENABLE_GUID_CACHE:
+        guid_cache.set_many(values, timeout=settings.GUID_CACHE_TIMEOUT)
+
+
+def is_enabled():
+    """Whether anything would be cached here: inside a request, or with the shared cache on"""
+    return settings.ENABLE_GUID_CACHE or get_request_cache(REQUEST_CACHE_ATTR) is not None
+
+
+def get(guid_str):
+    """Return the cached GuidResolution of `guid_str`, or None"""
+    if not guid_str or not isinstance(guid_str, str):
+        return None
+    key = _resolution_key(guid_str)
+    value = _get_many([key]).get(key)
+    return GuidResolution(*value) if value is not None else None
+
+
+def get_many(guid_strs):
+    """Return a dict of guid string -> GuidResolution for those of `guid_strs` that are cached"""
+    keys = {_resolution_key(guid_str): guid_str for guid_str in guid_strs if guid_str and isinstance(guid_str, str)}
+    return {keys[key]: GuidResolution(*value) for key, value in _get_many(list(keys)).items()}
+
+
+def remember(resolutions):
+    """Cache a dict of guid string -> GuidResolution"""
+    if resolutions:
+        _set_many({_resolution_key(guid_str): tuple(resolution) for guid_str, resolution in resolutions.items()})
+
+
+def get_primary_guid(content_type_id, object_id):
+    key = _primary_key(content_type_id, object_id)
+    return _get_many([key]).get(key)
+
+
+def remember_primary_guid(content_type_id, object_id, guid_str):
+    if guid_str and object_id:
+        _set_many({_primary_key(content_type_id, object_id): guid_str})
+
+
+def invalidate(guid_strs=(), referents=()):
+    """Forget the resolutions of `guid_strs` and the primary guids of `referents`,
+    an iterable of (content type id, object id) pairs.
+    """
+    keys = {_resolution_key(guid_str) for guid_str in guid_strs if guid_str}
+    keys.update(_primary_key(*referent) for referent in referents if all(referent))
+    if not keys:
+        return
+    request_cache = get_request_cache(REQUEST_CACHE_ATTR)
+    if request_cache is not None:
+        for key in keys:
+            request_cache.pop(key, None)
+    if not settings.ENABLE_GUID_CACHE:
+        return
+
+    def delete():
+        guid_cache.delete_many(list(keys))
+    # Delete now so this process sees the change, and again on commit so that a resolution
+    # another process cached from the old rows can't outlive the transaction
+    delete()
+    transaction.on_commit(delete)
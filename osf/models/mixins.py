@@ -30,6 +30,7 @@ from osf.exceptions import (
 )
 from osf.models.notification_type import NotificationTypeEnum
 from osf.models.notification_subscription import NotificationSubscription
+from .counters import ContributorCounts
 from .node_relation import NodeRelation
 from .nodelog import NodeLog
 from .subject import Subject
@@ -1344,6 +1345,11 @@ class ContributorMixin(models.Model):
         # NOTE: _order field is generated by order_with_respect_to = 'node'
         return self._contributors.order_by(self.order_by_contributor_field)
 
+    @property
+    def contributor_counts(self):
+        """The `ContributorCounts` of this resource: `total` and `bibliographic`"""
+        return ContributorCounts.get_for(self)
+
     def is_contributor_or_group_member(self, user):
         """
         Whether the user has explicit permissions to the resource -
@@ -2089,6 +2095,7 @@ class ContributorMixin(models.Model):
             if self.guardian_object_type == 'node' and contribs.filter(is_curator=True).exists():
                 raise ValueError('Curators cannot be made bibliographic contributors')
             contribs.update(visible=True)
+            ContributorCounts.recount(self.contributor_class, self.id)
 
         elif not visible and self.contributor_class.objects.filter(**kwargs).exists():
             num_visible_kwargs = self.contributor_kwargs
@@ -2096,6 +2103,7 @@ class ContributorMixin(models.Model):
             if self.contributor_class.objects.filter(**num_visible_kwargs).count() == 1:
                 raise ValueError('Must have at least one visible contributor')
             self.contributor_class.objects.filter(**kwargs).update(visible=False)
+            ContributorCounts.recount(self.contributor_class, self.id)
         else:
             return
         message = (
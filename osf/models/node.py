@@ -1,4 +1,3 @@
-import functools
 import itertools
 import logging
 import re
@@ -37,6 +36,7 @@ from framework.sentry import log_exception
 from osf.exceptions import InvalidTagError, NodeStateError, TagNotFoundError, ValidationError
 from osf.models.notification_type import NotificationTypeEnum
 from .contributor import Contributor
+from .counters import ContributorCounts
 from .collection_submission import CollectionSubmission
 
 from .identifiers import Identifier, IdentifierMixin
@@ -46,6 +46,8 @@ from .mixins import (AddonModelMixin, CommentableMixin, Loggable, GuardianMixin,
                      NodeLinkMixin, SpamOverrideMixin, RegistrationResponseMixin,
                      EditableFieldsMixin, ShareIndexMixin)
 from .node_relation import NodeRelation
+from .readable_nodes import ReadableNode
+from .node_permissions import get_node_tree_permissions, invalidate_node_tree
 from .nodelog import NodeLog
 from .private_link import PrivateLink
 from .tag import Tag
@@ -82,9 +84,7 @@ from website.util.metrics import OsfSourceTags, CampaignSourceTags
 from website.util import api_url_for, api_v2_url, web_url_for
 from .base import BaseModel, GuidMixin, GuidMixinQuerySet, check_manually_assigned_guid
 from api.base.exceptions import Conflict
-from api.caching.tasks import update_storage_usage
-from api.caching import settings as cache_settings
-from api.caching.utils import storage_usage_cache
+from api.caching.tasks import get_storage_usage_totals
 
 logger = logging.getLogger(__name__)
 
@@ -162,26 +162,29 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
         # the current user (e.g. only `pending` nodes for moderators).
         qs = self.filter(is_public=True) if not custom_filters else self.filter(**custom_filters)
         if user is not None and not isinstance(user, AnonymousUser):
-            qs |= get_objects_for_user(user, READ_NODE, self, with_superuser=False)
-            qs |= self.extra(where=["""
-                "osf_abstractnode".id in (
-                    WITH RECURSIVE implicit_read AS (
-                        SELECT N.id as node_id
-                        FROM osf_abstractnode as N, auth_permission as P, osf_nodegroupobjectpermission as G, osf_osfuser_groups as UG
-                        WHERE P.codename = 'admin_node'
-                        AND G.permission_id = P.id
-                        AND UG.osfuser_id = %s
-                        AND G.group_id = UG.group_id
-                        AND G.content_object_id = N.id
-                        AND N.type = 'osf.node'
-                    UNION ALL
-                        SELECT "osf_noderelation"."child_id"
-                        FROM "implicit_read"
-                        LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
-                        WHERE "osf_noderelation"."is_node_link" IS FALSE
-                    ) SELECT * FROM implicit_read
-                )
-            """], params=(user.id,))
+            if settings.ENABLE_READABLE_NODES:
+                qs |= self.filter(id__in=ReadableNode.objects.filter(user_id=user.id).values('node_id'))
+            else:
+                qs |= get_objects_for_user(user, READ_NODE, self, with_superuser=False)
+                qs |= self.extra(where=["""
+                    "osf_abstractnode".id in (
+                        WITH RECURSIVE implicit_read AS (
+                            SELECT N.id as node_id
+                            FROM osf_abstractnode as N, auth_permission as P, osf_nodegroupobjectpermission as G, osf_osfuser_groups as UG
+                            WHERE P.codename = 'admin_node'
+                            AND G.permission_id = P.id
+                            AND UG.osfuser_id = %s
+                            AND G.group_id = UG.group_id
+                            AND G.content_object_id = N.id
+                            AND N.type = 'osf.node'
+                        UNION ALL
+                            SELECT "osf_noderelation"."child_id"
+                            FROM "implicit_read"
+                            LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
+                            WHERE "osf_noderelation"."is_node_link" IS FALSE
+                        ) SELECT * FROM implicit_read
+                    )
+                """], params=(user.id,))
 
         return qs.filter(is_deleted=False)
 
@@ -224,6 +227,15 @@ class AbstractNodeManager(TypedModelManager):
             raise ValueError(f'Permission must be one of {PERMISSIONS[0]}, {PERMISSIONS[1]}, or {PERMISSIONS[2]}.')
 
         nodes = base_queryset.filter(is_deleted=False)
+        if settings.ENABLE_READABLE_NODES:
+            query = Q(id__in=ReadableNode.objects.filter(
+                user_id=user.id if user else None,
+                level__gte=ReadableNode.PERMISSION_LEVELS[permission],
+            ).values('node_id'))
+            if include_public:
+                query |= Q(is_public=True)
+            return nodes.filter(query)
+
         permission_object_id = Permission.objects.get(codename=permission).id
         user_groups = OSFUserGroup.objects.filter(osfuser_id=user.id if user else None).values_list('group_id',
                                                                                                     flat=True)
@@ -322,6 +334,30 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     ) SELECT {fields} FROM "{nodelicenserecord}"
     WHERE id = (SELECT node_license_id FROM ascendants WHERE node_license_id IS NOT NULL) LIMIT 1;""")
 
+    INHERITED_LICENSES_QUERY = re.sub(r'\s+', ' ', """WITH RECURSIVE ascendants AS (
+            SELECT
+                R.child_id AS node_id,
+                N.node_license_id,
+                R.parent_id,
+                1 AS depth
+            FROM "{noderelation}" AS R
+                JOIN "{abstractnode}" AS N ON N.id = R.parent_id
+            WHERE R.is_node_link IS FALSE
+                AND R.child_id = ANY(%s)
+        UNION ALL
+            SELECT
+                D.node_id,
+                N.node_license_id,
+                R.parent_id,
+                D.depth + 1
+            FROM ascendants AS D
+                JOIN "{noderelation}" AS R ON D.parent_id = R.child_id
+                JOIN "{abstractnode}" AS N ON N.id = R.parent_id
+            WHERE R.is_node_link IS FALSE
+            AND D.node_license_id IS NULL
+    ) SELECT DISTINCT ON (node_id) node_id, node_license_id FROM ascendants
+    WHERE node_license_id IS NOT NULL ORDER BY node_id, depth;""")
+
     _contributors = models.ManyToManyField(OSFUser,
                                            through=Contributor,
                                            related_name='nodes')
@@ -727,8 +763,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             update_share(_node)
         from website.search import search, exceptions
         try:
-            serialize = functools.partial(search.update_node, index=index, bulk=True, async_update=False)
-            search.bulk_update_nodes(serialize, nodes, index=index)
+            search.bulk_index_nodes(nodes, index=index)
         except exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception(e)
@@ -806,10 +841,22 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     def get_absolute_url(self):
         return self.absolute_api_v2_url
 
+    def has_permission(self, user, permission, check_parent=True):
+        # Overrides ContributorMixin to answer from the user's permissions on the whole tree
+        if not user or user.is_anonymous:
+            return False
+        tree = get_node_tree_permissions(self, user)
+        if tree is None:
+            return super().has_permission(user, permission, check_parent=check_parent)
+        return tree.has_permission(self.id, permission, check_parent=check_parent)
+
     def has_permission_on_children(self, user, permission):
         """Checks if the given user has a given permission on any child nodes
             that are not registrations or deleted
         """
+        tree = get_node_tree_permissions(self, user) if user and not user.is_anonymous else None
+        if tree is not None:
+            return tree.has_permission_on_children(self.id, permission)
         if self.has_permission(user, permission):
             return True
         for node in self.nodes_primary.filter(is_deleted=False):
@@ -824,6 +871,11 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
                                     Useful for checking parent permissions for non-group actions like registrations.
         :return: bool Does the user have admin permissions on this object or its parents?
         """
+        if not user or user.is_anonymous:
+            return False
+        tree = get_node_tree_permissions(self, user)
+        if tree is not None:
+            return tree.is_admin_parent(self.id, include_group_admin=include_group_admin)
         if self.has_permission(user, ADMIN, check_parent=False):
             ret = True
             if not include_group_admin and not self.is_contributor(user):
@@ -890,6 +942,17 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
         contributor_ids = set(self.contributors.values_list('guids___id', flat=True))
         admin_ids = set(get_admin_contributor_ids(self)) if include_self else set()
+        tree = get_node_tree_permissions(self)
+        if tree is not None:
+            # Admins on every ancestor in one query, rather than one per parent
+            parent_admin_ids = OSFUser.objects.filter(
+                is_active=True,
+                groups__in=NodeGroupObjectPermission.objects.filter(
+                    content_object_id__in=tree.ancestor_ids(self.id),
+                    permission__codename=f'{ADMIN}_node',
+                ).values('group_id'),
+            ).values_list('guids___id', flat=True)
+            return admin_ids | set(parent_admin_ids).difference(contributor_ids)
         for parent in self.parents:
             admins = get_admin_contributor_ids(parent)
             admin_ids.update(set(admins).difference(contributor_ids))
@@ -979,6 +1042,22 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
                 return NodeLicenseRecord.from_db(self._state.db, None, res)
         return None
 
+    @classmethod
+    def get_license_record_ids(cls, nodes):
+        """Map the id of each of `nodes` to the id of the NodeLicenseRecord that `license` would
+        return for it, own or inherited, in a single query. Nodes without a license are left out.
+        """
+        license_ids = {node.id: node.node_license_id for node in nodes if node.node_license_id}
+        inheriting = [node.id for node in nodes if not node.node_license_id]
+        if inheriting:
+            with connection.cursor() as cursor:
+                cursor.execute(cls.INHERITED_LICENSES_QUERY.format(
+                    abstractnode=AbstractNode._meta.db_table,
+                    noderelation=NodeRelation._meta.db_table,
+                ), [inheriting])
+                license_ids.update(cursor.fetchall())
+        return license_ids
+
     @property
     def all_tags(self):
         """Return a queryset containing all of this node's tags (incl. system tags)."""
@@ -1073,6 +1152,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             if Contributor.objects.filter(node=self, visible=True).count() == 1:
                 raise ValueError('Must have at least one visible contributor')
             Contributor.objects.filter(node=self, user=user, visible=True).update(visible=False)
+            ContributorCounts.recount(Contributor, self.id)
         else:
             return
         message = (
@@ -1387,6 +1467,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
                 contribs.append(node_contrib)
                 self.add_permission(contrib.user, permission, save=True)
         Contributor.objects.bulk_create(contribs)
+        ContributorCounts.recount(Contributor, self.id)
 
     def register_node(self, schema, auth, draft_registration, parent=None, child_ids=None, provider=None, manual_guid=None):
         """Make a frozen copy of a node.
@@ -1988,6 +2069,8 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         ret = super().save(*args, **kwargs)
         if saved_fields:
             self.on_update(first_save, saved_fields)
+        if not first_save and {'is_deleted', 'root'}.intersection(saved_fields):
+            invalidate_node_tree(self.root_id)
 
         if 'node_license' in saved_fields:
             children = list(self.descendants.filter(node_license=None, is_public=True, is_deleted=False))
@@ -2444,14 +2527,21 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
     @property
     def storage_usage(self):
-        key = cache_settings.STORAGE_USAGE_KEY.format(target_id=self._id)
+        """OSFStorage usage in bytes, or None while it's being calculated in the background"""
+        if '_prefetched_storage_usage' in self.__dict__:
+            return self._prefetched_storage_usage
+        # Cached, falling back to the persisted counter kept current by the WaterButler hooks
+        return get_storage_usage_totals([self])[self.id]
 
-        storage_usage_total = storage_usage_cache.get(key)
-        if storage_usage_total is not None:
-            return storage_usage_total
-        else:
-            update_storage_usage(self)  # sets cache
-            return storage_usage_cache.get(key)
+    @classmethod
+    def prefetch_storage_usage(cls, nodes):
+        """Look up `storage_usage` for a page of nodes at once, rather than once per node"""
+        nodes = [node for node in nodes if '_prefetched_storage_usage' not in node.__dict__]
+        if not nodes:
+            return
+        totals = get_storage_usage_totals(nodes)
+        for node in nodes:
+            node._prefetched_storage_usage = totals[node.id]
 
     # Overrides ContributorMixin
     # TODO: Deprecate this when we emberize contributors management for nodes
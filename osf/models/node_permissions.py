@@ -0,0 +1,283 @@
+"""Effective permissions of a user on a whole node tree.
+
+Checks like `AbstractNode.is_admin_parent` and `has_permission_on_children` used to walk the
+tree one node (and one query) at a time. `get_node_tree_permissions` instead loads, in a single
+query, the structure of the tree a node belongs to along with the user's permission groups and
+contributorships on every node in it.
+
+Snapshots are kept on the current request and, when `ENABLE_NODE_PERMISSIONS_CACHE` is set,
+in the node permissions cache. Cache keys carry a version per tree and per user; the receivers
+at the bottom of this module bump them when permission group memberships, contributorships,
+component relations or a node's deleted state change.
+"""
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import Permission
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from psycopg2._psycopg import AsIs
+
+from api.caching import settings as cache_settings
+from api.caching.utils import node_permissions_cache
+from osf.utils.permissions import ADMIN, READ
+from osf.utils.requests import get_request_cache
+from website import settings
+
+from .contributor import Contributor
+from .node_relation import NodeRelation
+from .user import OSFUser
+
+REQUEST_CACHE_ATTR = '_node_tree_permissions'
+
+TREE_PERMISSIONS_QUERY = """
+    SELECT
+        N.id,
+        N.is_deleted,
+        R.parent_id,
+        ARRAY(
+            SELECT P.codename
+            FROM %(group_permission)s AS G
+                JOIN %(permission)s AS P ON P.id = G.permission_id
+                JOIN %(user_groups)s AS UG ON UG.group_id = G.group_id
+            WHERE G.content_object_id = N.id AND UG.osfuser_id = %(user_id)s
+        ),
+        EXISTS(
+            SELECT 1 FROM %(contributor)s AS C
+            WHERE C.node_id = N.id AND C.user_id = %(user_id)s
+        )
+    FROM %(node)s AS N
+        LEFT JOIN %(noderelation)s AS R ON R.child_id = N.id AND R.is_node_link IS FALSE
+    WHERE N.root_id = %(root_id)s;
+"""
+
+
+class NodeTreePermissions:
+    """A user's permissions on every node sharing a root, plus the shape of that tree.
+
+    :param dict parents: child node id -> parent node id, for components
+    :param set deleted: ids of deleted nodes
+    :param dict permissions: node id -> set of guardian codenames, e.g. {'read_node', 'write_node'}
+    :param set contributor_of: ids of the nodes the user is a contributor on
+    """
+
+    def __init__(self, root_id, user_id, parents, deleted, permissions, contributor_of):
+        self.root_id = root_id
+        self.user_id = user_id
+        self.parents = parents
+        self.deleted = deleted
+        self.permissions = permissions
+        self.contributor_of = contributor_of
+        self.children = defaultdict(list)
+        for child_id, parent_id in parents.items():
+            self.children[parent_id].append(child_id)
+
+    @classmethod
+    def load(cls, root_id, user_id):
+        from .node import AbstractNode, NodeGroupObjectPermission
+
+        parents, deleted, permissions, contributor_of = {}, set(), {}, set()
+        with connection.cursor() as cursor:
+            cursor.execute(TREE_PERMISSIONS_QUERY, {
+                'group_permission': AsIs(NodeGroupObjectPermission._meta.db_table),
+                'permission': AsIs(Permission._meta.db_table),
+                'user_groups': AsIs(OSFUser.groups.through._meta.db_table),
+                'contributor': AsIs(Contributor._meta.db_table),
+                'node': AsIs(AbstractNode._meta.db_table),
+                'noderelation': AsIs(NodeRelation._meta.db_table),
+                'user_id': user_id,
+                'root_id': root_id,
+            })
+            for node_id, is_deleted, parent_id, codenames, is_contributor in cursor.fetchall():
+                if parent_id is not None:
+                    parents[node_id] = parent_id
+                if is_deleted:
+                    deleted.add(node_id)
+                permissions[node_id] = set(codenames)
+                if is_contributor:
+                    contributor_of.add(node_id)
+        return cls(root_id, user_id, parents, deleted, permissions, contributor_of)
+
+    def to_cache(self):
+        return (self.parents, self.deleted, self.permissions, self.contributor_of)
+
+    @classmethod
+    def from_cache(cls, root_id, user_id, value):
+        return cls(root_id, user_id, *value)
+
+    def __contains__(self, node_id):
+        return node_id in self.permissions
+
+    def ancestor_ids(self, node_id):
+        """Ids of the parent, grandparent, ... of `node_id`, nearest first."""
+        ancestors = []
+        parent_id = self.parents.get(node_id)
+        while parent_id is not None and parent_id not in ancestors:
+            ancestors.append(parent_id)
+            parent_id = self.parents.get(parent_id)
+        return ancestors
+
+    def has_permission(self, node_id, permission, check_parent=True):
+        """Mirrors `ContributorMixin.has_permission` for nodes: implicit READ through admin on a parent."""
+        if f'{permission}_node' in self.permissions.get(node_id, ()):
+            return True
+        if permission == READ and check_parent:
+            return self.is_admin_parent(node_id)
+        return False
+
+    def is_admin_parent(self, node_id, include_group_admin=True):
+        for candidate_id in [node_id] + self.ancestor_ids(node_id):
+            if self.has_permission(candidate_id, ADMIN, check_parent=False):
+                return include_group_admin or candidate_id in self.contributor_of
+        return False
+
+    def has_permission_on_children(self, node_id, permission):
+        """Whether the user has `permission` on `node_id` or on any component below it
+        that can be reached without passing through a deleted component.
+        """
+        to_visit = [node_id]
+        seen = set()
+        while to_visit:
+            current_id = to_visit.pop()
+            if current_id in seen:
+                continue
+            seen.add(current_id)
+            if self.has_permission(current_id, permission):
+                return True
+            to_visit.extend(child_id for child_id in self.children[current_id] if child_id not in self.deleted)
+        return False
+
+
+def _clear_request_cache():
+    request_cache = get_request_cache(REQUEST_CACHE_ATTR)
+    if request_cache is not None:
+        request_cache.clear()
+
+
+def _version_keys(root_id, user_id):
+    return (
+        cache_settings.NODE_PERMISSIONS_TREE_VERSION_KEY.format(root_id=root_id),
+        cache_settings.NODE_PERMISSIONS_USER_VERSION_KEY.format(user_id=user_id),
+    )
+
+
+def _get_versions(keys):
+    versions = node_permissions_cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock rather than zero so an evicted version can't come back to a stale entry
+            node_permissions_cache.add(key, time.time_ns(), timeout=cache_settings.NEVER_TIMEOUT)
+            versions[key] = node_permissions_cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump_version(key):
+    node_permissions_cache.add(key, time.time_ns(), timeout=cache_settings.NEVER_TIMEOUT)
+    try:
+        node_permissions_cache.incr(key)
+    except ValueError:
+        node_permissions_cache.set(key, time.time_ns(), timeout=cache_settings.NEVER_TIMEOUT)
+
+
+def _load_shared(root_id, user_id):
+    tree_version, user_version = _get_versions(_version_keys(root_id, user_id))
+    key = cache_settings.NODE_PERMISSIONS_KEY.format(
+        root_id=root_id,
+        user_id=user_id,
+        tree_version=tree_version,
+        user_version=user_version,
+    )
+    cached = node_permissions_cache.get(key)
+    if cached is not None:
+        return NodeTreePermissions.from_cache(root_id, user_id, cached)
+    tree = NodeTreePermissions.load(root_id, user_id)
+    node_permissions_cache.set(key, tree.to_cache(), timeout=settings.NODE_PERMISSIONS_CACHE_TIMEOUT)
+    return tree
+
+
+def get_node_tree_permissions(node, user=None):
+    """Return the `NodeTreePermissions` of `user` (or of nobody, for the bare tree structure)
+    on the tree `node` belongs to, or None if `node` isn't part of a saved tree yet.
+    """
+    root_id = node.root_id
+    if not node.pk or not root_id:
+        return None
+    user_id = getattr(user, 'id', None) if user and not user.is_anonymous else None
+
+    request_cache = get_request_cache(REQUEST_CACHE_ATTR)
+    cache_key = (root_id, user_id)
+    if request_cache is not None and cache_key in request_cache:
+        tree = request_cache[cache_key]
+    else:
+        if settings.ENABLE_NODE_PERMISSIONS_CACHE:
+            tree = _load_shared(root_id, user_id)
+        else:
+            tree = NodeTreePermissions.load(root_id, user_id)
+        if request_cache is not None:
+            request_cache[cache_key] = tree
+
+    if node.pk not in tree:
+        # e.g. `node.root_id` was changed in memory but not saved
+        return None
+    return tree
+
+
+def _invalidate(keys):
+    _clear_request_cache()
+    if not settings.ENABLE_NODE_PERMISSIONS_CACHE or not keys:
+        return
+
+    def bump():
+        for key in keys:
+            _bump_version(key)
+    # Bump now so this process sees the change, and again on commit so that a snapshot
+    # another process took of the uncommitted state can't outlive the transaction
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_node_tree(*root_ids):
+    _invalidate([
+        cache_settings.NODE_PERMISSIONS_TREE_VERSION_KEY.format(root_id=root_id)
+        for root_id in set(root_ids) if root_id
+    ])
+
+
+def invalidate_user(*user_ids):
+    _invalidate([
+        cache_settings.NODE_PERMISSIONS_USER_VERSION_KEY.format(user_id=user_id)
+        for user_id in set(user_ids) if user_id
+    ])
+
+
+@receiver(m2m_changed, sender=OSFUser.groups.through)
+def invalidate_on_group_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        # user.groups.add(...)
+        invalidate_user(instance.id)
+    elif action == 'pre_clear':
+        # group.user_set.clear()
+        invalidate_user(*instance.user_set.values_list('id', flat=True))
+    else:
+        # group.user_set.add(...)
+        invalidate_user(*(pk_set or ()))
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def invalidate_on_contributor_change(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=NodeRelation)
+@receiver(post_delete, sender=NodeRelation)
+def invalidate_on_node_relation_change(sender, instance, **kwargs):
+    if instance.is_node_link:
+        return
+    from .node import AbstractNode
+    invalidate_node_tree(*AbstractNode.objects.filter(
+        id__in=[instance.parent_id, instance.child_id],
+    ).values_list('root_id', flat=True))
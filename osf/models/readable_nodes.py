@@ -0,0 +1,222 @@
+"""Which nodes each user can read, materialized.
+
+`AbstractNodeQuerySet.can_view` and `AbstractNodeManager.get_nodes_for_user` otherwise combine a
+guardian subquery with a recursive CTE over the node relations (admins of a project implicitly
+read every component below it), which Postgres often plans as sequential scans. `ReadableNode`
+holds one row per (user, node) the user can read, with the highest permission they hold on it,
+so that those queries become an indexed semi-join. They use it when `ENABLE_READABLE_NODES` is
+set, which should only be turned on once `manage.py rebuild_readable_nodes` has filled it in.
+
+Like guardian's `get_objects_for_user` in `can_view`, direct per-user read permissions
+(`NodeUserObjectPermission`) make a node readable too, but count for no permission level, as
+`get_nodes_for_user` only looks at permission groups.
+
+Rows are recomputed by `refresh_readable_nodes` in the transaction that changes the permission
+group memberships, node group or user permissions or component relations they derive from, see
+the receivers at the bottom of this module. Whether a node is deleted or public isn't recorded;
+callers filter on those columns as before.
+"""
+from django.contrib.auth.models import Permission
+from django.db import connection, models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from psycopg2._psycopg import AsIs
+
+from osf.utils.permissions import ADMIN_NODE, READ_NODE, WRITE_NODE
+from .node_relation import NodeRelation
+from .user import OSFUser
+
+# First key of the advisory locks serializing refreshes of the same user
+LOCK_NAMESPACE = 0x524e
+
+LOCK_USERS_QUERY = """
+    SELECT pg_advisory_xact_lock(%(lock_namespace)s, user_id)
+    FROM unnest(%(user_ids)s::int[]) AS user_id;
+"""
+
+REFRESH_READABLE_NODES_QUERY = """
+    WITH RECURSIVE explicit AS (
+        SELECT
+            UG.osfuser_id AS user_id,
+            G.content_object_id AS node_id,
+            MAX(CASE P.codename WHEN %(admin)s THEN 3 WHEN %(write)s THEN 2 ELSE 1 END) AS level
+        FROM %(group_permission)s AS G
+            JOIN %(permission)s AS P ON P.id = G.permission_id
+            JOIN %(user_groups)s AS UG ON UG.group_id = G.group_id
+            JOIN %(node)s AS N ON N.id = G.content_object_id
+        WHERE UG.osfuser_id = ANY(%(user_ids)s::int[])
+            AND P.codename IN (%(read)s, %(write)s, %(admin)s)
+            AND (%(root_ids)s::int[] IS NULL OR N.root_id = ANY(%(root_ids)s::int[]))
+        GROUP BY UG.osfuser_id, G.content_object_id
+    ), direct AS (
+        SELECT U.user_id, U.content_object_id AS node_id
+        FROM %(user_permission)s AS U
+            JOIN %(permission)s AS P ON P.id = U.permission_id
+            JOIN %(node)s AS N ON N.id = U.content_object_id
+        WHERE U.user_id = ANY(%(user_ids)s::int[])
+            AND P.codename = %(read)s
+            AND (%(root_ids)s::int[] IS NULL OR N.root_id = ANY(%(root_ids)s::int[]))
+    ), implicit AS (
+        SELECT E.user_id, E.node_id
+        FROM explicit AS E
+            JOIN %(node)s AS N ON N.id = E.node_id
+        WHERE E.level = 3 AND N.type = 'osf.node'
+    UNION
+        SELECT I.user_id, R.child_id
+        FROM implicit AS I
+            JOIN %(noderelation)s AS R ON R.parent_id = I.node_id
+        WHERE R.is_node_link IS FALSE
+    ), fresh AS (
+        SELECT user_id, node_id, MAX(level) AS level
+        FROM (
+            SELECT user_id, node_id, level FROM explicit
+            UNION ALL
+            SELECT user_id, node_id, 0 FROM implicit
+            UNION ALL
+            SELECT user_id, node_id, 0 FROM direct
+        ) AS readable
+        GROUP BY user_id, node_id
+    ), stale AS (
+        DELETE FROM %(readable)s AS T
+        WHERE T.user_id = ANY(%(user_ids)s::int[])
+            AND (%(root_ids)s::int[] IS NULL OR T.node_id IN (
+                SELECT id FROM %(node)s WHERE root_id = ANY(%(root_ids)s::int[])
+            ))
+            AND NOT EXISTS (SELECT 1 FROM fresh AS F WHERE F.user_id = T.user_id AND F.node_id = T.node_id)
+    )
+    INSERT INTO %(readable)s (user_id, node_id, level)
+    SELECT user_id, node_id, level FROM fresh
+    ON CONFLICT (user_id, node_id) DO UPDATE SET level = EXCLUDED.level
+    WHERE %(readable)s.level <> EXCLUDED.level;
+"""
+
+
+class ReadableNode(models.Model):
+    """A node `user` can read, and the highest permission they hold on it."""
+    IMPLICIT_READ = 0  # only as an admin of a project above it, or through a direct user permission
+    READ = 1
+    WRITE = 2
+    ADMIN = 3
+    LEVEL_CHOICES = (
+        (IMPLICIT_READ, 'implicit read'),
+        (READ, 'read'),
+        (WRITE, 'write'),
+        (ADMIN, 'admin'),
+    )
+    # The lowest level granting each of the permissions `get_nodes_for_user` checks
+    PERMISSION_LEVELS = {
+        READ_NODE: READ,
+        WRITE_NODE: WRITE,
+        ADMIN_NODE: ADMIN,
+    }
+
+    user = models.ForeignKey('OSFUser', related_name='readable_nodes', on_delete=models.CASCADE)
+    node = models.ForeignKey('AbstractNode', related_name='readers', on_delete=models.CASCADE)
+    level = models.PositiveSmallIntegerField(choices=LEVEL_CHOICES)
+
+    class Meta:
+        unique_together = ('user', 'node')
+
+    def __repr__(self):
+        return f'<ReadableNode(user={self.user_id}, node={self.node_id}, level={self.level})>'
+
+
+def refresh_readable_nodes(user_ids, root_ids=None):
+    """Recompute the `ReadableNode` rows of `user_ids`, only those on the node trees `root_ids`
+    if given. Refreshes of the same user are serialized until the end of the transaction.
+    """
+    from .node import AbstractNode, NodeGroupObjectPermission, NodeUserObjectPermission
+
+    user_ids = sorted({user_id for user_id in user_ids if user_id})
+    if not user_ids:
+        return
+    with connection.cursor() as cursor:
+        # Lock in a statement of its own, so the refresh reads whatever the refreshes it waited on wrote
+        cursor.execute(LOCK_USERS_QUERY, {'lock_namespace': LOCK_NAMESPACE, 'user_ids': user_ids})
+        cursor.execute(REFRESH_READABLE_NODES_QUERY, {
+            'group_permission': AsIs(NodeGroupObjectPermission._meta.db_table),
+            'user_permission': AsIs(NodeUserObjectPermission._meta.db_table),
+            'permission': AsIs(Permission._meta.db_table),
+            'user_groups': AsIs(OSFUser.groups.through._meta.db_table),
+            'node': AsIs(AbstractNode._meta.db_table),
+            'noderelation': AsIs(NodeRelation._meta.db_table),
+            'readable': AsIs(ReadableNode._meta.db_table),
+            'read': READ_NODE,
+            'write': WRITE_NODE,
+            'admin': ADMIN_NODE,
+            'user_ids': user_ids,
+            'root_ids': sorted(set(root_ids)) if root_ids is not None else None,
+        })
+
+
+def _node_group_roots(group_ids):
+    """Roots of the node trees `group_ids` grant permissions on, empty if they're not node groups"""
+    from .node import NodeGroupObjectPermission
+    return set(NodeGroupObjectPermission.objects.filter(
+        group_id__in=group_ids,
+        content_object__root_id__isnull=False,
+    ).values_list('content_object__root_id', flat=True))
+
+
+@receiver(m2m_changed, sender=OSFUser.groups.through)
+def refresh_on_group_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # The memberships are gone by post_clear, so note who and what they were
+        if reverse:
+            instance._readable_nodes_cleared = (list(instance.user_set.values_list('id', flat=True)), [instance.id])
+        else:
+            instance._readable_nodes_cleared = ([instance.id], list(instance.groups.values_list('id', flat=True)))
+        return
+    if action == 'post_clear':
+        user_ids, group_ids = getattr(instance, '_readable_nodes_cleared', ((), ()))
+    elif action in ('post_add', 'post_remove'):
+        if reverse:
+            # group.user_set.add(...)
+            user_ids, group_ids = pk_set or (), [instance.id]
+        else:
+            # user.groups.add(...)
+            user_ids, group_ids = [instance.id], pk_set or ()
+    else:
+        return
+    root_ids = _node_group_roots(group_ids) if user_ids and group_ids else None
+    if root_ids:
+        refresh_readable_nodes(user_ids, root_ids=root_ids)
+
+
+@receiver(post_save, sender='osf.NodeGroupObjectPermission')
+@receiver(post_delete, sender='osf.NodeGroupObjectPermission')
+def refresh_on_node_group_permission_change(sender, instance, **kwargs):
+    from .node import AbstractNode
+    user_ids = list(OSFUser.objects.filter(groups__id=instance.group_id).values_list('id', flat=True))
+    if not user_ids:
+        return
+    # The node may be being deleted along with its permissions
+    root_id = AbstractNode.objects.filter(id=instance.content_object_id).values_list('root_id', flat=True).first()
+    refresh_readable_nodes(user_ids, root_ids=[root_id] if root_id else None)
+
+
+@receiver(post_save, sender='osf.NodeUserObjectPermission')
+@receiver(post_delete, sender='osf.NodeUserObjectPermission')
+def refresh_on_node_user_permission_change(sender, instance, **kwargs):
+    from .node import AbstractNode
+    root_id = AbstractNode.objects.filter(id=instance.content_object_id).values_list('root_id', flat=True).first()
+    refresh_readable_nodes([instance.user_id], root_ids=[root_id] if root_id else None)
+
+
+@receiver(post_save, sender=NodeRelation)
+@receiver(post_delete, sender=NodeRelation)
+def refresh_on_node_relation_change(sender, instance, **kwargs):
+    if instance.is_node_link:
+        return
+    from .node import AbstractNode
+    # Admins anywhere on the trees involved may gain or lose implicit reads on the child's subtree,
+    # which is on one tree or the other depending on whether root ids were updated yet
+    root_ids = set(AbstractNode.objects.filter(
+        id__in=[instance.parent_id, instance.child_id],
+    ).values_list('root_id', flat=True)) - {None}
+    if not root_ids:
+        return
+    refresh_readable_nodes(ReadableNode.objects.filter(
+        node__root_id__in=root_ids,
+        level=ReadableNode.ADMIN,
+    ).values_list('user_id', flat=True).distinct(), root_ids=root_ids)
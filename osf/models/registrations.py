@@ -29,6 +29,7 @@ from osf.models.notification_type import NotificationTypeEnum
 from .action import RegistrationAction
 from .archive import ArchiveJob
 from .contributor import DraftRegistrationContributor
+from .counters import ContributorCounts
 from .metaschema import RegistrationSchema
 from .node import Node
 from .sanctions import (
@@ -1422,6 +1423,7 @@ class DraftRegistration(ObjectIDMixin, RegistrationResponseMixin, DirtyFieldsMix
                 contribs.append(new_contrib)
                 self.add_permission(contrib.user, permission, save=True)
         DraftRegistrationContributor.objects.bulk_create(contribs)
+        ContributorCounts.recount(DraftRegistrationContributor, self.id)
 
     def update_metadata(self, metadata):
         # Prevent comments on approved drafts
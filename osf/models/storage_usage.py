@@ -0,0 +1,48 @@
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .base import BaseModel
+
+
+class NodeStorageUsage(BaseModel):
+    """Persisted OSFStorage usage counter for a node.
+
+    `total` is adjusted in place from the WaterButler hooks as files are created, updated,
+    copied, moved and deleted, and periodically reconciled against the file versions
+    (see `api.caching.tasks.update_storage_usage_cache`).
+    """
+    node = models.OneToOneField('AbstractNode', related_name='storage_usage_counter', on_delete=models.CASCADE)
+    total = models.BigIntegerField(default=0)
+    # When `total` was last recomputed from scratch
+    reconciled = models.DateTimeField(null=True, blank=True)
+
+    def __unicode__(self):
+        return f'{self.node_id}: {self.total}'
+
+    @classmethod
+    def get_total(cls, node):
+        """Return the stored usage for `node`, or None if it has never been computed."""
+        return cls.objects.filter(node_id=node.id).values_list('total', flat=True).first()
+
+    @classmethod
+    def add(cls, node, size_delta):
+        """Atomically adjust the stored usage for `node` by `size_delta` bytes, never below zero.
+        Returns the new total, or None if the usage has never been computed.
+        """
+        updated = cls.objects.filter(node_id=node.id).update(
+            total=Greatest(F('total') + size_delta, 0),
+            modified=timezone.now(),
+        )
+        if not updated:
+            return None
+        return cls.get_total(node)
+
+    @classmethod
+    def set_total(cls, node, total):
+        cls.objects.update_or_create(
+            node_id=node.id,
+            defaults={'total': total, 'reconciled': timezone.now()},
+        )
+        return total
@@ -38,6 +38,24 @@ def get_current_request():
             return dummy_request
 
 
+def get_request_cache(name):
+    """Return a dict stored on the current request under the attribute `name`, creating it if needed.
+    Returns None outside of a request, where there is nothing to scope the cache to.
+    """
+    req = get_current_request()
+    if req is dummy_request:
+        return None
+    try:
+        return getattr(req, name)
+    except AttributeError:
+        cache = {}
+        try:
+            setattr(req, name, cache)
+        except AttributeError:
+            return None
+        return cache
+
+
 def get_request_and_user_id():
     """
     Fetch a request and user id from either a Django or Flask request.
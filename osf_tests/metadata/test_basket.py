@@ -81,3 +81,34 @@ def test_goodbasket():
     assert len(basket.gathered_metadata) == 0
     assert len(basket._gathertasks_done) == 0
     assert len(basket._known_focus_dict) == 1
+
+
+class _PrefetchingFocus(gather.Focus):
+    prefetch = mock.Mock()
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_basket_gathers_related_foci_together(max_workers):
+    FLURB = rdflib.Namespace('https://flurb.example/flurb/')
+    _PrefetchingFocus.prefetch.reset_mock()
+    focus = _PrefetchingFocus(FLURB.item, FLURB.Type)
+    parts = [_PrefetchingFocus(FLURB[f'part{i}'], FLURB.Part) for i in range(3)]
+
+    def gather_parts(focus):
+        for part in parts:
+            yield (FLURB.hasPart, part)
+
+    def gather_names(focus):
+        yield (FLURB.name, str(focus.iri))
+
+    gather.er(FLURB.hasPart, focustype_iris=[FLURB.Type])(gather_parts)
+    gather.er(FLURB.name, focustype_iris=[FLURB.Part], prefetch=['names'])(gather_names)
+    basket = gather.Basket(focus, max_workers=max_workers)
+    basket.pls_gather({FLURB.hasPart: {FLURB.name: None}})
+
+    assert set(basket[FLURB.hasPart]) == {part.iri for part in parts}
+    for part in parts:
+        assert set(basket[part.iri:FLURB.name]) == {rdflib.Literal(str(part.iri))}
+    # the parts' needs were loaded once, for all of them
+    _PrefetchingFocus.prefetch.assert_called_once_with(parts, frozenset({'names'}))
+    assert set(basket.gatherer_timings) == {'gather_parts', 'gather_names'}
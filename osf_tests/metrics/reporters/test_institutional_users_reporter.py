@@ -3,7 +3,7 @@ import dataclasses
 import datetime
 import unittest
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from api_tests.utils import create_test_file
 from osf import models as osfdb
@@ -142,6 +142,31 @@ class TestInstiUsersReporter(TestCase):
             _setup = _setup_by_userid[_actual_report.user_id]
             self._assert_report_matches_setup(_actual_report, _setup)
 
+    def test_chunked_reports_match_per_user_reports(self):
+        _setups = [
+            self._user_setup_with_nothing,
+            self._user_setup_with_ones,
+            self._user_setup_with_stuff,
+        ]
+        for _setup in _setups:
+            _setup.affiliate_user()
+        _user = self._user_setup_with_stuff.user
+        with _patch_now(self._now):
+            create_test_file(target=_user.nodes.first(), user=_user, size=37)
+
+        def _reports_by_user(chunk_size):
+            with override_settings(INSTITUTIONAL_USERS_REPORT_CHUNK_SIZE=chunk_size):
+                _reporter = InstitutionalUsersReporter(self._yearmonth)
+                _kwargs_list = list(_reporter.iter_report_kwargs())
+                _reports = list_monthly_reports(_reporter)
+            return _kwargs_list, {_report.user_id: _report.to_dict() for _report in _reports}
+
+        _per_user_kwargs, _per_user_reports = _reports_by_user(0)
+        _chunked_kwargs, _chunked_reports = _reports_by_user(2)
+        self.assertEqual(len(_per_user_kwargs), 3)
+        self.assertEqual([len(_kwargs['user_pks']) for _kwargs in _chunked_kwargs], [2, 1])
+        self.assertEqual(_chunked_reports, _per_user_reports)
+
 
 @dataclasses.dataclass
 class _InstiUserSetup:
@@ -11,6 +11,7 @@ import pytest
 
 from framework.auth import Auth
 from framework.celery_tasks import handlers
+from framework.exceptions import HTTPError
 
 from website.archiver import (
     ARCHIVER_INITIATED,
@@ -424,6 +425,31 @@ class TestStorageAddonBase(ArchiverTestCase):
     def _test_addon(self, addon_short_name):
         self._test__get_file_tree(addon_short_name)
 
+    def test__get_file_tree_resumes_partial_tree(self):
+        addon = self.src.get_addon('osfstorage')
+        listed = []
+        unavailable = {'/qwerty'}
+
+        def list_folder(filenode, user, cookie=None, version=None):
+            listed.append(filenode['path'])
+            if filenode['path'] in unavailable:
+                raise HTTPError(503, data={'error': 'unavailable'})
+            return [dict(child['attributes']) for child in self.get_resp(filenode['path'])['data']]
+
+        root = {'path': '/', 'name': '', 'kind': 'folder', 'size': '100'}
+        with mock.patch.object(BaseStorageAddon, '_get_fileobj_child_metadata', side_effect=list_folder):
+            with pytest.raises(HTTPError) as e:
+                addon._get_file_tree(root, self.user)
+            partial_file_tree = e.value.partial_file_tree
+            assert [child['path'] for child in partial_file_tree['children']] == ['/1234567', '/qwerty']
+            assert 'children' not in partial_file_tree['children'][1]
+
+            unavailable.clear()
+            listed.clear()
+            file_tree = addon._get_file_tree(partial_file_tree, self.user)
+        assert file_tree == FILE_TREE
+        assert listed == ['/qwerty']
+
     # @pytest.mark.skip('Unskip when figshare addon is implemented')
     def test_addons(self):
         #  Test that each addon in settings.ADDONS_ARCHIVABLE other than wiki/forward implements the StorageAddonBase interface
@@ -996,12 +1022,42 @@ class TestArchiverUtils(ArchiverTestCase):
             mock_get_file_tree.return_value = file_tree_factory(3, 3, 3)
 
             # first call
-            archiver_utils.get_file_map(node)
+            list(archiver_utils.get_file_map(node))
             call_count = mock_get_file_tree.call_count
+            assert call_count
             # second call
-            archiver_utils.get_file_map(node)
+            list(archiver_utils.get_file_map(node))
             assert mock_get_file_tree.call_count == call_count
 
+    def test_do_get_file_map_indexes_files_by_hash(self):
+        file_tree = file_tree_factory(3, 3, 3)
+        duplicate = dict(file_tree['children'][0], path='/duplicate')
+        file_tree['children'].append(duplicate)
+
+        file_map = archiver_utils._do_get_file_map(file_tree)
+        sha256 = duplicate['extra']['hashes']['sha256']
+        assert file_map[sha256] == [file_tree['children'][0], duplicate]
+        assert sum(len(files) for files in file_map.values()) == 3 * 3 + 1
+
+    def test_file_map_cache_is_bounded(self):
+        archiver_utils.clear_file_map_cache()
+        nodes = [factories.NodeFactory() for _ in range(3)]
+        with mock.patch.object(BaseStorageAddon, '_get_file_tree') as mock_get_file_tree:
+            mock_get_file_tree.side_effect = lambda user: file_tree_factory(3, 3, 3)
+            with mock.patch.object(settings, 'ARCHIVE_FILE_MAP_CACHE_MAX_FILES', 2 * 3 * 3):
+                for node in nodes:
+                    archiver_utils.load_file_map(node)
+                assert mock_get_file_tree.call_count == 3
+
+                # The least recently used file map was evicted
+                archiver_utils.load_file_map(nodes[2])
+                assert mock_get_file_tree.call_count == 3
+                archiver_utils.load_file_map(nodes[0])
+                assert mock_get_file_tree.call_count == 4
+
+        archiver_utils.clear_file_map_cache()
+        assert not archiver_utils._file_map_cache
+
 class TestArchiverListeners(ArchiverTestCase):
 
     @mock.patch('website.archiver.tasks.archive')
@@ -6,7 +6,7 @@ from django.utils import timezone
 from website import settings
 from framework.exceptions import PermissionsError
 from tests.base import capture_signals
-from osf.models import Comment, NodeLog, Guid
+from osf.models import Comment, CommentCounts, NodeLog, Guid
 from osf.utils import permissions
 from framework.auth.core import Auth
 from .factories import (
@@ -386,3 +386,30 @@ class TestCommentModel:
         CommentFactory(node=project, user=project.creator, is_deleted=True)
         n_unread = Comment.find_n_unread(user=user, node=project, page='node')
         assert n_unread == 0
+
+    def test_find_unread_skips_count_when_nothing_changed_since_last_view(self):
+        project = ProjectFactory()
+        user = UserFactory()
+        project.add_contributor(user, save=True)
+        CommentFactory(node=project, user=project.creator)
+        user.comments_viewed_timestamp[project._id] = timezone.now()
+        user.save()
+
+        with mock.patch.object(Comment.objects, 'filter') as mock_filter:
+            assert Comment.find_n_unread(user=user, node=project, page='node') == 0
+        assert not mock_filter.called
+
+    def test_comment_counts_follow_comment_changes(self):
+        project = ProjectFactory()
+        root_target = Guid.load(project._id)
+        comment = CommentFactory(node=project, user=project.creator)
+        assert CommentCounts.get_for(root_target).total == 1
+
+        comment.delete(auth=Auth(project.creator), save=True)
+        assert CommentCounts.get_for(root_target).total == 0
+        assert CommentCounts.get_for(root_target).last_activity is None
+
+        comment.undelete(auth=Auth(project.creator), save=True)
+        counts = CommentCounts.get_for(root_target)
+        assert counts.total == 1
+        assert counts.last_activity == comment.modified
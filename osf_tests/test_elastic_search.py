@@ -5,6 +5,8 @@ import unittest
 import pytest
 
 from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from framework.auth.core import Auth
 
 from website import settings
@@ -13,12 +15,15 @@ from website.search import elastic_search
 from website.search.util import build_query
 from website.search_migration.migrate import migrate
 from osf.models import (
+    AbstractNode,
     Retraction,
     NodeLicense,
     Tag,
     Preprint,
 )
+from osf.models.licenses import serialize_node_license_record
 from addons.wiki.models import WikiPage
+from addons.wiki.tests.factories import WikiFactory, WikiVersionFactory
 from addons.osfstorage.models import OsfStorageFile
 from addons.osfstorage import settings as osfstorage_settings
 
@@ -1406,3 +1411,118 @@ class TestSearchFiles(OsfTestCase):
         assert file_.path == path
         assert find[0]['guid_url'] is None
         assert find[0]['deep_url'] == deep_url
+
+
+class TestIndexingBuffer:
+
+    @pytest.fixture()
+    def mock_bulk(self):
+        with mock.patch.object(elastic_search, 'client', return_value=mock.Mock()), \
+                mock.patch.object(elastic_search.helpers, 'bulk', return_value=(1, [])) as mock_bulk:
+            yield mock_bulk
+
+    def test_last_write_to_a_document_wins(self):
+        buffer = elastic_search.IndexingBuffer()
+        buffer.add({'_op_type': 'index', '_index': 'test', '_type': 'file', '_id': 'abcde', '_source': {'name': 'a'}})
+        buffer.add({'_op_type': 'delete', '_index': 'test', '_type': 'file', '_id': 'abcde'})
+        buffer.add({'_op_type': 'index', '_index': 'test', '_type': 'file', '_id': 'fghij', '_source': {'name': 'b'}})
+
+        assert len(buffer) == 2
+        assert [action['_op_type'] for action in buffer.actions.values()] == ['delete', 'index']
+
+    def test_partial_update_merges_into_pending_index(self):
+        buffer = elastic_search.IndexingBuffer()
+        buffer.add({'_op_type': 'index', '_index': 'test', '_type': 'project', '_id': 'abcde', '_source': {'title': 'a', 'contributors': []}})
+        buffer.add({'_op_type': 'update', '_index': 'test', '_type': 'project', '_id': 'abcde', 'doc': {'contributors': ['x']}, 'doc_as_upsert': True})
+
+        (action,) = buffer.actions.values()
+        assert action['_op_type'] == 'index'
+        assert action['_source'] == {'title': 'a', 'contributors': ['x']}
+
+    def test_buffered_updates_are_sent_in_one_bulk_call(self, mock_bulk):
+        with elastic_search.buffered_search_updates():
+            elastic_search.index_doc('test', 'file', 'abcde', {'name': 'a'})
+            elastic_search.index_doc('test', 'file', 'abcde', {'name': 'b'})
+            elastic_search.remove_doc('test', 'file', 'fghij')
+            assert not mock_bulk.called
+
+        assert mock_bulk.call_count == 1
+        actions = mock_bulk.call_args[0][1]
+        assert [(action['_op_type'], action['_id']) for action in actions] == [('index', 'abcde'), ('delete', 'fghij')]
+        assert actions[0]['_source'] == {'name': 'b'}
+        assert mock_bulk.call_args[1]['refresh'] == settings.ELASTIC_REFRESH_ON_FLUSH
+
+    def test_missing_documents_are_not_errors(self, mock_bulk):
+        mock_bulk.return_value = (0, [{'delete': {'_id': 'fghij', 'status': 404}}])
+        elastic_search.send_actions([{'_op_type': 'delete', '_index': 'test', '_type': 'file', '_id': 'fghij'}])
+
+        mock_bulk.return_value = (0, [{'index': {'_id': 'abcde', 'status': 400}}])
+        with pytest.raises(elastic_search.exceptions.SearchException):
+            elastic_search.send_actions([{'_op_type': 'index', '_index': 'test', '_type': 'file', '_id': 'abcde', '_source': {}}])
+
+
+@pytest.mark.django_db
+class TestNodeSearchBatch:
+
+    @pytest.fixture()
+    def license_record(self):
+        return factories.NodeLicenseRecordFactory()
+
+    def _make_tree(self, license_record):
+        project = factories.ProjectFactory(is_public=True, node_license=license_record)
+        project.add_tag('batch', auth=Auth(project.creator))
+        component = factories.NodeFactory(parent=project, creator=project.creator, is_public=True)
+        WikiVersionFactory(wiki_page=WikiFactory(node=component, user=project.creator), user=project.creator)
+        return [project, component]
+
+    def _count_queries(self, nodes):
+        nodes = AbstractNode.objects.filter(id__in=[node.id for node in nodes])
+        with CaptureQueriesContext(connection) as queries:
+            actions = list(elastic_search.serialize_nodes(nodes, index='test'))
+        return len(queries), actions
+
+    def test_query_count_does_not_grow_with_the_batch(self, license_record):
+        small, _ = self._count_queries(self._make_tree(license_record))
+        nodes = []
+        for _ in range(4):
+            nodes.extend(self._make_tree(license_record))
+        large, actions = self._count_queries(nodes)
+
+        assert small == large
+        assert len(actions) == 8
+
+    def test_matches_single_node_serialization(self, license_record):
+        project, component = self._make_tree(license_record)
+        actions = {
+            action['_id']: action
+            for action in elastic_search.serialize_nodes(AbstractNode.objects.filter(id__in=[project.id, component.id]), index='test')
+        }
+        for node, category in ((project, 'project'), (component, 'component')):
+            action = actions[node._id]
+            assert action['_op_type'] == 'index'
+            assert action['_type'] == category
+            assert action['_source'] == elastic_search.serialize_node(node, category)
+
+        source = actions[component._id]['_source']
+        assert source['parent_id'] == project._id
+        assert source['license'] == serialize_node_license_record(component.license)
+        assert list(source['wikis']) == ['home']
+        assert actions[project._id]['_source']['tags'] == ['batch']
+
+    def test_system_tags_are_not_serialized(self):
+        project = factories.ProjectFactory(is_public=True)
+        project.add_tag('visible', auth=Auth(project.creator))
+        project.add_system_tag('hidden')
+        (action,) = elastic_search.serialize_nodes([project], index='test')
+        assert action['_source']['tags'] == ['visible']
+
+    def test_system_qa_tags_still_prevent_indexing(self):
+        project = factories.ProjectFactory(is_public=True)
+        project.add_system_tag('qatest')
+        (action,) = elastic_search.serialize_nodes([project], index='test')
+        assert action['_op_type'] == 'delete'
+
+    def test_private_nodes_are_deleted(self):
+        project = factories.ProjectFactory(is_public=False)
+        (action,) = elastic_search.serialize_nodes([project], index='test')
+        assert action == {'_op_type': 'delete', '_index': 'test', '_type': 'project', '_id': project._id}
@@ -1,3 +1,4 @@
+import gzip
 import os
 
 import pytest
@@ -246,3 +247,35 @@ class TestGenerateSitemap:
 
         # Verify the spammed registration's overview page does not make it into the XML
         assert urljoin(settings.DOMAIN, registration_spammed.url + 'overview') not in urls
+
+
+@pytest.mark.django_db
+class TestIncrementalSitemap:
+
+    @pytest.fixture()
+    def static_folder(self):
+        folder = tempfile.mkdtemp()
+        with mock.patch('website.settings.STATIC_FOLDER', folder):
+            yield folder
+        shutil.rmtree(folder)
+
+    def test_only_changed_shards_are_rendered(self, static_folder):
+        project = ProjectFactory(is_public=True)
+        PreprintFactory()
+        generate_sitemap.main()
+
+        with mock.patch.object(generate_sitemap, 'write_shard', wraps=generate_sitemap.write_shard) as write_shard:
+            generate_sitemap.main()
+            assert not write_shard.called
+
+            project.title = 'Changed'
+            project.save()
+            generate_sitemap.main()
+            assert [call.args[1:] for call in write_shard.call_args_list] == [
+                ('node', project.id // settings.SITEMAP_SHARD_SIZE)
+            ]
+
+        with gzip.open(os.path.join(static_folder, 'sitemaps', 'sitemap_0.xml.gz')) as f:
+            tree = xml.etree.ElementTree.parse(f)
+        urls = [element.text for element in tree.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
+        assert urljoin(settings.DOMAIN, project.url + 'overview') in urls
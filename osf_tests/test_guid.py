@@ -4,8 +4,9 @@ from django.core.exceptions import MultipleObjectsReturned
 import pytest
 
 from framework.auth import Auth
-from osf.models import Guid, GuidVersionsThrough, NodeLicenseRecord, OSFUser, Preprint
+from osf.models import AbstractNode, Guid, GuidVersionsThrough, NodeLicenseRecord, OSFUser, Preprint
 from osf.models.base import VersionedGuidMixin
+from osf.utils import requests as request_utils
 from osf_tests.factories import (
     AuthUserFactory,
     NodeFactory,
@@ -340,3 +341,53 @@ class TestGuidVersionsThrough:
         GuidVersionsThrough.objects.filter(guid=preprint_guid).delete()
         preprint._id = None
         assert preprint._id is None
+
+
+@pytest.mark.django_db
+class TestGuidResolutionCache:
+
+    @pytest.fixture(autouse=True)
+    def request_cache(self):
+        request = mock.Mock(spec=[])
+        with mock.patch.object(request_utils, 'get_current_request', return_value=request):
+            yield
+
+    def test_repeated_loads_resolve_once(self, django_assert_num_queries):
+        user = UserFactory()
+        assert OSFUser.load(user._id) == user
+        with django_assert_num_queries(0):
+            assert Guid.load(user._id).object_id == user.id
+
+    def test_primary_guid_is_shared_between_instances(self, django_assert_num_queries):
+        node = NodeFactory()
+        assert AbstractNode.objects.get(id=node.id).creator._id == node.creator._id
+        creator = AbstractNode.objects.get(id=node.id).creator
+        with django_assert_num_queries(0):
+            assert creator._id == node.creator._id
+
+    def test_load_many(self, django_assert_max_num_queries):
+        users = [UserFactory() for _ in range(3)]
+        node = NodeFactory()
+        guid_strs = [user._id for user in users] + [node._id, 'notaguid']
+        with django_assert_max_num_queries(3):
+            loaded = OSFUser.load_many(guid_strs)
+        assert loaded == {user._id: user for user in users}
+        assert set(Guid.load_many(guid_strs)) == set(guid_strs) - {'notaguid'}
+
+    def test_repointed_guid_is_invalidated(self):
+        user, other = UserFactory(), UserFactory()
+        guid = Guid.load(user._id)
+        assert OSFUser.load(guid._id) == user
+
+        guid = Guid.objects.get(id=guid.id)
+        guid.object_id = other.id
+        guid.save()
+        assert OSFUser.load(guid._id) == other
+        assert Guid.load_referent(guid._id) == (other, None)
+
+    def test_versioned_referent(self, creator, preprint_provider):
+        preprint = PreprintFactory(creator=creator, provider=preprint_provider)
+        base_guid = preprint.get_guid()._id
+        assert Guid.load_referent(f'{base_guid}_v1') == (preprint, 1)
+        assert Guid.load_referent(f'{base_guid}_v1') == (preprint, 1)
+        assert Preprint.load(f'{base_guid}_v1') == preprint
@@ -1091,6 +1091,24 @@ class TestContributorMethods:
         assert node2.has_permission(read, permissions.READ) is True
         assert node2.has_permission(admin, permissions.ADMIN) is True
 
+    def test_contributor_counts(self, node, auth):
+        assert (node.contributor_counts.total, node.contributor_counts.bibliographic) == (1, 1)
+        visible, invisible = UserFactory(), UserFactory()
+        node.add_contributor(visible, visible=True, auth=auth)
+        node.add_contributor(invisible, visible=False, auth=auth)
+        assert (node.contributor_counts.total, node.contributor_counts.bibliographic) == (3, 2)
+
+        node.set_visible(visible, visible=False, auth=auth)
+        assert (node.contributor_counts.total, node.contributor_counts.bibliographic) == (3, 1)
+
+        node2 = NodeFactory()
+        node2.copy_contributors_from(node)
+        # Its own creator, plus the three copied
+        assert (node2.contributor_counts.total, node2.contributor_counts.bibliographic) == (4, 2)
+
+        node.remove_contributor(invisible, auth=auth)
+        assert (node.contributor_counts.total, node.contributor_counts.bibliographic) == (2, 1)
+
     def test_remove_contributor(self, node, auth):
         # A user is added as a contributor
         user2 = UserFactory()
@@ -0,0 +1,102 @@
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from framework.auth import Auth
+from osf.models import node_permissions
+from osf.utils import requests as request_utils
+from osf.utils.permissions import ADMIN, READ, WRITE
+from osf_tests.factories import NodeFactory, ProjectFactory, UserFactory
+
+
+@pytest.fixture()
+def project():
+    return ProjectFactory()
+
+
+@pytest.fixture()
+def component_creator():
+    return UserFactory()
+
+
+@pytest.fixture()
+def leaf(project, component_creator):
+    node = project
+    for _ in range(4):
+        node = NodeFactory(parent=node, creator=component_creator, category='project')
+    return node
+
+
+@pytest.fixture()
+def shared_cache():
+    with mock.patch.object(node_permissions.settings, 'ENABLE_NODE_PERMISSIONS_CACHE', True):
+        yield
+
+
+@pytest.mark.django_db
+class TestNodeTreePermissions:
+
+    def test_shared_cache_disabled_by_default(self):
+        assert not node_permissions.settings.ENABLE_NODE_PERMISSIONS_CACHE
+
+    @pytest.mark.usefixtures('shared_cache')
+    def test_checks_on_a_deep_tree_share_one_query(self, project, leaf, django_assert_num_queries):
+        node_permissions.invalidate_node_tree(project.id)
+        with django_assert_num_queries(1):
+            assert leaf.is_admin_parent(project.creator)
+            assert leaf.has_permission(project.creator, READ)
+            assert not leaf.has_permission(project.creator, WRITE)
+            assert project.has_permission_on_children(project.creator, ADMIN)
+
+    def test_request_cache_without_shared_cache(self, project, leaf, django_assert_num_queries):
+        parent = leaf.parent_node
+        request = mock.Mock(spec=[])
+        with mock.patch.object(node_permissions.settings, 'ENABLE_NODE_PERMISSIONS_CACHE', False), \
+                mock.patch.object(request_utils, 'get_current_request', return_value=request):
+            with django_assert_num_queries(1):
+                assert leaf.is_admin_parent(project.creator)
+                assert parent.is_admin_parent(project.creator)
+
+    def test_contributor_changes_invalidate(self, project, leaf):
+        user = UserFactory()
+        assert not leaf.is_admin_parent(user)
+
+        project.add_contributor(user, permissions=ADMIN, auth=Auth(project.creator))
+        assert leaf.is_admin_parent(user)
+        assert leaf.is_admin_parent(user, include_group_admin=False)
+
+        project.remove_contributor(user, auth=Auth(project.creator))
+        assert not leaf.is_admin_parent(user)
+        assert not leaf.has_permission(user, READ)
+
+    @pytest.mark.usefixtures('shared_cache')
+    def test_revoking_through_another_cache_instance(self, project, leaf):
+        # Two processes talking to the same shared backend
+        this_process = LocMemCache('test-node-permissions', {})
+        other_process = LocMemCache('test-node-permissions', {})
+        user = UserFactory()
+        project.add_contributor(user, permissions=ADMIN, auth=Auth(project.creator))
+
+        with mock.patch.object(node_permissions, 'node_permissions_cache', this_process):
+            assert leaf.is_admin_parent(user)
+        with mock.patch.object(node_permissions, 'node_permissions_cache', other_process):
+            project.remove_contributor(user, auth=Auth(project.creator))
+        with mock.patch.object(node_permissions, 'node_permissions_cache', this_process):
+            assert not leaf.is_admin_parent(user)
+            assert not leaf.has_permission(user, READ)
+        this_process.clear()
+
+    def test_deleting_a_component_invalidates(self, project, leaf, component_creator):
+        user = UserFactory()
+        leaf.add_contributor(user, permissions=READ, auth=Auth(component_creator))
+        middle = leaf.parent_node
+        assert middle.has_permission_on_children(user, READ)
+
+        middle.is_deleted = True
+        middle.save()
+        assert not middle.parent_node.has_permission_on_children(user, READ)
+
+    def test_parent_admin_contributor_ids(self, project, leaf, component_creator):
+        assert leaf.parent_admin_contributor_ids == {project.creator._id}
+        assert leaf._get_admin_contributor_ids(include_self=True) == {project.creator._id, component_creator._id}
@@ -1,5 +1,6 @@
 from unittest import mock
 import pytest
+import requests
 from django.contrib.contenttypes.models import ContentType
 from types import SimpleNamespace
 from urllib.parse import urlparse
@@ -128,6 +129,42 @@ class TestDomainExtraction:
         domains = list(spam_tasks._extract_domains(sample_text))
         assert domains == [('osf.io', NotableDomain.Note.UNKNOWN)]
 
+    def test_extract_domains__caches_checks(self, mock_spam_head_request):
+        sample_text = 'osf.io/a osf.io/b and cos.io'
+        expected = [('osf.io', NotableDomain.Note.UNKNOWN), ('cos.io', NotableDomain.Note.UNKNOWN)]
+        assert list(spam_tasks._extract_domains(sample_text)) == expected
+        assert mock_spam_head_request.call_count == 2
+
+        assert list(spam_tasks._extract_domains(sample_text)) == expected
+        assert mock_spam_head_request.call_count == 2
+
+    def test_extract_domains__follows_each_shortened_link(self, mock_spam_head_request):
+        locations = {
+            'https://short.ly/a': 'spam.com',
+            'https://short.ly/b': 'other.com',
+            'https://short.ly/c': 'spam.com',
+            'https://short.ly/d': 'third.com',
+        }
+        mock_spam_head_request.side_effect = lambda url, timeout: SimpleNamespace(
+            status_code=301,
+            headers={'location': locations[url]},
+        )
+        domains = list(spam_tasks._extract_domains('short.ly/a and short.ly/b, short.ly/c or short.ly/d'))
+        assert domains == [
+            ('spam.com', NotableDomain.Note.UNKNOWN),
+            ('other.com', NotableDomain.Note.UNKNOWN),
+            ('third.com', NotableDomain.Note.UNKNOWN),
+        ]
+        assert mock_spam_head_request.call_count == 4
+
+    def test_extract_domains__does_not_cache_failed_checks(self, mock_spam_head_request):
+        mock_spam_head_request.side_effect = requests.exceptions.ConnectionError
+        assert list(spam_tasks._extract_domains('osf.io')) == [('osf.io', NotableDomain.Note.UNVERIFIED)]
+
+        mock_spam_head_request.side_effect = None
+        assert list(spam_tasks._extract_domains('osf.io')) == [('osf.io', NotableDomain.Note.UNKNOWN)]
+        assert mock_spam_head_request.call_count == 2
+
     def test_extract_domains__ignores_floats(self, mock_spam_head_request):
         sample_text = 'this is a number 3.1415 not a domain'
         domains = list(spam_tasks._extract_domains(sample_text))
@@ -0,0 +1,110 @@
+from unittest import mock
+
+import pytest
+from guardian.shortcuts import assign_perm, remove_perm
+
+from framework.auth import Auth
+from osf.management.commands.rebuild_readable_nodes import rebuild_readable_nodes
+from osf.models import AbstractNode, Node, NodeRelation, ReadableNode
+from osf.models import node as node_module
+from osf.utils.permissions import ADMIN, ADMIN_NODE, READ, READ_NODE, WRITE_NODE
+from osf_tests.factories import NodeFactory, ProjectFactory, UserFactory
+
+
+@pytest.fixture()
+def project():
+    return ProjectFactory()
+
+
+@pytest.fixture()
+def component_creator():
+    return UserFactory()
+
+
+@pytest.fixture()
+def component(project, component_creator):
+    return NodeFactory(parent=project, creator=component_creator)
+
+
+@pytest.fixture()
+def grandchild(component, component_creator):
+    return NodeFactory(parent=component, creator=component_creator)
+
+
+def readable(user):
+    return dict(ReadableNode.objects.filter(user=user).values_list('node_id', 'level'))
+
+
+def viewable(user, enabled):
+    with mock.patch.object(node_module.settings, 'ENABLE_READABLE_NODES', enabled):
+        return set(AbstractNode.objects.can_view(user).values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestReadableNodes:
+
+    def test_contributors_and_implicit_admin_reads(self, project, component, grandchild, component_creator):
+        assert readable(project.creator) == {
+            project.id: ReadableNode.ADMIN,
+            component.id: ReadableNode.IMPLICIT_READ,
+            grandchild.id: ReadableNode.IMPLICIT_READ,
+        }
+        assert readable(component_creator) == {
+            component.id: ReadableNode.ADMIN,
+            grandchild.id: ReadableNode.ADMIN,
+        }
+
+    def test_permission_changes(self, project, component):
+        user = UserFactory()
+        project.add_contributor(user, permissions=READ, auth=Auth(project.creator))
+        assert readable(user) == {project.id: ReadableNode.READ}
+
+        project.update_contributor(user, ADMIN, None, Auth(project.creator), save=True)
+        assert readable(user) == {project.id: ReadableNode.ADMIN, component.id: ReadableNode.IMPLICIT_READ}
+
+        project.remove_contributor(user, auth=Auth(project.creator))
+        assert readable(user) == {}
+
+    def test_node_relation_changes(self, project, component_creator):
+        component = NodeFactory(parent=project, creator=component_creator)
+        assert readable(project.creator)[component.id] == ReadableNode.IMPLICIT_READ
+
+        NodeRelation.objects.filter(child=component, is_node_link=False).delete()
+        assert component.id not in readable(project.creator)
+
+    def test_can_view_and_get_nodes_for_user_match(self, project, component, grandchild, component_creator):
+        public = ProjectFactory(is_public=True)
+        for user in (project.creator, component_creator, UserFactory()):
+            assert viewable(user, True) == viewable(user, False)
+            assert public.id in viewable(user, True)
+
+        with mock.patch.object(node_module.settings, 'ENABLE_READABLE_NODES', True):
+            writable = set(Node.objects.get_nodes_for_user(component_creator, WRITE_NODE))
+            administered = set(Node.objects.get_nodes_for_user(project.creator, ADMIN_NODE))
+        assert writable == {component, grandchild}
+        assert administered == {project}
+
+    def test_direct_user_permissions(self, project, component):
+        user = UserFactory()
+        assign_perm(READ_NODE, user, component)
+        assert readable(user) == {component.id: ReadableNode.IMPLICIT_READ}
+        assert viewable(user, True) == viewable(user, False)
+        assert component.id in viewable(user, True)
+        with mock.patch.object(node_module.settings, 'ENABLE_READABLE_NODES', True):
+            assert not Node.objects.get_nodes_for_user(user, READ_NODE).exists()
+
+        ReadableNode.objects.filter(user=user).delete()
+        assert rebuild_readable_nodes() >= 1
+        assert readable(user) == {component.id: ReadableNode.IMPLICIT_READ}
+
+        remove_perm(READ_NODE, user, component)
+        assert readable(user) == {}
+        assert viewable(user, True) == viewable(user, False)
+
+    def test_rebuild(self, project, component, component_creator):
+        expected = readable(project.creator)
+        ReadableNode.objects.all().delete()
+
+        assert rebuild_readable_nodes(batch_size=1) >= 2
+        assert readable(project.creator) == expected
+        assert readable(component_creator) == {component.id: ReadableNode.ADMIN}
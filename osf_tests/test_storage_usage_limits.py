@@ -1,9 +1,15 @@
+from datetime import timedelta
+from unittest import mock
+
 import pytest
+from django.utils import timezone
 
 from website.settings import StorageLimits, STORAGE_WARNING_THRESHOLD, STORAGE_LIMIT_PUBLIC, STORAGE_LIMIT_PRIVATE, GBs
-from osf_tests.factories import ProjectFactory
+from osf_tests.factories import PreprintFactory, ProjectFactory
 from api.caching import settings as cache_settings
 from api.caching.utils import storage_usage_cache
+from api.caching import tasks as caching_tasks
+from osf.models import AbstractNode, NodeStorageUsage
 
 @pytest.mark.django_db
 @pytest.mark.enable_enqueue_task
@@ -63,3 +69,56 @@ class TestStorageUsageLimits:
         storage_usage_cache.set(key, node.custom_storage_usage_limit_public * GBs - 1)
 
         assert node.storage_limit_status is StorageLimits.APPROACHING_PUBLIC
+
+    def test_limit_read_from_counter_on_cache_miss(self, node):
+        NodeStorageUsage.set_total(node, int(STORAGE_LIMIT_PUBLIC * GBs))
+        key = cache_settings.STORAGE_USAGE_KEY.format(target_id=node._id)
+        storage_usage_cache.delete(key)
+
+        assert node.storage_limit_status is StorageLimits.OVER_PUBLIC
+        assert storage_usage_cache.get(key) == int(STORAGE_LIMIT_PUBLIC * GBs)
+
+    def test_counter_add(self, node):
+        assert NodeStorageUsage.add(node, 100) is None
+
+        NodeStorageUsage.set_total(node, 100)
+        assert NodeStorageUsage.add(node, 50) == 150
+        assert NodeStorageUsage.add(node, -500) == 0
+        assert NodeStorageUsage.get_total(node) == 0
+
+    def test_prefetch_storage_usage(self, node, django_assert_num_queries):
+        cached, counted, uncalculated = ProjectFactory(), ProjectFactory(), node
+        storage_usage_cache.set(cache_settings.STORAGE_USAGE_KEY.format(target_id=cached._id), 10)
+        NodeStorageUsage.set_total(counted, 20)
+        storage_usage_cache.delete(cache_settings.STORAGE_USAGE_KEY.format(target_id=counted._id))
+
+        with mock.patch.object(caching_tasks, 'update_storage_usage') as mock_update:
+            AbstractNode.prefetch_storage_usage([cached, counted, uncalculated])
+        mock_update.assert_called_once_with(uncalculated)
+
+        with django_assert_num_queries(0):
+            assert cached.storage_usage == 10
+            assert counted.storage_usage == 20
+            assert uncalculated.storage_limit_status is StorageLimits.NOT_CALCULATED
+        assert storage_usage_cache.get(cache_settings.STORAGE_USAGE_KEY.format(target_id=counted._id)) == 20
+
+    def test_stale_counter_served_while_recounted(self, node):
+        NodeStorageUsage.set_total(node, 30)
+        NodeStorageUsage.objects.filter(node=node).update(
+            reconciled=timezone.now() - caching_tasks.settings.STORAGE_USAGE_REVALIDATE_AFTER - timedelta(hours=1),
+        )
+        storage_usage_cache.delete(cache_settings.STORAGE_USAGE_KEY.format(target_id=node._id))
+
+        with mock.patch.object(caching_tasks, 'update_storage_usage') as mock_update:
+            assert node.storage_usage == 30
+        mock_update.assert_called_once_with(node)
+
+    def test_preprint_total_does_not_use_node_counters(self):
+        preprint = PreprintFactory()
+        node = AbstractNode.objects.filter(pk=preprint.pk).first() or ProjectFactory(id=preprint.pk)
+        NodeStorageUsage.set_total(node, 1234)
+        storage_usage_cache.clear()
+
+        assert caching_tasks.get_storage_usage_total(preprint) == caching_tasks.compute_storage_usage_total(preprint)
+        assert NodeStorageUsage.get_total(node) == 1234
+        assert caching_tasks.get_storage_usage_total(node) == 1234
@@ -1,26 +1,37 @@
 #!/usr/bin/env python3
-"""Generate a sitemap for osf.io"""
+"""Generate a sitemap for osf.io
+
+Public nodes and preprints are split into shards by id (the base guid's, for preprints). Each shard
+is rendered to a part file holding one <url> element per line, by a pool of worker processes when
+more than one is configured. The sitemap files are then streamed from the parts, so memory use
+doesn't grow with the number of urls.
+
+Part files are kept along with a manifest of each shard's fingerprint (how many objects it holds,
+their ids and when the latest of them was modified). The next run only renders the shards whose
+fingerprint changed, unless run with --full.
+"""
+import argparse
 import boto3
 import datetime
 import gzip
+import json
+import multiprocessing
 import os
 import shutil
-from urllib.parse import urlparse, urljoin
-import xml
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape
 
 import django
-from django.contrib.sitemaps.views import sitemap
-
 django.setup()
 import logging
 import tempfile
 
 from framework import sentry
 from framework.celery_tasks import app as celery_app
-from django.db.models import Q, F, OuterRef, Subquery
-from osf.models import OSFUser, AbstractNode, Preprint, PreprintProvider
+from django.db import connections
+from django.db.models import Count, F, Max, Sum
+from osf.models import AbstractNode, Preprint
 from osf.models.spam import SpamStatus
-from osf.utils.workflows import DefaultStates
 from scripts import utils as script_utils
 from website import settings
 from website.app import init_app
@@ -28,12 +39,215 @@ from website.app import init_app
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+SECTIONS = ('node', 'preprint')
+MANIFEST_NAME = 'manifest.json'
 
-class Sitemap:
-    def __init__(self):
+
+def public_nodes():
+    """AbstractNode urls (Nodes and Registrations, no Collections)"""
+    return (AbstractNode.objects
+        .filter(is_public=True, is_deleted=False, retraction_id__isnull=True)
+        .exclude(type__in=['osf.collection'], spam_status__in=[SpamStatus.SPAM, SpamStatus.FLAGGED]))
+
+
+def published_preprints():
+    return Preprint.objects.filter(
+        date_published__isnull=False).exclude(spam_status__in=[SpamStatus.SPAM, SpamStatus.FLAGGED])
+
+
+# The field each section is sharded on. All versions of a preprint share a base guid, so they land in one shard.
+SHARD_FIELDS = {
+    'node': 'id',
+    'preprint': 'versioned_guids__guid_id',
+}
+SECTION_QUERYSETS = {
+    'node': public_nodes,
+    'preprint': published_preprints,
+}
+
+
+def shard_fingerprints(section):
+    """Return a dict of shard number -> fingerprint of the objects in that shard of `section`"""
+    field = SHARD_FIELDS[section]
+    rows = (SECTION_QUERYSETS[section]()
+        .annotate(shard=F(field) / settings.SITEMAP_SHARD_SIZE)
+        .order_by()
+        .values('shard')
+        .annotate(count=Count('id'), id_sum=Sum('id'), last_modified=Max('modified')))
+    return {
+        row['shard']: [row['count'], int(row['id_sum']), row['last_modified'].isoformat()]
+        for row in rows
+    }
+
+
+def url_element(config):
+    return '<url>' + ''.join(f'<{tag}>{escape(text)}</{tag}>' for tag, text in config.items()) + '</url>\n'
+
+
+def node_urls(shard, log_error):
+    low, high = shard * settings.SITEMAP_SHARD_SIZE, (shard + 1) * settings.SITEMAP_SHARD_SIZE
+    objs = (public_nodes()
+        .filter(id__gte=low, id__lt=high)
+        .values('guids___id', 'modified')
+        .iterator(chunk_size=settings.SITEMAP_QUERY_CHUNK_SIZE))
+    for obj in objs:
+        try:
+            yield url_element({
+                **settings.SITEMAP_NODE_CONFIG,
+                'loc': urljoin(settings.DOMAIN, '/{}/overview'.format(obj['guids___id'])),
+                'lastmod': obj['modified'].strftime('%Y-%m-%d'),
+            })
+        except Exception as e:
+            log_error('NODE', obj['guids___id'], e)
+
+
+def preprint_urls(shard, log_error):
+    low, high = shard * settings.SITEMAP_SHARD_SIZE, (shard + 1) * settings.SITEMAP_SHARD_SIZE
+    objs = (published_preprints()
+        .filter(versioned_guids__guid_id__gte=low, versioned_guids__guid_id__lt=high)
+        .select_related('provider')
+        .order_by(
+            'versioned_guids__guid_id',
+            '-is_published',
+            '-versioned_guids__version'
+        ).distinct('versioned_guids__guid_id')
+        .iterator(chunk_size=settings.SITEMAP_QUERY_CHUNK_SIZE))
+    for obj in objs:
+        try:
+            preprint_date = obj.modified.strftime('%Y-%m-%d')
+            preprint_url = os.path.join('preprints', obj.provider._id, obj._id)
+            yield url_element({
+                **settings.SITEMAP_PREPRINT_CONFIG,
+                'loc': urljoin(settings.DOMAIN, preprint_url),
+                'lastmod': preprint_date,
+            })
+
+            # Preprint file urls
+            if not obj.is_retracted:
+                # Withdrawn preprints may be viewed but not downloaded
+                try:
+                    yield url_element({
+                        **settings.SITEMAP_PREPRINT_FILE_CONFIG,
+                        'loc': urljoin(
+                            settings.DOMAIN,
+                            os.path.join(
+                                'download',
+                                obj._id,
+                                '?format=pdf'
+                            )
+                        ),
+                        'lastmod': preprint_date,
+                    })
+                except Exception as e:
+                    log_error(obj.primary_file, obj.primary_file._id, e)
+
+        except Exception as e:
+            log_error(obj, obj._id, e)
+
+
+SECTION_URLS = {
+    'node': node_urls,
+    'preprint': preprint_urls,
+}
+
+
+def part_path(parts_dir, section, shard):
+    return os.path.join(parts_dir, f'{section}_{shard}.part')
+
+
+def write_shard(parts_dir, section, shard):
+    """Render one shard to its part file. Runs in the worker processes.
+    Returns the section, the shard, how many urls and errors it had, and the first errors.
+    """
+    errors = []
+
+    def log_error(obj, obj_id, error):
+        if not errors:
+            script_utils.add_file_logger(logger, __file__)
+        errors.append(str(error))
+        logger.info(f'Error on {obj}, {obj_id}:')
+        logger.exception(error)
+
+    path = part_path(parts_dir, section, shard)
+    url_count = 0
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        for line in SECTION_URLS[section](shard, log_error):
+            f.write(line)
+            url_count += 1
+    os.replace(path + '.tmp', path)
+    return section, shard, url_count, len(errors), errors[:10]
+
+
+def _write_shard(args):
+    return write_shard(*args)
+
+
+def _close_db_connections():
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+
+
+class SitemapWriter:
+    """Writes <url> lines to numbered sitemap files, and a gzipped copy of each, as they come
+    in, starting a new file every SITEMAP_URL_MAX urls.
+    """
+
+    def __init__(self, sitemap):
+        self.sitemap = sitemap
         self.sitemap_count = 0
+        self.url_count = 0
+        self.total_url_count = 0
+        self.files = None
+
+    def _open(self):
+        file_name = f'sitemap_{self.sitemap_count}.xml'
+        file_path = os.path.join(self.sitemap.sitemap_dir, file_name)
+        self.files = (
+            file_name,
+            file_path,
+            open(file_path, 'wb'),
+            gzip.open(file_path + '.gz', 'wb'),
+        )
+        self._write(f'<?xml version="1.0" encoding="utf-8"?>\n<urlset xmlns="{SITEMAP_NAMESPACE}">\n')
+        self.url_count = 0
+
+    def _write(self, text):
+        data = text.encode('utf-8')
+        self.files[2].write(data)
+        self.files[3].write(data)
+
+    def add(self, line):
+        if self.files is None:
+            self._open()
+        elif self.url_count >= settings.SITEMAP_URL_MAX:
+            self.close()
+            self._open()
+        self._write(line)
+        self.url_count += 1
+        self.total_url_count += 1
+
+    def close(self):
+        """Finishes the current file, if any"""
+        if self.files is None:
+            return
+        self._write('</urlset>\n')
+        file_name, file_path, f, f_gz = self.files
+        f.close()
+        f_gz.close()
+        self.files = None
+        print(f'Wrote `{file_path}` and its gzipped copy: url_count = {self.url_count}')
+        if settings.SITEMAP_TO_S3:
+            self.sitemap.ship_to_s3(file_name, file_path)
+            self.sitemap.ship_to_s3(file_name + '.gz', file_path + '.gz')
+        self.sitemap_count += 1
+
+
+class Sitemap:
+    def __init__(self, full=False, workers=None):
+        self.full = full
+        self.workers = workers or settings.SITEMAP_WORKERS
         self.errors = 0
-        self.new_doc()
         if not settings.SITEMAP_TO_S3:
             self.sitemap_dir = os.path.join(settings.STATIC_FOLDER, 'sitemaps')
             if not os.path.exists(self.sitemap_dir):
@@ -50,58 +264,15 @@ class Sitemap:
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
                 region_name='us-east-1'
             )
+        # Without SITEMAP_PARTS_DIR, parts only outlive the run when the sitemap directory does
+        self.parts_dir = settings.SITEMAP_PARTS_DIR or os.path.join(self.sitemap_dir, 'parts')
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self.writer = SitemapWriter(self)
 
     def cleanup(self):
         if settings.SITEMAP_TO_S3:
             shutil.rmtree(self.sitemap_dir)
 
-    def new_doc(self):
-        """Creates new sitemap document and resets the url_count."""
-        self.doc = xml.dom.minidom.Document()
-        self.urlset = self.doc.createElement('urlset')
-        self.urlset.setAttribute('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        self.doc.appendChild(self.urlset)
-        self.url_count = 0
-
-    def add_tag(self, name, text):
-        """Adds a tag to the current url"""
-        tag = self.doc.createElement(name)
-        self.url.appendChild(tag)
-        tag_text = self.doc.createTextNode(text)
-        tag.appendChild(tag_text)
-
-    def add_url(self, config):
-        """Adds a url to the current urlset"""
-        if self.url_count >= settings.SITEMAP_URL_MAX:
-            self.write_doc()
-            self.new_doc()
-        self.url = self.doc.createElement('url')
-        self.urlset.appendChild(self.url)
-
-        for k, v in config.items():
-            self.add_tag(k, v)
-        self.url_count += 1
-
-    def write_doc(self):
-        """Writes and gzips each sitemap xml file"""
-        file_name = f'sitemap_{str(self.sitemap_count)}.xml'
-        file_path = os.path.join(self.sitemap_dir, file_name)
-        zip_file_name = file_name + '.gz'
-        zip_file_path = file_path + '.gz'
-        print(f'Writing and gzipping `{file_path}`: url_count = {str(self.url_count)}')
-
-        xml_str = self.doc.toprettyxml(indent='  ', encoding='utf-8')
-        with open(file_path, 'wb') as f:
-            f.write(xml_str)
-
-        # Write zipped file
-        with open(file_path, 'rb') as f_in, gzip.open(zip_file_path, 'wb') as f_out:
-            shutil.copyfileobj(f_in, f_out)
-        if settings.SITEMAP_TO_S3:
-            self.ship_to_s3(file_name, file_path)
-            self.ship_to_s3(zip_file_name, zip_file_path)
-        self.sitemap_count += 1
-
     def ship_to_s3(self, name, path):
         data = open(path, 'rb')
         try:
@@ -114,149 +285,127 @@ class Sitemap:
 
     def write_sitemap_index(self):
         """Writes the index file for all of the sitemap files"""
-        doc = xml.dom.minidom.Document()
-        sitemap_index = self.doc.createElement('sitemapindex')
-        sitemap_index.setAttribute('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        doc.appendChild(sitemap_index)
-
-        for f in range(self.sitemap_count):
-            sitemap = doc.createElement('sitemap')
-            sitemap_index.appendChild(sitemap)
-
-            loc = doc.createElement('loc')
-            sitemap.appendChild(loc)
-            loc_text = self.doc.createTextNode(urljoin(settings.DOMAIN, f'sitemaps/sitemap_{str(f)}.xml'))
-            loc.appendChild(loc_text)
-
-            datemod = doc.createElement('lastmod')
-            sitemap.appendChild(datemod)
-            datemod_text = self.doc.createTextNode(datetime.datetime.now().strftime('%Y-%m-%d'))
-            datemod.appendChild(datemod_text)
-
         print('Writing `sitemap_index.xml`')
         file_name = 'sitemap_index.xml'
         file_path = os.path.join(self.sitemap_dir, file_name)
-        xml_str = doc.toprettyxml(indent='  ', encoding='utf-8')
-        with open(file_path, 'wb') as f:
-            f.write(xml_str)
+        lastmod = datetime.datetime.now().strftime('%Y-%m-%d')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<sitemapindex xmlns="{SITEMAP_NAMESPACE}">\n')
+            for i in range(self.writer.sitemap_count):
+                loc = urljoin(settings.DOMAIN, f'sitemaps/sitemap_{i}.xml')
+                f.write(f'<sitemap><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></sitemap>\n')
+            f.write('</sitemapindex>\n')
         if settings.SITEMAP_TO_S3:
             self.ship_to_s3(file_name, file_path)
 
-    def log_errors(self, obj, obj_id, error):
-        if not self.errors:
-            script_utils.add_file_logger(logger, __file__)
-        self.errors += 1
-        logger.info(f'Error on {obj}, {obj_id}:')
-        logger.exception(error)
-
-        if self.errors <= 10:
+    def log_errors(self, error_count, errors):
+        for error in errors[:max(10 - self.errors, 0)]:
             sentry.log_message(f'Sitemap Error: {error}')
+        self.errors += error_count
 
-        if self.errors == 1000:
+        if self.errors >= 1000:
             sentry.log_message('ERROR: generate_sitemap stopped execution after reaching 1000 errors. See logs for details.')
             raise Exception('Too many errors generating sitemap.')
 
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.parts_dir, MANIFEST_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest):
+        path = os.path.join(self.parts_dir, MANIFEST_NAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
+
+    def render_settings(self):
+        """What every part depends on besides its objects. Parts rendered with other settings are redone."""
+        return {
+            'domain': settings.DOMAIN,
+            'shard_size': settings.SITEMAP_SHARD_SIZE,
+            'configs': [
+                settings.SITEMAP_NODE_CONFIG,
+                settings.SITEMAP_PREPRINT_CONFIG,
+                settings.SITEMAP_PREPRINT_FILE_CONFIG,
+            ],
+        }
+
+    def update_parts(self):
+        """Render the shards that changed since the last run and drop those that are gone.
+        Returns the shards of each section, in order.
+        """
+        previous = self.load_manifest()
+        render_settings = json.loads(json.dumps(self.render_settings()))
+        full = self.full or previous.get('settings') != render_settings
+        previous_shards = {} if full else previous.get('shards', {})
+
+        shards = {section: shard_fingerprints(section) for section in SECTIONS}
+        manifest = {'settings': render_settings, 'shards': {}}
+        stale = []
+        for section, fingerprints in shards.items():
+            for shard, fingerprint in fingerprints.items():
+                key = f'{section}:{shard}'
+                manifest['shards'][key] = fingerprint
+                if previous_shards.get(key) != fingerprint or not os.path.exists(part_path(self.parts_dir, section, shard)):
+                    stale.append((self.parts_dir, section, shard))
+        for key in set(previous.get('shards', {})) - set(manifest['shards']):
+            section, shard = key.split(':')
+            if os.path.exists(part_path(self.parts_dir, section, shard)):
+                os.remove(part_path(self.parts_dir, section, shard))
+
+        total = sum(len(fingerprints) for fingerprints in shards.values())
+        print(f'Rendering {len(stale)} of {total} shards with {self.workers} worker(s)')
+        workers = self.workers
+        if workers > 1 and multiprocessing.current_process().daemon:
+            # e.g. a celery prefork worker, which may not have children of its own
+            logger.info('Running in a daemonic process, rendering shards in this process')
+            workers = 1
+        if workers > 1 and stale:
+            _close_db_connections()
+            with multiprocessing.get_context('fork').Pool(workers, initializer=_close_db_connections) as pool:
+                for section, shard, url_count, error_count, errors in pool.imap_unordered(_write_shard, stale):
+                    logger.info(f'Rendered {section} shard {shard}: {url_count} urls')
+                    self.log_errors(error_count, errors)
+        else:
+            for args in stale:
+                section, shard, url_count, error_count, errors = write_shard(*args)
+                logger.info(f'Rendered {section} shard {shard}: {url_count} urls')
+                self.log_errors(error_count, errors)
+
+        # Only record the new fingerprints once every stale part has been rendered
+        self.save_manifest(manifest)
+        return {section: sorted(fingerprints) for section, fingerprints in shards.items()}
+
     def generate(self):
         print('Generating Sitemap')
-
-        # Progress bar
-        progress = script_utils.Progress(precision=0)
+        shards = self.update_parts()
 
         # Static urls
-        progress.start(len(settings.SITEMAP_STATIC_URLS), 'STAT: ')
         for config in settings.SITEMAP_STATIC_URLS:
-            config['loc'] = urljoin(settings.DOMAIN, config['loc'])
-            self.add_url(config)
-            progress.increment()
-        progress.stop()
-
-        # # User urls
-        # objs = OSFUser.objects.filter(is_active=True).exclude(date_confirmed__isnull=True).values_list('guids___id', flat=True)
-        # progress.start(objs.count(), 'USER: ')
-        # for obj in objs:
-        #     try:
-        #         config = settings.SITEMAP_USER_CONFIG
-        #         config['loc'] = urljoin(settings.DOMAIN, f'/{obj}/')
-        #         self.add_url(config)
-        #     except Exception as e:
-        #         self.log_errors('USER', obj, e)
-        #     progress.increment()
-        # progress.stop()
-
-        # AbstractNode urls (Nodes and Registrations, no Collections)
-        objs = (AbstractNode.objects
-            .filter(is_public=True, is_deleted=False, retraction_id__isnull=True)
-            .exclude(type__in=['osf.collection'], spam_status__in=[SpamStatus.SPAM, SpamStatus.FLAGGED])
-            .values('guids___id', 'modified'))
-        progress.start(objs.count(), 'NODE: ')
-        for obj in objs:
-            try:
-                config = settings.SITEMAP_NODE_CONFIG
-                config['loc'] = urljoin(settings.DOMAIN, '/{}/overview'.format(obj['guids___id']))
-                config['lastmod'] = obj['modified'].strftime('%Y-%m-%d')
-                self.add_url(config)
-            except Exception as e:
-                self.log_errors('NODE', obj['guids___id'], e)
-            progress.increment()
-        progress.stop()
-        objs = Preprint.objects.filter(
-            date_published__isnull=False).exclude(spam_status__in=[SpamStatus.SPAM, SpamStatus.FLAGGED]).annotate(
-            most_recent_non_withdrawn=Subquery(
-                Preprint.objects.filter(
-                    guids=OuterRef('guids')
-                ).order_by('-versioned_guids__version').values('versioned_guids__version')[:1]
-            )
-        ).order_by(
-            'versioned_guids__guid_id',
-            '-is_published',
-            '-versioned_guids__version'
-        ).distinct('versioned_guids__guid_id')
+            self.writer.add(url_element({**config, 'loc': urljoin(settings.DOMAIN, config['loc'])}))
 
-        progress.start(len(objs) * 2, 'PREP: ')
-        for obj in objs:
-            try:
-                preprint_date = obj.modified.strftime('%Y-%m-%d')
-                config = settings.SITEMAP_PREPRINT_CONFIG
-                preprint_url = os.path.join('preprints', obj.provider._id, obj._id)
-                config['loc'] = urljoin(settings.DOMAIN, preprint_url)
-                config['lastmod'] = preprint_date
-                self.add_url(config)
-
-                # Preprint file urls
-                if not obj.is_retracted:
-                    # Withdrawn preprints may be viewed but not downloaded
-                    try:
-                        file_config = settings.SITEMAP_PREPRINT_FILE_CONFIG
-                        file_config['loc'] = urljoin(
-                            settings.DOMAIN,
-                            os.path.join(
-                                'download',
-                                obj._id,
-                                '?format=pdf'
-                            )
-                        )
-                        file_config['lastmod'] = preprint_date
-                        self.add_url(file_config)
-                    except Exception as e:
-                        self.log_errors(obj.primary_file, obj.primary_file._id, e)
+        # # User urls are not included:
+        # OSFUser.objects.filter(is_active=True).exclude(date_confirmed__isnull=True)
 
-            except Exception as e:
-                self.log_errors(obj, obj._id, e)
-            progress.increment(2)
-        progress.stop()
+        for section in SECTIONS:
+            for shard in shards[section]:
+                with open(part_path(self.parts_dir, section, shard), encoding='utf-8') as f:
+                    for line in f:
+                        self.writer.add(line)
 
         # Final write
-        self.write_doc()
+        self.writer.close()
         # Create index file
         self.write_sitemap_index()
 
         # TODO: once the sitemap is validated add a ping to google with sitemap index file location
-        # TODO: server side cursor query wrapper might be useful as the index gets larger.
         # Sitemap indexable limit check
-        if self.sitemap_count > settings.SITEMAP_INDEX_MAX * .90:  # 10% of urls remaining
+        if self.writer.sitemap_count > settings.SITEMAP_INDEX_MAX * .90:  # 10% of urls remaining
             sentry.log_message('WARNING: Max sitemaps nearly reached.')
-        print(f'Total url_count = {(self.sitemap_count - 1) * settings.SITEMAP_URL_MAX + self.url_count}')
-        print(f'Total sitemap_count = {str(self.sitemap_count)}')
+        print(f'Total url_count = {self.writer.total_url_count}')
+        print(f'Total sitemap_count = {str(self.writer.sitemap_count)}')
         if self.errors:
             sentry.log_message('WARNING: Generate sitemap encountered errors. See logs for details.')
             print(f'Total errors = {str(self.errors)}')
@@ -264,12 +413,16 @@ class Sitemap:
             print('No errors')
 
 @celery_app.task(name='scripts.generate_sitemap')
-def main():
+def main(full=False, workers=None):
     init_app(routes=False)  # Sets the storage backends on all models
-    sitemap = Sitemap()
+    sitemap = Sitemap(full=full, workers=workers)
     sitemap.generate()
     sitemap.cleanup()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the sitemap files.')
+    parser.add_argument('--full', action='store_true', help='Render every shard, not only those that changed')
+    parser.add_argument('--workers', type=int, default=None, help='Processes rendering shards (default: SITEMAP_WORKERS)')
+    args = parser.parse_args()
     init_app(set_backends=True, routes=False)
-    main()
+    main(full=args.full, workers=args.workers)
@@ -1,6 +1,10 @@
+from unittest import mock
+
 import pytest
 from django.utils import timezone
 
+from api.citations.utils import render_citation, render_citations
+
 from framework.auth.core import Auth
 from osf_tests.factories import (
     fake,
@@ -14,6 +18,7 @@ from osf_tests.factories import (
 from scripts import parse_citation_styles
 from tests.base import OsfTestCase
 from osf.models import OSFUser
+from website import settings
 from website.citations.utils import datetime_to_csl
 from website.util import api_url_for
 
@@ -90,6 +95,30 @@ class CitationsNodeTestCase(OsfTestCase):
 
         assert node.csl['author'] == expected_authors
 
+class RenderCitationsTestCase(OsfTestCase):
+    def setUp(self):
+        super().setUp()
+        self.nodes = [ProjectFactory(title=f'Project {i}') for i in range(3)]
+
+    @mock.patch.object(settings, 'ENABLE_CITATION_CACHE', False)
+    def test_batch_matches_single_renders(self):
+        for style in ('chicago-author-date', 'ieee'):
+            single = {node._id: render_citation(node, style) for node in self.nodes}
+            assert render_citations(self.nodes, style) == single
+
+    def test_cache_follows_csl_changes(self):
+        node = self.nodes[0]
+        before = render_citation(node, 'apa')
+        assert render_citation(node, 'apa') == before
+
+        creator = node.creator
+        creator.family_name = 'Renamed'
+        creator.save()
+        after = render_citation(node, 'apa')
+        assert after != before
+        assert 'Renamed' in after
+
+
 class CitationsUserTestCase(OsfTestCase):
 
     def test_registered_user_csl(self):
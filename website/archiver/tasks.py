@@ -225,9 +225,18 @@ def stat_addon(self, addon_short_name, job_pk):
     if hasattr(src_addon, 'configured') and not src_addon.configured:
         # Addon enabled but not configured - no file trees, nothing to archive.
         return AggregateStatResult(src_addon._id, addon_short_name)
+    # Resume from what an earlier attempt listed before it failed
+    target = job.get_target(addon_short_name)
+    partial_file_tree = target.stat_result.get('partial_file_tree') if target else None
+    resume_kwargs = {'filenode': partial_file_tree} if partial_file_tree else {}
     try:
-        file_tree = src_addon._get_file_tree(user=user, version=version)
+        file_tree = src_addon._get_file_tree(user=user, version=version, **resume_kwargs)
     except HTTPError as e:
+        partial_file_tree = getattr(e, 'partial_file_tree', None)
+        if target and partial_file_tree and e.code >= 500 and self.request.retries < self.max_retries:
+            target.stat_result = {'partial_file_tree': partial_file_tree}
+            target.save()
+            raise self.retry(exc=e)
         dst.archive_job.update_target(
             addon_short_name,
             ARCHIVER_NETWORK_ERROR,
@@ -458,13 +467,10 @@ def archive_success(self, dst_pk, job_pk):
 
     :param str dst_pk: primary key of registration Node
 
-    note:: At first glance this task makes redundant calls to utils.get_file_map (which
-    returns a generator yielding  (<sha256>, <file_metadata>) pairs) on the dst Node. Two
-    notes about utils.get_file_map: 1) this function memoizes previous results to reduce
-    overhead and 2) this function returns a generator that lazily fetches the file metadata
-    of child Nodes (it is possible for a selected file to belong to a child Node) using a
-    non-recursive DFS. Combined this allows for a relatively efficient implementation with
-    seemingly redundant calls.
+    note:: utils.get_file_maps returns a generator that lazily fetches the file map (files
+    indexed by sha256) of the dst Node and then of each of its child Nodes (it is possible
+    for a selected file to belong to a child Node). File maps are cached, within a bound,
+    until this task finishes.
     """
     create_app_context()
     dst = AbstractNode.load(dst_pk)
@@ -484,6 +490,8 @@ def archive_success(self, dst_pk, job_pk):
             },
         )
         self.retry(exc=err)
+    finally:
+        utils.clear_file_map_cache()
 
     job = self.load_archive_job(job_pk)
     if not job.sent:
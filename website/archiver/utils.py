@@ -1,7 +1,6 @@
-import functools
 import unicodedata
 
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 from django.db.models import CharField, OuterRef, Subquery
 from framework.auth import Auth
 from framework.utils import sanitize_html
@@ -211,43 +210,58 @@ def before_archive(node, user):
     job.set_targets()
 
 def _do_get_file_map(file_tree):
-    """Reduces a tree of folders and files into a list of (<sha256>, <file_metadata>) pairs
+    """Reduces a tree of folders and files into a dict mapping each <sha256> to the list of
+    <file_metadata> of the files with that hash
     """
-    file_map = []
-    stack = [file_tree]
-    while len(stack):
-        tree_node = stack.pop(0)
+    file_map = defaultdict(list)
+    queue = deque([file_tree])
+    while queue:
+        tree_node = queue.popleft()
         if tree_node['kind'] == 'file':
-            file_map.append((tree_node['extra']['hashes']['sha256'], tree_node))
+            file_map[tree_node['extra']['hashes']['sha256']].append(tree_node)
         else:
-            stack = stack + tree_node['children']
+            queue.extend(tree_node['children'])
+    return dict(file_map)
+
+# node _id -> (file map, number of files in it), least recently used first. Bounded to
+# ARCHIVE_FILE_MAP_CACHE_MAX_FILES files, and cleared by the tasks using it when they finish.
+_file_map_cache = OrderedDict()
+
+def load_file_map(node):
+    """The file map of `node`'s osfstorage, see `_do_get_file_map`"""
+    from osf.models import OSFUser
+    if node._id in _file_map_cache:
+        _file_map_cache.move_to_end(node._id)
+        return _file_map_cache[node._id][0]
+
+    osf_storage = node.get_addon('osfstorage')
+    file_tree = osf_storage._get_file_tree(user=OSFUser.load(list(node.admin_contributor_or_group_member_ids)[0]))
+    file_map = _do_get_file_map(file_tree)
+    _file_map_cache[node._id] = (file_map, sum(len(files) for files in file_map.values()))
+
+    cached_files = sum(size for _, size in _file_map_cache.values())
+    while cached_files > settings.ARCHIVE_FILE_MAP_CACHE_MAX_FILES and len(_file_map_cache) > 1:
+        _, (_, size) = _file_map_cache.popitem(last=False)
+        cached_files -= size
     return file_map
 
-def _memoize_get_file_map(func):
-    cache = {}
-
-    @functools.wraps(func)
-    def wrapper(node):
-        from osf.models import OSFUser
-        if node._id not in cache:
-            osf_storage = node.get_addon('osfstorage')
-            file_tree = osf_storage._get_file_tree(user=OSFUser.load(list(node.admin_contributor_or_group_member_ids)[0]))
-            cache[node._id] = _do_get_file_map(file_tree)
-        return func(node, cache[node._id])
-    return wrapper
-
-@_memoize_get_file_map
-def get_file_map(node, file_map):
-    """
-    note:: file_map is injected implicitly by the decorator; this method is called like:
+def clear_file_map_cache():
+    _file_map_cache.clear()
 
-    get_file_map(node)
+def get_file_maps(node):
+    """Yields (<node _id>, <file map>) for `node` and each of its primary descendants,
+    loading each file map only once the previous ones have been used
     """
-    for (key, value) in file_map:
-        yield (key, value, node._id)
+    yield node._id, load_file_map(node)
     for child in node.nodes_primary:
-        for key, value, node_id in get_file_map(child):
-            yield (key, value, node_id)
+        yield from get_file_maps(child)
+
+def get_file_map(node):
+    """Yields (<sha256>, <file_metadata>, <node _id>) for each file of `node` and its primary descendants"""
+    for node_id, file_map in get_file_maps(node):
+        for sha256, files in file_map.items():
+            for file_metadata in files:
+                yield (sha256, file_metadata, node_id)
 
 
 def get_title_for_question(schema, qid):
@@ -310,42 +324,42 @@ def _get_file_response_hashes(registration, file_input_qids):
 
 
 def _get_updated_file_references(registration, file_response_keys_by_hash):
-    '''Loop through archived files to get the updated references for the registration responses.
+    '''Look up the archived files of the registration's file responses to get their updated references.
 
     Returns a dictionary mapping each qid to its list of updated responses
     '''
     from osf.models import Guid
     original_responses = registration.schema_responses.get().all_responses
+    # (qid, sha256) -> the original response entry for the file
+    original_entries = {}
+    for qid in {qid for qids in file_response_keys_by_hash.values() for qid in qids}:
+        for entry in original_responses.get(qid, []):
+            original_entries.setdefault((qid, entry['file_hashes']['sha256']), entry)
+
     updated_file_responses = defaultdict(list)
-    previous_node_id = ''
-    for file_sha, file_info, archived_node_id in get_file_map(registration):
-        # cache the guid of the source project for the current file tree
-        if archived_node_id != previous_node_id:
-            previous_node_id = archived_node_id
-            source_project_id = Guid.objects.get(_id=archived_node_id).referent.registered_from._id
-
-        if file_sha in file_response_keys_by_hash:
-            response_value = _make_file_response(file_info, archived_node_id)
-            for qid in file_response_keys_by_hash[file_sha]:
-                # Handle the case where the same file exists in multiple components
-                original_response = _get_response_entry_for_hash(original_responses, qid, file_sha)
-                normalized_original_file_name = normalize_unicode_filenames(original_response['file_name'])[0]
-                if (
-                    source_project_id in original_response['file_urls']['html']
-                    and response_value['file_name'] == normalized_original_file_name
-                ):
-                    updated_file_responses[qid].append(response_value)
+    for archived_node_id, file_map in get_file_maps(registration):
+        matched_hashes = [file_sha for file_sha in file_response_keys_by_hash if file_sha in file_map]
+        if not matched_hashes:
+            continue
+        # the guid of the source project for the current file tree
+        source_project_id = Guid.objects.get(_id=archived_node_id).referent.registered_from._id
+
+        for file_sha in matched_hashes:
+            for file_info in file_map[file_sha]:
+                response_value = _make_file_response(file_info, archived_node_id)
+                for qid in file_response_keys_by_hash[file_sha]:
+                    # Handle the case where the same file exists in multiple components
+                    original_response = original_entries[(qid, file_sha)]
+                    normalized_original_file_name = normalize_unicode_filenames(original_response['file_name'])[0]
+                    if (
+                        source_project_id in original_response['file_urls']['html']
+                        and response_value['file_name'] == normalized_original_file_name
+                    ):
+                        updated_file_responses[qid].append(response_value)
 
     return updated_file_responses
 
 
-def _get_response_entry_for_hash(response_dict, qid, file_hash):
-    for entry in response_dict[qid]:
-        if entry['file_hashes']['sha256'] == file_hash:
-            return entry
-    return None
-
-
 def _make_file_response(file_info, parent_guid):
     '''Generate the dictionary for an entry in a 'file-input' block response.'''
     archived_file_id = file_info['path'].lstrip('/')
@@ -367,14 +381,18 @@ def _make_file_response(file_info, parent_guid):
 def _validate_updated_responses(registration, file_input_qids, updated_responses):
     '''Confirm that every file response has an updated value and that nothing fishy happened.'''
     schema = registration.registration_schema
+    updated_hashes = {
+        (qid, entry['file_hashes']['sha256'])
+        for qid, entries in updated_responses.items()
+        for entry in entries
+    }
     missing_responses = []
     for qid in file_input_qids:
         question_title = ''
         for entry in registration.registration_responses.get(qid, []):
             file_name = entry['file_name']
             file_hash = entry['file_hashes']['sha256']
-            matching_entry = _get_response_entry_for_hash(updated_responses, qid, file_hash)
-            if not matching_entry:
+            if (qid, file_hash) not in updated_hashes:
                 question_title = question_title or get_title_for_question(schema, qid)
                 missing_responses.append({'file_name': file_name, 'question_title': question_title})
 
@@ -2,9 +2,8 @@ import markdown
 from django.utils import timezone
 from flask import request
 
-from api.caching.tasks import ban_url
+from api.caching.tasks import queue_ban
 from osf.models import Guid
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
 from website import settings
 from addons.base.signals import file_updated
 from osf.models import BaseFileNode, TrashedFileNode
@@ -111,12 +110,12 @@ def is_reply(target):
 
 def _update_comments_timestamp(auth, node, page=Comment.OVERVIEW, root_id=None):
     if node.is_contributor_or_group_member(auth.user):
-        enqueue_postcommit_task(ban_url, (node, ), {}, celery=False, once_per_request=True)
+        queue_ban(node)
         if root_id is not None:
             guid_obj = Guid.load(root_id)
             if guid_obj is not None:
                 # FIXME: Doesn't work because we're not using Vanish anymore
-                # enqueue_postcommit_task(ban_url, (self.get_node(),), {}, celery=False, once_per_request=True)
+                # queue_ban(self.get_node())
                 pass
 
         # update node timestamp
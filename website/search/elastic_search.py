@@ -1,22 +1,35 @@
 import copy
-import functools
 import logging
+import threading
 import unicodedata
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from itertools import islice
 from framework import sentry
 
+from celery import current_task
+from celery.signals import task_postrun
 from django.apps import apps
-from django.core.paginator import Paginator
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.db.models import F, Max, Q, QuerySet, prefetch_related_objects
+from django.utils.functional import cached_property
 from elasticsearch2 import (ConnectionError, Elasticsearch, NotFoundError,
                             RequestError, TransportError, helpers)
+from flask import has_app_context
+from api.base.api_globals import api_globals
 from framework.celery_tasks import app as celery_app
 from framework.database import paginated
+from framework.postcommit_tasks.handlers import enqueue_postcommit_task, postcommit_queue
 from osf.models import AbstractNode
+from osf.models import Contributor
 from osf.models import GuidMetadataRecord
+from osf.models import Institution
+from osf.models import NodeLicenseRecord
+from osf.models import NodeRelation
 from osf.models import Preprint
 from osf.models import SpamStatus
-from addons.wiki.models import WikiPage
+from osf.models import Tag
+from addons.wiki.models import WikiVersion
 from osf.utils.sanitize import unescape_entities
 from osf.utils.workflows import CollectionSubmissionStates
 from website import settings
@@ -116,6 +129,169 @@ def requires_search(func):
     return wrapped
 
 
+# Single-document writes are collected and sent together through `helpers.bulk`:
+# during a request, once the request has committed (via the postcommit queue); during a
+# celery task, once the task finishes; within `buffered_search_updates()`, when the block
+# exits. Anywhere else they are sent straight away. Only the last write to each document is
+# sent. Whether a flush forces a refresh is set by ELASTIC_REFRESH_ON_FLUSH; otherwise
+# documents become searchable after the index's ELASTIC_REFRESH_INTERVAL.
+
+_local = threading.local()
+
+
+def _merge_update(previous, update):
+    """Fold a partial `update` action into an earlier index or update action on the same document"""
+    if previous['_op_type'] == 'index':
+        return dict(previous, _source={**previous['_source'], **update['doc']})
+    return dict(
+        update,
+        doc={**previous['doc'], **update['doc']},
+        doc_as_upsert=previous.get('doc_as_upsert', False) or update.get('doc_as_upsert', False),
+    )
+
+
+class IndexingBuffer:
+    """Pending search writes, keyed by document"""
+
+    def __init__(self):
+        self.actions = OrderedDict()
+        self.flushed = False
+
+    def __len__(self):
+        return len(self.actions)
+
+    def add(self, action):
+        key = (action['_index'], action['_type'], action['_id'])
+        previous = self.actions.pop(key, None)
+        if previous is not None and action['_op_type'] == 'update' and previous['_op_type'] != 'delete':
+            action = _merge_update(previous, action)
+        self.actions[key] = action
+
+    def flush(self, refresh=None):
+        actions = list(self.actions.values())
+        self.actions.clear()
+        self.flushed = True
+        return send_actions(actions, refresh=refresh)
+
+
+@requires_search
+def send_actions(actions, refresh=None):
+    """Send bulk `actions`, ignoring deletes of documents that were already gone.
+    Raises SearchException if any other action failed.
+
+    :param actions: an iterable of actions, consumed lazily in chunks
+    """
+    if isinstance(actions, list) and not actions:
+        return 0
+    if refresh is None:
+        refresh = settings.ELASTIC_REFRESH_ON_FLUSH
+    success, errors = helpers.bulk(
+        client(),
+        actions,
+        refresh=refresh,
+        raise_on_error=False,
+        chunk_size=settings.ELASTIC_BULK_CHUNK_SIZE,
+    )
+    errors = [
+        error for error in errors
+        if not (error.get('delete', {}).get('status') == 404)
+    ]
+    if errors:
+        logger.error(f'{len(errors)} search updates failed: {errors[:5]}')
+        raise exceptions.SearchException(errors)
+    return success
+
+
+def flush_request_search_updates(buffer):
+    try:
+        buffer.flush()
+    except exceptions.SearchException as e:
+        # The request has already committed; don't fail it over the search index
+        sentry.log_exception(e)
+
+
+def _get_request_buffer():
+    for task in postcommit_queue().values():
+        if getattr(task, 'func', None) is flush_request_search_updates:
+            buffer = task.args[0]
+            return None if buffer.flushed else buffer
+    buffer = IndexingBuffer()
+    enqueue_postcommit_task(flush_request_search_updates, (buffer,), {}, celery=False, once_per_request=True)
+    return None if buffer.flushed else buffer
+
+
+def _get_buffer():
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        return buffer
+    if has_app_context() or getattr(api_globals, 'request', None) is not None:
+        return _get_request_buffer()
+    if current_task:
+        _local.buffer = _local.task_buffer = IndexingBuffer()
+        return _local.buffer
+    return None
+
+
+def _write(action):
+    buffer = _get_buffer()
+    if buffer is None:
+        # Nothing to batch with, and nothing will flush later: send it now and make it visible
+        send_actions([action], refresh=True)
+    else:
+        buffer.add(action)
+
+
+def _write_many(actions):
+    buffer = _get_buffer()
+    if buffer is None:
+        send_actions(actions, refresh=True)
+    else:
+        for action in actions:
+            buffer.add(action)
+
+
+def index_doc(index, doc_type, id_, body):
+    _write({'_op_type': 'index', '_index': index, '_type': doc_type, '_id': id_, '_source': body})
+
+
+def remove_doc(index, doc_type, id_):
+    _write({'_op_type': 'delete', '_index': index, '_type': doc_type, '_id': id_})
+
+
+def upsert_doc(index, doc_type, id_, doc):
+    _write({'_op_type': 'update', '_index': index, '_type': doc_type, '_id': id_, 'doc': doc, 'doc_as_upsert': True})
+
+
+@contextmanager
+def buffered_search_updates():
+    """Collect the search writes made in this block and send them together when it exits.
+    Nested blocks share the outermost buffer.
+    """
+    if getattr(_local, 'buffer', None) is not None:
+        yield _local.buffer
+        return
+    _local.buffer = IndexingBuffer()
+    try:
+        yield _local.buffer
+        buffer, _local.buffer = _local.buffer, None
+        buffer.flush()
+    finally:
+        _local.buffer = None
+
+
+@task_postrun.connect
+def _flush_task_search_updates(**kwargs):
+    buffer = getattr(_local, 'task_buffer', None)
+    _local.task_buffer = None
+    if buffer is not None:
+        if getattr(_local, 'buffer', None) is buffer:
+            _local.buffer = None
+        try:
+            buffer.flush()
+        except exceptions.SearchException as e:
+            sentry.log_exception(e)
+
+
 @requires_search
 def get_aggregations(query, doc_type):
     query['aggregations'] = {
@@ -331,7 +507,8 @@ def update_node_async(self, node_id, index=None, bulk=False):
     AbstractNode = apps.get_model('osf.AbstractNode')
     node = AbstractNode.load(node_id)
     try:
-        update_node(node=node, index=index, bulk=bulk, async_update=True)
+        with buffered_search_updates():
+            update_node(node=node, index=index, bulk=bulk, async_update=True)
     except Exception as exc:
         self.retry(exc=exc)
 
@@ -340,7 +517,8 @@ def update_preprint_async(self, preprint_id, index=None, bulk=False):
     Preprint = apps.get_model('osf.Preprint')
     preprint = Preprint.load(preprint_id)
     try:
-        update_preprint(preprint=preprint, index=index, bulk=bulk, async_update=True)
+        with buffered_search_updates():
+            update_preprint(preprint=preprint, index=index, bulk=bulk, async_update=True)
     except Exception as exc:
         self.retry(exc=exc)
 
@@ -349,30 +527,145 @@ def update_user_async(self, user_id, index=None):
     OSFUser = apps.get_model('osf.OSFUser')
     user = OSFUser.objects.get(id=user_id)
     try:
-        update_user(user, index)
+        with buffered_search_updates():
+            update_user(user, index)
     except Exception as exc:
         self.retry(exc)
 
-def serialize_node(node, category):
-    parent_id = node.parent_id
+class NodeSearchBatch:
+    """The related rows needed to build search documents for a batch of nodes.
+
+    Each relation is loaded for the whole batch with one query, the first time it is used.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        prefetch_related_objects(self.nodes, 'guids')
+        self.node_ids = [node.id for node in self.nodes]
+
+    @cached_property
+    def contributors(self):
+        """node id -> [(fullname, guid, is_active)] of visible contributors, in order"""
+        contributors = defaultdict(list)
+        rows = (
+            Contributor.objects.filter(node_id__in=self.node_ids, visible=True)
+            .order_by('node_id', '_order')
+            .values_list('node_id', 'user__fullname', 'user__guids___id', 'user__is_active')
+        )
+        for node_id, fullname, guid, is_active in rows:
+            contributors[node_id].append((fullname, guid, is_active))
+        return contributors
+
+    @cached_property
+    def all_tags(self):
+        """node id -> [(name, system)] of its tags, system tags included"""
+        tags = defaultdict(list)
+        rows = (
+            Tag.objects.filter(abstractnode_tagged__id__in=self.node_ids)
+            .values_list('abstractnode_tagged__id', 'name', 'system')
+        )
+        for node_id, name, system in rows:
+            tags[node_id].append((name, system))
+        return tags
+
+    @cached_property
+    def tags(self):
+        """node id -> names of its non-system tags"""
+        tags = defaultdict(list)
+        for node_id, node_tags in self.all_tags.items():
+            tags[node_id] = [name for name, system in node_tags if not system]
+        return tags
+
+    @cached_property
+    def institutions(self):
+        institutions = defaultdict(list)
+        for node_id, name in Institution.objects.filter(nodes__id__in=self.node_ids).values_list('nodes__id', 'name'):
+            institutions[node_id].append(name)
+        return institutions
+
+    @cached_property
+    def parent_guids(self):
+        return dict(
+            NodeRelation.objects.filter(child_id__in=self.node_ids, is_node_link=False)
+            .values_list('child_id', 'parent__guids___id')
+        )
+
+    @cached_property
+    def licenses(self):
+        license_ids = AbstractNode.get_license_record_ids(self.nodes)
+        records = NodeLicenseRecord.objects.select_related('node_license').in_bulk(set(license_ids.values()))
+        return {node_id: records.get(record_id) for node_id, record_id in license_ids.items()}
+
+    @cached_property
+    def metadata_records(self):
+        return {
+            record.guid._id: record
+            for record in GuidMetadataRecord.objects.filter(guid___id__in=[node._id for node in self.nodes]).select_related('guid')
+        }
+
+    @cached_property
+    def wikis(self):
+        """node id -> latest versions of its wiki pages"""
+        wikis = defaultdict(list)
+        versions = (
+            WikiVersion.objects.annotate(newest_version=Max('wiki_page__versions__identifier'))
+            .filter(identifier=F('newest_version'), wiki_page__node_id__in=self.node_ids, wiki_page__deleted__isnull=True)
+            .select_related('wiki_page')
+        )
+        for version in versions:
+            wikis[version.wiki_page.node_id].append(version)
+        return wikis
+
+    def category(self, node):
+        """`get_doctype_from_node`, without a query per node"""
+        if node.is_registration:
+            return 'registration'
+        elif node.id not in self.parent_guids:
+            return 'project'
+        elif node.category in COMPONENT_CATEGORIES:
+            return 'component'
+        return node.category
+
+    def project_or_component(self, node):
+        return 'component' if node.id in self.parent_guids else 'project'
+
+    def is_indexable(self, node):
+        is_qa_node = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(name for name, _ in self.all_tags[node.id])) or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
+        return not (node.is_deleted or not node.is_public or node.archiving or node.is_spam or (node.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or is_qa_node)
+
+
+def iter_node_batches(nodes, batch_size=None):
+    """Yield a NodeSearchBatch per `batch_size` nodes of `nodes`, a queryset or any iterable"""
+    batch_size = batch_size or settings.ELASTIC_BULK_CHUNK_SIZE
+    if isinstance(nodes, QuerySet):
+        nodes = nodes.iterator(chunk_size=batch_size)
+    nodes = iter(nodes)
+    while True:
+        chunk = list(islice(nodes, batch_size))
+        if not chunk:
+            return
+        yield NodeSearchBatch(chunk)
+
+
+def serialize_node(node, category, batch=None):
+    batch = batch or NodeSearchBatch([node])
 
     normalized_title = unicodedata.normalize('NFKD', node.title)
     elastic_document = {
-        **serialize_guid_metadata(node._id),
+        **_serialize_guid_metadata_record(batch.metadata_records.get(node._id)),
         'id': node._id,
         'contributors': [
             {
-                'fullname': x['user__fullname'],
-                'url': '/{}/'.format(x['user__guids___id']) if x['user__is_active'] else None
+                'fullname': fullname,
+                'url': f'/{guid}/' if is_active else None
             }
-            for x in node.contributor_set.filter(visible=True).order_by('_order')
-            .values('user__fullname', 'user__guids___id', 'user__is_active')
+            for fullname, guid, is_active in batch.contributors[node.id]
         ],
         'title': node.title,
         'normalized_title': normalized_title,
         'category': category,
         'public': node.is_public,
-        'tags': list(node.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': batch.tags[node.id],
         'description': node.description,
         'url': node.url,
         'is_registration': node.is_registration,
@@ -383,20 +676,77 @@ def serialize_node(node, category):
         'is_pending_embargo': node.is_pending_embargo,
         'registered_date': node.registered_date,
         'wikis': {},
-        'parent_id': parent_id,
+        'parent_id': batch.parent_guids.get(node.id),
         'date_created': node.created,
-        'license': serialize_node_license_record(node.license),
-        'affiliated_institutions': list(node.affiliated_institutions.values_list('name', flat=True)),
+        'license': serialize_node_license_record(batch.licenses.get(node.id)),
+        'affiliated_institutions': batch.institutions[node.id],
         'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
         'extra_search_terms': clean_splitters(node.title),
     }
     if not node.is_retracted:
-        for wiki in WikiPage.objects.get_wiki_pages_latest(node):
+        for wiki in batch.wikis[node.id]:
             # '.' is not allowed in field names in ES2
             elastic_document['wikis'][wiki.wiki_page.page_name.replace('.', ' ')] = wiki.raw_text(node)
 
     return elastic_document
 
+
+def _node_actions(batch, index):
+    for node in batch.nodes:
+        category = batch.category(node)
+        if batch.is_indexable(node):
+            yield {
+                '_op_type': 'index',
+                '_index': index,
+                '_type': category,
+                '_id': node._id,
+                '_source': serialize_node(node, category, batch=batch),
+            }
+        else:
+            yield {
+                '_op_type': 'delete',
+                '_index': index,
+                '_type': 'registration' if node.is_registration else batch.project_or_component(node),
+                '_id': node._id,
+            }
+
+
+def serialize_nodes(nodes, index=None, batch_size=None):
+    """Stream bulk actions that bring the search documents of `nodes` up to date: an index
+    action for each node that should be searchable and a delete action for the rest.
+
+    Related rows are loaded per batch of `batch_size` nodes, so the number of queries doesn't
+    grow with the size of a batch; the generator can be handed to `helpers.streaming_bulk`.
+    Registration sanctions and archive jobs are still looked up per registration.
+    """
+    index = index or INDEX
+    for batch in iter_node_batches(nodes, batch_size):
+        yield from _node_actions(batch, index)
+
+
+def _update_node_files(batch):
+    from addons.osfstorage.models import OsfStorageFile
+    node_ids_by_type = defaultdict(list)
+    for node in batch.nodes:
+        node_ids_by_type[type(node)].append(node.id)
+    with buffered_search_updates():
+        for model, node_ids in node_ids_by_type.items():
+            files = Q(target_content_type=ContentType.objects.get_for_model(model), target_object_id__in=node_ids)
+            for file_ in paginated(OsfStorageFile, files):
+                file_.update_search()
+
+
+@requires_search
+def bulk_index_nodes(nodes, index=None, batch_size=None):
+    """`update_node` for many nodes: reindex their files and stream their documents in bulk"""
+    index = index or INDEX
+
+    def actions():
+        for batch in iter_node_batches(nodes, batch_size):
+            _update_node_files(batch)
+            yield from _node_actions(batch, index)
+    _write_many(actions())
+
 def serialize_preprint(preprint, category):
     normalized_title = unicodedata.normalize('NFKD', preprint.title)
     elastic_document = {
@@ -471,7 +821,7 @@ def update_node(node, index=None, bulk=False, async_update=False):
         if bulk:
             return elastic_document
         else:
-            client().index(index=index, doc_type=category, id=node._id, body=elastic_document, refresh=True)
+            index_doc(index, category, node._id, elastic_document)
 
 @requires_search
 def update_preprint(preprint, index=None, bulk=False, async_update=False):
@@ -489,7 +839,7 @@ def update_preprint(preprint, index=None, bulk=False, async_update=False):
         if bulk:
             return elastic_document
         else:
-            client().index(index=index, doc_type=category, id=preprint._id, body=elastic_document, refresh=True)
+            index_doc(index, category, preprint._id, elastic_document)
 
 @requires_search
 def update_group(group, index=None, bulk=False, async_update=False, deleted_id=None):
@@ -503,7 +853,7 @@ def update_group(group, index=None, bulk=False, async_update=False, deleted_id=N
         if bulk:
             return elastic_document
         else:
-            client().index(index=index, doc_type=category, id=group._id, body=elastic_document, refresh=True)
+            index_doc(index, category, group._id, elastic_document)
 
 def bulk_update_nodes(serialize, nodes, index=None, category=None):
     """Updates the list of input projects
@@ -514,20 +864,11 @@ def bulk_update_nodes(serialize, nodes, index=None, category=None):
     :return:
     """
     index = index or INDEX
-    actions = []
-    for node in nodes:
-        serialized = serialize(node)
-        if serialized:
-            actions.append({
-                '_op_type': 'update',
-                '_index': index,
-                '_id': node._id,
-                '_type': category or get_doctype_from_node(node),
-                'doc': serialized,
-                'doc_as_upsert': True,
-            })
-    if actions:
-        return helpers.bulk(client(), actions, refresh=True)
+    with buffered_search_updates():
+        for node in nodes:
+            serialized = serialize(node)
+            if serialized:
+                upsert_doc(index, category or get_doctype_from_node(node), node._id, serialized)
 
 
 def serialize_collection_submission_contributor(contrib):
@@ -585,24 +926,37 @@ def bulk_update_collection_submission(collection_submissions, actions=None, op='
         } for collection_submission in collection_submissions)
 
     try:
-        helpers.bulk(client(), actions or [], refresh=True, raise_on_error=False)
+        helpers.bulk(client(), actions or [], refresh=settings.ELASTIC_REFRESH_ON_FLUSH, raise_on_error=False)
     except helpers.BulkIndexError as e:
         raise exceptions.BulkUpdateError(e.errors)
 
-def serialize_contributors(node):
+def serialize_contributors(node, batch=None):
+    batch = batch or NodeSearchBatch([node])
     return {
         'contributors': [
             {
-                'fullname': x['user__fullname'],
-                'url': '/{}/'.format(x['user__guids___id'])
-            } for x in
-            node.contributor_set.filter(visible=True, user__is_active=True).order_by('_order').values('user__fullname', 'user__guids___id')
+                'fullname': fullname,
+                'url': f'/{guid}/'
+            } for fullname, guid, is_active in batch.contributors[node.id] if is_active
         ]
     }
 
 
-bulk_update_contributors = functools.partial(bulk_update_nodes, serialize_contributors)
+def bulk_update_contributors(nodes, index=None, batch_size=None):
+    index = index or INDEX
 
+    def actions():
+        for batch in iter_node_batches(nodes, batch_size):
+            for node in batch.nodes:
+                yield {
+                    '_op_type': 'update',
+                    '_index': index,
+                    '_type': batch.category(node),
+                    '_id': node._id,
+                    'doc': serialize_contributors(node, batch=batch),
+                    'doc_as_upsert': True,
+                }
+    _write_many(actions())
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
 def update_contributors_async(self, user_id):
@@ -610,19 +964,14 @@ def update_contributors_async(self, user_id):
     user = OSFUser.objects.get(id=user_id)
     # If search updated so group member names are displayed on project search results,
     # then update nodes that the user has group membership as well
-    p = Paginator(user.visible_contributor_to.order_by('id'), 100)
-    for page_num in p.page_range:
-        bulk_update_contributors(p.page(page_num).object_list)
+    bulk_update_contributors(user.visible_contributor_to.order_by('id'))
 
 @requires_search
 def update_user(user, index=None):
 
     index = index or INDEX
     if not user.is_active:
-        try:
-            client().delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
-        except NotFoundError:
-            pass
+        remove_doc(index, 'user', user._id)
         return
 
     names = dict(
@@ -655,7 +1004,7 @@ def update_user(user, index=None):
         'boost': 2,  # TODO(fabianvf): Probably should make this a constant or something
     }
 
-    client().index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
+    index_doc(index, 'user', user._id, user_doc)
 
 @requires_search
 def update_file(file_, index=None, delete=False):
@@ -663,13 +1012,7 @@ def update_file(file_, index=None, delete=False):
     target = file_.target
 
     if not file_.should_update_search or delete:
-        client().delete(
-            index=index,
-            doc_type='file',
-            id=file_._id,
-            refresh=True,
-            ignore=[404]
-        )
+        remove_doc(index, 'file', file_._id)
         return
 
     # We build URLs manually here so that this function can be
@@ -703,20 +1046,14 @@ def update_file(file_, index=None, delete=False):
         'extra_search_terms': clean_splitters(file_.name),
     }
 
-    client().index(
-        index=index,
-        doc_type='file',
-        body=file_doc,
-        id=file_._id,
-        refresh=True
-    )
+    index_doc(index, 'file', file_._id, file_doc)
 
 @requires_search
 def update_institution(institution, index=None):
     index = index or INDEX
     id_ = institution._id
     if institution.deleted or institution.deactivated:
-        client().delete(index=index, doc_type='institution', id=id_, refresh=True, ignore=[404])
+        remove_doc(index, 'institution', id_)
     else:
         institution_doc = {
             'id': id_,
@@ -726,7 +1063,7 @@ def update_institution(institution, index=None):
             'name': institution.name,
         }
 
-        client().index(index=index, doc_type='institution', body=institution_doc, id=id_, refresh=True)
+        index_doc(index, 'institution', id_, institution_doc)
 
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
@@ -758,10 +1095,10 @@ def update_collection_submission_async(self, node_id, collection_id=None, op='up
 def update_collection_submission(collection_submission, op='update', index=None):
     index = index or INDEX
     if op == 'delete':
-        client().delete(index=index, doc_type='collectionSubmission', id=collection_submission._id, refresh=True, ignore=[404])
+        remove_doc(index, 'collectionSubmission', collection_submission._id)
         return
     collection_submission_doc = serialize_collection_submission(collection_submission)
-    client().index(index=index, doc_type='collectionSubmission', body=collection_submission_doc, id=collection_submission._id, refresh=True)
+    index_doc(index, 'collectionSubmission', collection_submission._id, collection_submission_doc)
 
 @requires_search
 def delete_all():
@@ -783,6 +1120,7 @@ def create_index(index=None):
     guid_metadata_types = ['project', 'component', 'registration', 'preprint', 'file']
 
     client().indices.create(index, ignore=[400])  # HTTP 400 if index already exists
+    client().indices.put_settings(index=index, body={'index': {'refresh_interval': settings.ELASTIC_REFRESH_INTERVAL}})
     for type_ in document_types:
         if type_ == 'collectionSubmission':
             mapping = {
@@ -861,30 +1199,34 @@ def delete_doc(elastic_document_id, node, index=None, category=None):
             category = 'registration'
         else:
             category = node.project_or_component
-    client().delete(index=index, doc_type=category, id=elastic_document_id, refresh=True, ignore=[404])
+    remove_doc(index, category, elastic_document_id)
 
 @requires_search
 def delete_group_doc(deleted_id, index=None):
     index = index or INDEX
-    client().delete(index=index, doc_type='group', id=deleted_id, refresh=True, ignore=[404])
+    remove_doc(index, 'group', deleted_id)
 
 
 def serialize_guid_metadata(guid):
-    serialized_guid_metadata = {}
     if guid:
-        guid_metadata_record = GuidMetadataRecord.objects.for_guid(guid)
-        if guid_metadata_record.id:
-            serialized_guid_metadata = {
-                'title': guid_metadata_record.title or None,
-                'description': guid_metadata_record.description or None,
-                'language': guid_metadata_record.language or None,
-                'resource_type_general': guid_metadata_record.resource_type_general or None,
-                'funder_name': _funding_values(guid_metadata_record, 'funder_name'),
-                'funder_identifier': _funding_values(guid_metadata_record, 'funder_identifier'),
-                'award_number': _funding_values(guid_metadata_record, 'award_number'),
-                'award_uri': _funding_values(guid_metadata_record, 'award_uri'),
-                'award_title': _funding_values(guid_metadata_record, 'award_title'),
-            }
+        return _serialize_guid_metadata_record(GuidMetadataRecord.objects.for_guid(guid))
+    return {}
+
+
+def _serialize_guid_metadata_record(guid_metadata_record):
+    serialized_guid_metadata = {}
+    if guid_metadata_record and guid_metadata_record.id:
+        serialized_guid_metadata = {
+            'title': guid_metadata_record.title or None,
+            'description': guid_metadata_record.description or None,
+            'language': guid_metadata_record.language or None,
+            'resource_type_general': guid_metadata_record.resource_type_general or None,
+            'funder_name': _funding_values(guid_metadata_record, 'funder_name'),
+            'funder_identifier': _funding_values(guid_metadata_record, 'funder_identifier'),
+            'award_number': _funding_values(guid_metadata_record, 'award_number'),
+            'award_uri': _funding_values(guid_metadata_record, 'award_uri'),
+            'award_title': _funding_values(guid_metadata_record, 'award_title'),
+        }
     return serialized_guid_metadata
 
 
@@ -83,6 +83,11 @@ def bulk_update_nodes(serialize, nodes, index=None, category=None):
     index = index or settings.ELASTIC_INDEX
     search_engine.bulk_update_nodes(serialize, nodes, index=index, category=category)
 
+@requires_search
+def bulk_index_nodes(nodes, index=None):
+    index = index or settings.ELASTIC_INDEX
+    search_engine.bulk_index_nodes(nodes, index=index)
+
 @requires_search
 def delete_node(node, index=None):
     index = index or settings.ELASTIC_INDEX
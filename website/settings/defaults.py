@@ -117,6 +117,11 @@ ELASTIC8_USERNAME = os.environ.get('ELASTIC8_USERNAME', 'elastic')
 ELASTIC8_SECRET = os.environ.get('ELASTIC8_SECRET')
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Search updates are sent in bulk after each request or task (see website.search.elastic_search).
+# Force a refresh on each flush, or leave visibility to the index's refresh interval.
+ELASTIC_REFRESH_ON_FLUSH = False
+ELASTIC_REFRESH_INTERVAL = '1s'
+ELASTIC_BULK_CHUNK_SIZE = 500
 ELASTIC_KWARGS = {
     # 'use_ssl': False,
     # 'verify_certs': True,
@@ -190,6 +195,8 @@ NO_LOGIN_WAIT_TIME = timedelta(weeks=52)   # 1 year for "We miss you at OSF" ema
 NO_LOGIN_OSF4M_WAIT_TIME = timedelta(weeks=52)  # 1 year for "We miss you at OSF" email to users created from OSF4M
 NOTIFICATIONS_CLEANUP_AGE = timedelta(weeks=12)  # 3 months to clean up old notifications and email tasks
 NOTIFICATIONS_CLEANUP_BATCH_SIZE = 10000  # Batch size for notifications and email tasks cleanup
+DIGEST_RECIPIENT_BATCH_SIZE = 500  # Digest recipients read, and their notifications marked as scheduled, per query
+DIGESTS_PER_TASK = 50  # Digests sent by each celery task queued by the digest dispatchers
 
 # Configuration for "We miss you at OSF" email (`NotificationTypeEnum.USER_NO_LOGIN`)
 # Note: 1) we can gradually increase `MAX_DAILY_NO_LOGIN_EMAILS` to 10000, 100000, etc. or set it to `None` after we
@@ -360,6 +367,8 @@ ECSARXIV_CROSSREF_PASSWORD = None
 HOSTING_INSTITUTION_NAME = os.environ.get('HOSTING_INSTITUTION_NAME', 'Center for Open Science')
 HOSTING_INSTITUTION_IRL = os.environ.get('HOSTING_INSTITUTION_IRL', 'https://cos.io/')
 HOSTING_INSTITUTION_ROR_ID = os.environ.get('HOSTING_INSTITUTION_ROR_ID', '05d5mza29')
+# how many metadata gatherers may run at once while building a record (1 runs them in turn)
+METADATA_GATHER_MAX_WORKERS = int(os.environ.get('METADATA_GATHER_MAX_WORKERS', 1))
 
 # if our DOIs cannot be confirmed after X amount of days email the admin
 DAYS_CROSSREF_DOIS_MUST_BE_STUCK_BEFORE_EMAIL = 2
@@ -378,6 +387,10 @@ SHARE_API_TOKEN = None  # Required to send project updates to SHARE
 
 EXTERNAL_REQUEST_TIMEOUT = (10, 30)  # (connect, read) timeout for outbound requests to external services
 
+# bulk ingest (backfills): most requests in flight to trove at once, and tries per request
+SHARE_BULK_MAX_WORKERS = 8
+SHARE_BULK_MAX_ATTEMPTS = 5
+
 SHARE_UPDATE_TASK_SOFT_TIME_LIMIT = 90
 SHARE_UPDATE_TASK_HARD_TIME_LIMIT = 120
 SPAM_SUBMIT_TASK_SOFT_TIME_LIMIT = 60
@@ -396,6 +409,11 @@ STUCK_FILES_DELETE_TIMEOUT = timedelta(days=45) # Registration files stuck for x
 
 ENABLE_ARCHIVER = True
 
+# WaterButler folder listings kept in flight at once while walking an addon's file tree
+ARCHIVE_FILE_TREE_WORKERS = 8
+# Files kept in memory across the file maps the archiver reuses while migrating file references
+ARCHIVE_FILE_MAP_CACHE_MAX_FILES = 100000
+
 JWT_SECRET = 'changeme'
 JWT_ALGORITHM = 'HS256'
 
@@ -779,6 +797,25 @@ ENABLE_INSTITUTIONS = True
 
 ENABLE_STORAGE_USAGE_CACHE = True
 
+# Share users' effective permissions on node trees across requests (see osf.models.node_permissions).
+# They are loaded once per request regardless; only enable this with a shared cache backend, as a
+# per-process cache keeps serving revoked permissions in the other processes until it times out.
+ENABLE_NODE_PERMISSIONS_CACHE = False
+
+# Answer node visibility queries from the materialized readable nodes table (see
+# osf.models.readable_nodes). Run `manage.py rebuild_readable_nodes` before enabling.
+ENABLE_READABLE_NODES = False
+
+# Share guid resolutions across requests (see osf.models.guid_cache). Guids are resolved once per
+# request regardless; only enable this with a shared cache backend.
+ENABLE_GUID_CACHE = False
+
+# Reuse rendered citations across requests (see api.citations.utils)
+ENABLE_CITATION_CACHE = True
+
+# Reuse rendered wiki HTML and search text across requests (see addons.wiki.models.WikiVersion)
+ENABLE_WIKI_CACHE = True
+
 ENABLE_VARNISH = False
 ENABLE_ESI = False
 VARNISH_SERVERS = []  # This should be set in local.py or cache invalidation won't work
@@ -1993,6 +2030,7 @@ RECAPTCHA_VERIFY_URL = 'https://recaptcha.net/recaptcha/api/siteverify'
 AKISMET_APIKEY = None
 AKISMET_ENABLED = False
 DOMAIN_EXTRACTION_TIMEOUT = 60  # seconds
+DOMAIN_EXTRACTION_MAX_WORKERS = 8  # links checked at once
 
 # OOPSpam options
 OOPSPAM_APIKEY = None
@@ -2028,6 +2066,10 @@ SITEMAP_TO_S3 = False
 SITEMAP_AWS_BUCKET = None
 SITEMAP_URL_MAX = 25000
 SITEMAP_INDEX_MAX = 50000
+SITEMAP_SHARD_SIZE = 100000  # ids per shard; shards are rendered separately and only when their objects change
+SITEMAP_WORKERS = 1  # processes rendering shards; only used when not run from a daemonic (e.g. celery) process
+SITEMAP_PARTS_DIR = None  # where rendered shards are kept between runs, defaults to a directory next to the sitemaps
+SITEMAP_QUERY_CHUNK_SIZE = 2000
 SITEMAP_STATIC_URLS = [
     OrderedDict([('loc', ''), ('changefreq', 'yearly'), ('priority', '0.5')]),
     OrderedDict([('loc', 'preprints'), ('changefreq', 'yearly'), ('priority', '0.5')]),
@@ -2146,6 +2188,15 @@ class StorageLimits(enum.IntEnum):
             return cls.DEFAULT
 
 STORAGE_USAGE_CACHE_TIMEOUT = 3600 * 24  # seconds in hour times hour (one day)
+# Persisted usage counters not reconciled for this long are still served, but recounted in the background
+STORAGE_USAGE_REVALIDATE_AFTER = timedelta(days=7)
+NODE_PERMISSIONS_CACHE_TIMEOUT = 60 * 5  # five minutes
+GUID_CACHE_TIMEOUT = 3600  # one hour
+CITATION_CACHE_TIMEOUT = 3600 * 24  # one day
+CITATION_STYLE_CACHE_SIZE = 64  # parsed CSL styles kept per process
+WIKI_CACHE_TIMEOUT = 3600 * 24 * 7  # one week
+WIKI_RENDERER_VERSION = 1  # bump when wiki rendering or WIKI_WHITELIST changes, to drop cached renders
+DOMAIN_CHECK_CACHE_TIMEOUT = 3600 * 24  # one day
 OSF_PIGEON_URL = os.environ.get('OSF_PIGEON_URL', None)
 IA_ARCHIVE_ENABLED = bool(OSF_PIGEON_URL)
 ID_VERSION = 'staging_v2'